@@ -0,0 +1,141 @@
+"""Seeded synthetic data for the benchmark suite.
+
+Everything here is a pure function of `seed` and the requested sizes, so two
+runs on different commits see identical inputs.
+"""
+from datetime import datetime, timedelta
+import random
+import string
+
+FORMS = ["8-K", "4", "10-Q", "10-K", "S-1", "S-3", "424B5", "SC 13G", "8-K/A", "DEF 14A"]
+WORDS = (
+    "the stock is going to moon after earnings I think calls are cheap here and puts are "
+    "expensive short squeeze incoming DD below guidance revenue margin dilution offering "
+    "buyback catalyst chart support resistance volume float insiders bought YOLO CEO ETF IMO "
+    "today tomorrow week month year bullish bearish hold sell buy rocket gamma theta"
+).split()
+SUBREDDITS = ["wallstreetbets", "stocks", "options", "investing"]
+BASE_TIME = datetime(2026, 1, 1)
+TEXT_POOL = 4096
+
+def make_tickers(count, seed=0):
+    rnd = random.Random(seed)
+    seen = set()
+    out = []
+    while len(out) < count:
+        sym = "".join(rnd.choice(string.ascii_uppercase) for _ in range(rnd.randint(2, 5)))
+        if sym not in seen:
+            seen.add(sym)
+            out.append(sym)
+    return out
+
+def company_tickers_json(tickers):
+    """Same shape as SEC's company_tickers.json."""
+    return {
+        str(i): {"cik_str": 1_000_000 + i, "ticker": t, "title": f"{t.title()} Holdings Inc"}
+        for i, t in enumerate(tickers)
+    }
+
+def submissions_json(cik, filings=40, seed=0):
+    """Same shape as data.sec.gov/submissions/CIK##########.json."""
+    rnd = random.Random(seed * 1_000_003 + cik)
+    dates = sorted(
+        (BASE_TIME - timedelta(days=rnd.randint(0, 720)) for _ in range(filings)), reverse=True
+    )
+    recent = {
+        "accessionNumber": [f"{cik:010d}-{d:%y}-{i:06d}" for i, d in enumerate(dates)],
+        "form": [rnd.choice(FORMS) for _ in dates],
+        "filingDate": [d.strftime("%Y-%m-%d") for d in dates],
+        "reportDate": [d.strftime("%Y-%m-%d") for d in dates],
+        "primaryDocument": [f"doc{i}.htm" for i in range(filings)],
+        "primaryDocDescription": [rnd.choice(["", "Current report", "ATM offering"]) for _ in dates],
+    }
+    return {"cik": str(cik), "filings": {"recent": recent, "files": []}}
+
+def make_text(rnd, tickers, words=60):
+    parts = []
+    for _ in range(words):
+        r = rnd.random()
+        if r < 0.03:
+            parts.append("$" + rnd.choice(tickers))
+        elif r < 0.06:
+            parts.append(rnd.choice(tickers))
+        else:
+            parts.append(rnd.choice(WORDS))
+    return " ".join(parts)
+
+def make_corpus(count, tickers, seed=0, words=60):
+    rnd = random.Random(seed)
+    return [make_text(rnd, tickers, words) for _ in range(count)]
+
+def iter_post_rows(count, tickers, seed=0, now=None, start_id=1):
+    """(post tuple, [mention tuples]) for bulk-loading the posts/mentions tables."""
+    rnd = random.Random(seed)
+    now = now or datetime.utcnow()
+    # Generating fresh prose per row dominates load time at 10M rows; reuse a pool.
+    titles = make_corpus(TEXT_POOL, tickers, seed=seed, words=10)
+    bodies = make_corpus(TEXT_POOL, tickers, seed=seed + 1, words=40)
+    for i in range(start_id - 1, start_id - 1 + count):
+        platform = "edgar" if rnd.random() < 0.3 else "reddit"
+        created = now - timedelta(hours=rnd.expovariate(1 / 240.0))
+        if platform == "edgar":
+            form = rnd.choice(FORMS)
+            title = f"{form} - doc{i}.htm"
+            body = f"Form: {form}\nFiling date: {created:%Y-%m-%d}\nReport date: n/a\nAccession: acc-{i}"
+            score = comments = 0
+            symbols = [rnd.choice(tickers)]
+            thesis = rnd.choice(["offering", "8k", "insider", "ownership", "earnings/filing", "other"])
+        else:
+            title = titles[i % TEXT_POOL]
+            body = bodies[rnd.randrange(TEXT_POOL)]
+            score = int(rnd.paretovariate(1.2))
+            comments = int(rnd.paretovariate(1.5))
+            symbols = rnd.sample(tickers, k=rnd.choice([1, 1, 1, 2, 3]))
+            thesis = None
+        post = (
+            i + 1, platform, f"{platform}-{i}", f"https://example.invalid/{platform}/{i}", None,
+            title, body, created, created, score, comments,
+        )
+        mentions = [(i + 1, sym, "stock", None, thesis, 0.6) for sym in symbols]
+        yield post, mentions
+
+def populate_db(engine, count, tickers, seed=0, chunk=50_000):
+    """Bulk-load `count` posts (+ ~1.4 mentions each) through the raw DB-API connection.
+
+    Ids continue after any rows already in `posts`; returns the mention count.
+    """
+    post_sql = (
+        "INSERT INTO posts (id, platform, platform_post_id, url, author, title, body, created_at, "
+        "collected_at, score, comments) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    mention_sql = (
+        "INSERT INTO mentions (post_id, symbol, asset_type, stance, thesis_type, confidence) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        # The write engine runs pysqlite in autocommit mode; batch into one transaction.
+        cur.execute("BEGIN")
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM posts")
+        start_id = cur.fetchone()[0] + 1
+        posts, mentions = [], []
+        total_mentions = 0
+        for post, post_mentions in iter_post_rows(count, tickers, seed, start_id=start_id):
+            posts.append(tuple(v.isoformat(" ") if isinstance(v, datetime) else v for v in post))
+            mentions.extend(post_mentions)
+            if len(posts) >= chunk:
+                cur.executemany(post_sql, posts)
+                cur.executemany(mention_sql, mentions)
+                total_mentions += len(mentions)
+                posts, mentions = [], []
+        if posts:
+            cur.executemany(post_sql, posts)
+            cur.executemany(mention_sql, mentions)
+            total_mentions += len(mentions)
+        raw.commit()
+        cur.execute("ANALYZE")
+        raw.commit()
+        return total_mentions
+    finally:
+        raw.close()
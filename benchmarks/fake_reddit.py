@@ -0,0 +1,117 @@
+"""Stub of the small slice of the PRAW API that the Reddit collector uses.
+
+Listings are newest first, like Reddit's. `publish()` adds fresh items so
+incremental runs and streams can be exercised offline.
+"""
+from datetime import timedelta, timezone
+import random
+
+from .datagen import BASE_TIME, make_text
+
+PAGE_SIZE = 100
+
+class FakeSubmission:
+    __slots__ = ("id", "permalink", "author", "title", "selftext", "created_utc", "score", "num_comments",
+                 "subreddit")
+
+    def __init__(self, sub, i, rnd, tickers, created=None):
+        self.id = f"{sub[:3]}{i:07d}"
+        self.subreddit = sub
+        self.permalink = f"/r/{sub}/comments/{self.id}/"
+        self.author = f"user{rnd.randint(0, 9999)}"
+        self.title = make_text(rnd, tickers, 10)
+        self.selftext = make_text(rnd, tickers, 50)
+        created = created or BASE_TIME - timedelta(minutes=rnd.randint(0, 60 * 24 * 7))
+        self.created_utc = created.replace(tzinfo=timezone.utc).timestamp()
+        self.score = int(rnd.paretovariate(1.2))
+        self.num_comments = int(rnd.paretovariate(1.5))
+
+class FakeComment:
+    __slots__ = ("id", "permalink", "author", "body", "created_utc", "score", "subreddit")
+
+    def __init__(self, sub, i, rnd, tickers, created=None):
+        self.id = f"c{sub[:3]}{i:07d}"
+        self.subreddit = sub
+        self.permalink = f"/r/{sub}/comments/x/_/{self.id}/"
+        self.author = f"user{rnd.randint(0, 9999)}"
+        self.body = make_text(rnd, tickers, rnd.randint(5, 40))
+        created = created or BASE_TIME - timedelta(minutes=rnd.randint(0, 60 * 24 * 7))
+        self.created_utc = created.replace(tzinfo=timezone.utc).timestamp()
+        self.score = int(rnd.paretovariate(1.5))
+
+def _newest_first(items):
+    return sorted(items, key=lambda item: item.created_utc, reverse=True)
+
+class FakeStream:
+    def __init__(self, subreddit):
+        self._subreddit = subreddit
+
+    def _follow(self, listing):
+        # Like PRAW with pause_after=0: replay up to a page of recent items oldest
+        # first, then yield new ones as they appear and None after every poll.
+        seen = set()
+        while True:
+            for item in reversed(list(listing(limit=PAGE_SIZE))):
+                if item.id not in seen:
+                    seen.add(item.id)
+                    yield item
+            yield None
+
+    def submissions(self, pause_after=None):
+        return self._follow(self._subreddit.new)
+
+    def comments(self, pause_after=None):
+        return self._follow(self._subreddit.comments)
+
+class FakeSubreddit:
+    def __init__(self, reddit, names):
+        self._reddit = reddit
+        self._names = names
+
+    def _items(self, store):
+        return _newest_first(item for name in self._names for item in store.get(name, ()))
+
+    def hot(self, limit=None):
+        return iter(self._items(self._reddit.posts)[:limit])
+
+    def new(self, limit=None):
+        return iter(self._items(self._reddit.posts)[:limit])
+
+    def comments(self, limit=None):
+        return iter(self._items(self._reddit.comments)[:limit])
+
+    @property
+    def stream(self):
+        return FakeStream(self)
+
+class FakeReddit:
+    """`FakeReddit(...).subreddit(name).new(limit=n)` yields deterministic submissions."""
+
+    def __init__(self, subs, posts_per_sub, tickers, seed=0, comments_per_sub=0):
+        self._rnd = random.Random(seed)
+        self._tickers = tickers
+        self.posts = {
+            sub: [FakeSubmission(sub, i, self._rnd, tickers) for i in range(posts_per_sub)]
+            for sub in subs
+        }
+        self.comments = {
+            sub: [FakeComment(sub, i, self._rnd, tickers) for i in range(comments_per_sub)]
+            for sub in subs
+        }
+
+    def subreddit(self, name):
+        return FakeSubreddit(self, name.split("+"))
+
+    def publish(self, sub, posts=0, comments=0, created=None):
+        """Add `posts` submissions and `comments` comments to `sub`, created at `created` (default BASE_TIME)."""
+        created = created or BASE_TIME
+        new_posts = self.posts.setdefault(sub, [])
+        for _ in range(posts):
+            new_posts.append(FakeSubmission(sub, len(new_posts), self._rnd, self._tickers, created))
+        new_comments = self.comments.setdefault(sub, [])
+        for _ in range(comments):
+            new_comments.append(FakeComment(sub, len(new_comments), self._rnd, self._tickers, created))
+
+    def info(self, fullnames):
+        by_id = {post.id: post for posts in self.posts.values() for post in posts}
+        return iter([by_id[name[3:]] for name in fullnames if name[3:] in by_id])
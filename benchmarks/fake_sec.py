@@ -0,0 +1,190 @@
+"""Local stand-in for www.sec.gov / data.sec.gov.
+
+Serves a generated `company_tickers.json`, per-CIK submissions documents
+with strong ETags (so conditional requests get 304s), and the "latest
+filings" Atom feed, with optional per-request latency to mimic the real round
+trip. `publish()` adds a filing to both. CIKs in `failing` answer 500, and
+CIKs in `flaky` answer 500 for their next N requests.
+"""
+from datetime import timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+import hashlib
+import json
+import re
+import threading
+import time
+
+from .datagen import BASE_TIME, company_tickers_json, submissions_json
+
+SUBMISSIONS_PATH = re.compile(r"^/submissions/CIK(\d{10})\.json$")
+FEED_PATH = "/cgi-bin/browse-edgar"
+# EDGAR stamps feed entries in US Eastern time.
+FEED_TZ = timezone(timedelta(hours=-5))
+
+class FakeSec:
+    def __init__(self, tickers, filings_per_cik=40, latency=0.0, seed=0):
+        self.tickers = company_tickers_json(tickers)
+        self.filings_per_cik = filings_per_cik
+        self.latency = latency
+        self.seed = seed
+        self.requests = 0
+        self.not_modified = 0
+        self.failing = set()
+        self.flaky = {}         # cik -> requests that still fail
+        self.feed = []          # newest first
+        self._published = {}    # cik -> [filing dicts], newest first
+        self._docs = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def company_tickers_url(self):
+        return f"{self.base_url}/files/company_tickers.json"
+
+    @property
+    def submissions_url(self):
+        return f"{self.base_url}/submissions/CIK{{cik}}.json"
+
+    @property
+    def feed_url(self):
+        return f"{self.base_url}{FEED_PATH}?action=getcurrent&start={{start}}&count={{count}}&output=atom"
+
+    def publish(self, cik, form="8-K", updated=None):
+        """Add a filing to `cik`'s submissions document and the top of the feed; returns its accession."""
+        updated = updated or BASE_TIME
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=FEED_TZ)
+        with self._lock:
+            filings = self._published.setdefault(cik, [])
+            accession = f"{cik:010d}-{updated:%y}-{900000 + len(filings):06d}"
+            filings.insert(0, {"accession": accession, "form": form, "date": updated.strftime("%Y-%m-%d")})
+            self.feed.insert(0, {"cik": cik, "accession": accession, "form": form, "updated": updated})
+            self.feed.sort(key=lambda e: e["updated"], reverse=True)
+            self._docs.pop(f"/submissions/CIK{cik:010d}.json", None)
+        return accession
+
+    def fails(self, cik):
+        with self._lock:
+            if self.flaky.get(cik):
+                self.flaky[cik] -= 1
+                return True
+        return cik in self.failing
+
+    def feed_page(self, start, count):
+        with self._lock:
+            entries = self.feed[start:start + count]
+        parts = ['<?xml version="1.0" encoding="ISO-8859-1" ?>', '<feed xmlns="http://www.w3.org/2005/Atom">']
+        for e in entries:
+            parts.append(
+                f"<entry><title>{escape(e['form'])} - COMPANY {e['cik']} ({e['cik']:010d}) (Filer)</title>"
+                f"<id>urn:tag:sec.gov,2008:accession-number={e['accession']}</id>"
+                f"<updated>{e['updated'].isoformat()}</updated>"
+                f'<category scheme="https://www.sec.gov/" label="form type" term="{escape(e["form"])}"/>'
+                "</entry>"
+            )
+        parts.append("</feed>")
+        return "".join(parts).encode("iso-8859-1")
+
+    def _submissions(self, cik):
+        payload = submissions_json(cik, self.filings_per_cik, self.seed)
+        recent = payload["filings"]["recent"]
+        for filing in reversed(self._published.get(cik, [])):
+            recent["accessionNumber"].insert(0, filing["accession"])
+            recent["form"].insert(0, filing["form"])
+            recent["filingDate"].insert(0, filing["date"])
+            recent["reportDate"].insert(0, filing["date"])
+            recent["primaryDocument"].insert(0, "published.htm")
+            recent["primaryDocDescription"].insert(0, "")
+        return payload
+
+    def document(self, path):
+        """-> (body bytes, etag) or None; documents are generated once and memoized."""
+        with self._lock:
+            doc = self._docs.get(path)
+        if doc is not None:
+            return doc
+        if path == "/files/company_tickers.json":
+            payload = self.tickers
+        else:
+            m = SUBMISSIONS_PATH.match(path)
+            if not m:
+                return None
+            payload = self._submissions(int(m.group(1)))
+        body = json.dumps(payload).encode("utf-8")
+        doc = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+        with self._lock:
+            self._docs[path] = doc
+        return doc
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlsplit(self.path)
+                if url.path == FEED_PATH:
+                    query = parse_qs(url.query)
+                    body = fake.feed_page(int(query.get("start", ["0"])[0]), int(query.get("count", ["40"])[0]))
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/atom+xml")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                m = SUBMISSIONS_PATH.match(url.path)
+                doc = None if m and fake.fails(int(m.group(1))) else fake.document(url.path)
+                if doc is None:
+                    self.send_response(500 if m else 404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, etag = doc
+                if self.headers.get("If-None-Match") == etag:
+                    with fake._lock:
+                        fake.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
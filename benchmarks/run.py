@@ -0,0 +1,335 @@
+"""Offline performance benchmarks.
+
+    python -m benchmarks.run --scale 100000 --out bench.json
+    python -m benchmarks.run --scale 100000 --baseline bench.json --threshold 0.15
+
+Everything runs against a throwaway SQLite DB and SEC cache in a temp
+directory, a local fake SEC server and a stub Reddit client, so no network or
+credentials are needed. Inputs are generated from `--seed`, so results from
+different commits are comparable. With `--baseline`, exits 1 if any benchmark's
+median is more than `--threshold` slower than in the baseline file.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+GROUPS = ("edgar", "reddit", "extract", "score", "queries")
+
+class Bench:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    def run(self, name, fn, ops=1, repeat=None, setup=None):
+        """Time `fn()` `repeat` times (after an untimed `setup()` each run); keep the median."""
+        timings = []
+        for _ in range(repeat or self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        self.results[name] = {
+            "median_s": round(median, 6),
+            "min_s": round(min(timings), 6),
+            "runs": len(timings),
+            "ops": ops,
+            "ops_per_s": round(ops / median, 2) if median else None,
+        }
+        print(f"  {name:<36} {median * 1000:10.2f} ms  ({ops / median if median else 0:,.0f} ops/s)")
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parents[1], check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def wipe_db():
+    from sqlalchemy import text
+    from tradebot.db import engine
+
+    with engine.begin() as conn:
+        for table in ("post_lsh", "post_signatures", "mentions", "posts", "symbol_stats", "cik_map", "edgar_progress"):
+            conn.execute(text(f"DELETE FROM {table}"))
+        # Everything but the query-cache version counter (CIK map stamp, EDGAR passes).
+        conn.execute(text("DELETE FROM app_state WHERE key != 'data_version'"))
+
+def bench_edgar(bench, args, tickers):
+    from benchmarks.fake_sec import FakeSec
+    from tradebot.collectors import edgar
+    from tradebot.config import settings
+
+    watchlist = tickers[:args.edgar_ciks]
+    with FakeSec(tickers, filings_per_cik=args.filings_per_cik, latency=args.latency, seed=args.seed) as sec:
+        edgar.COMPANY_TICKERS_URL = sec.company_tickers_url
+        edgar.SUBMISSIONS_URL = sec.submissions_url
+
+        def cold():
+            wipe_db()
+            shutil.rmtree(Path(settings.sec_cache_dir) / "http", ignore_errors=True)
+            edgar._ticker_maps.clear()
+
+        def ingest():
+            res = edgar.ingest_edgar(limit_per_ticker=args.filings_per_cik, tickers=watchlist)
+            assert not res["errors"], res
+
+        bench.run("edgar.ingest_cold", ingest, ops=len(watchlist), setup=cold)
+        bench.run("edgar.ingest_warm_304", ingest, ops=len(watchlist))
+        print(f"  (fake SEC served {sec.requests} requests, {sec.not_modified} not modified)")
+
+def bench_reddit(bench, args, tickers):
+    from benchmarks.fake_reddit import FakeReddit
+    from benchmarks.datagen import BASE_TIME, SUBREDDITS
+    from tradebot.collectors.reddit import ingest_reddit, refresh_reddit_scores
+
+    client = FakeReddit(SUBREDDITS, args.reddit_posts, tickers, seed=args.seed)
+    ops = len(SUBREDDITS) * args.reddit_posts
+
+    def ingest():
+        ingest_reddit(limit_per_sub=args.reddit_posts, client=client)
+
+    bench.run("reddit.ingest_cold", ingest, ops=ops, setup=wipe_db)
+    # Nothing new since the last run: the high-water marks stop each listing at once.
+    bench.run("reddit.ingest_incremental", ingest, ops=ops)
+    # Generated posts are dated around BASE_TIME; widen the window to cover them all.
+    hours = (datetime.utcnow() - BASE_TIME).total_seconds() / 3600 + 24 * 8
+    bench.run("reddit.refresh_scores", lambda: refresh_reddit_scores(hours=hours, client=client), ops=ops)
+
+def bench_extract(bench, args, tickers):
+    from benchmarks.datagen import make_corpus
+    from tradebot.nlp.tickers import SymbolUniverse, extract_many, extract_symbols, set_symbol_universe
+
+    corpus = make_corpus(args.corpus, tickers, seed=args.seed)
+    universe = SymbolUniverse(tickers)
+    set_symbol_universe(universe)
+    bench.run("extract.extract_symbols", lambda: [extract_symbols(t, universe) for t in corpus], ops=len(corpus))
+    bench.run("extract.extract_many", lambda: extract_many(corpus), ops=len(corpus))
+
+def bench_score(bench, args, tickers):
+    import numpy as np
+    import pandas as pd
+    from tradebot.scoring.score import decayed_symbol_scores, idea_score, idea_scores, score_mentions
+
+    n = args.scale
+    rng = np.random.default_rng(args.seed)
+    symbols = np.asarray(tickers, dtype=object)[rng.integers(0, len(tickers), n)]
+    popularity = rng.pareto(1.2, n).astype(np.int64)
+    comments = rng.pareto(1.5, n).astype(np.int64)
+    age = rng.exponential(240.0, n)
+    now = datetime(2026, 1, 1)
+    frame = pd.DataFrame({
+        "symbol": symbols,
+        "asset_type": "stock",
+        "score": popularity,
+        "comments": comments,
+        "created_at": now - pd.to_timedelta(age, unit="h"),
+    })
+
+    scalar_n = min(n, 100_000)
+    bench.run(
+        "score.idea_score_scalar",
+        lambda: [idea_score(p, c, a) for p, c, a in zip(popularity[:scalar_n].tolist(), comments[:scalar_n].tolist(), age[:scalar_n].tolist())],
+        ops=scalar_n,
+    )
+    bench.run("score.idea_scores", lambda: idea_scores(popularity, comments, age), ops=n)
+    bench.run("score.decayed_symbol_scores", lambda: decayed_symbol_scores(symbols, popularity, comments, age), ops=n)
+    bench.run("score.score_mentions", lambda: score_mentions(frame, now), ops=n)
+
+    def rank():
+        keys, scores = decayed_symbol_scores(symbols, popularity, comments, age)
+        order = np.argsort(-scores, kind="stable")[:200]
+        return keys[order]
+
+    bench.run("score.rank_top200", rank, ops=n)
+
+    from tradebot.velocity import VelocityTracker, _buckets
+
+    # Mentions arrive roughly in time order, in collector-sized batches.
+    order = np.argsort(frame["created_at"].to_numpy(), kind="stable")
+    sym_list = symbols[order].tolist()
+    buckets = _buckets(frame["created_at"].iloc[order])
+
+    def record():
+        tracker = VelocityTracker()
+        for i in range(0, n, 1000):
+            tracker.record_buckets(sym_list[i:i + 1000], buckets[i:i + 1000], track=False)
+        return tracker
+
+    bench.run("score.velocity_record", record, ops=n)
+    tracker = record()
+    bench.run("score.velocity_frame", lambda: tracker.frame(now), ops=len(tracker))
+
+def bench_queries(bench, args, tickers):
+    from benchmarks.datagen import populate_db
+    from tradebot import queries
+    from tradebot.db import ReadSession, engine, read_engine
+    from tradebot.models import Summary
+    from tradebot.scoring.score import DECAY_HORIZON_HOURS, score_aggregates
+    from tradebot.stats import rebuild_symbol_stats
+
+    wipe_db()
+    start = time.perf_counter()
+    mentions = populate_db(engine, args.scale, tickers, seed=args.seed)
+    with engine.begin() as conn:
+        rebuild_symbol_stats(conn)
+    print(f"  (loaded {args.scale:,} posts / {mentions:,} mentions in {time.perf_counter() - start:.1f}s)")
+
+    now = datetime.utcnow()
+    since_48h = queries.window_start(now, hours=48)
+    since_7d = queries.window_start(now, days=7)
+    horizon = queries.window_start(now, hours=DECAY_HORIZON_HOURS)
+    symbol = tickers[0]
+
+    def ranked_with_score():
+        df = queries.ranked_ideas.uncached(read_engine, limit=200)
+        df["idea_score"] = score_aggregates(df, now)
+        return df.sort_values("idea_score", ascending=False)
+
+    def summary_lookup():
+        # Same lookup as app.py's get_cached_summary.
+        db = ReadSession()
+        try:
+            return db.query(Summary).filter_by(
+                scope="ticker", symbol=symbol, time_window_days=7,
+            ).order_by(Summary.generated_at.desc()).first()
+        finally:
+            db.close()
+
+    cases = [
+        ("queries.fetch_edgar_filings_48h", lambda: queries.fetch_edgar_filings.uncached(read_engine, since_48h)),
+        ("queries.fetch_edgar_filings_7d_symbol", lambda: queries.fetch_edgar_filings.uncached(read_engine, since_7d, symbol=symbol)),
+        ("queries.distinct_symbols", lambda: queries.distinct_symbols.uncached(read_engine)),
+        ("queries.ranked_ideas", lambda: queries.ranked_ideas.uncached(read_engine, limit=200)),
+        ("queries.ranked_ideas_scored", ranked_with_score),
+        ("queries.recent_mentions", lambda: queries.recent_mentions.uncached(read_engine, horizon)),
+        ("queries.catalysts", lambda: queries.catalysts.uncached(read_engine, since_48h, limit=200)),
+        ("queries.symbol_posts", lambda: queries.symbol_posts.uncached(read_engine, symbol, limit=50)),
+        ("queries.summary_lookup", summary_lookup),
+        ("queries.ranked_ideas_cached", lambda: queries.ranked_ideas(read_engine, limit=200)),
+    ]
+    for name, fn in cases:
+        bench.run(name, fn)
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"\n{'benchmark':<38} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, cur in sorted(results.items()):
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<38} {'-':>12} {cur['median_s'] * 1000:10.2f}ms {'new':>8}")
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<38} {base['median_s'] * 1000:10.2f}ms {cur['median_s'] * 1000:10.2f}ms "
+            f"{(ratio - 1) * 100:+7.1f}%{flag}"
+        )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--scale", type=int, default=100_000, help="posts in the DB and rows in scoring benchmarks (10k-10M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=GROUPS, help="run only these groups")
+    parser.add_argument("--tickers", type=int, default=5000, help="size of the synthetic SEC ticker universe")
+    parser.add_argument("--edgar-ciks", type=int, default=200, help="CIKs fetched per ingest_edgar run")
+    parser.add_argument("--filings-per-cik", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake SEC per-request latency (seconds)")
+    parser.add_argument("--sec-rps", type=float, default=10_000, help="SEC rate limit used during the run")
+    parser.add_argument("--reddit-posts", type=int, default=1000, help="stub posts per subreddit")
+    parser.add_argument("--corpus", type=int, help="texts for extract benchmarks (default: min(scale, 50000))")
+    parser.add_argument("--workdir", help="keep the DB and cache here instead of a temp dir")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown vs baseline (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+    args.corpus = args.corpus or min(args.scale, 50_000)
+    groups = args.only or GROUPS
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="tradebot-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / "bench.sqlite"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    # Settings are read at import time, so configure the environment first.
+    os.environ["TRADEBOT_DB_URL"] = f"sqlite:///{db_path}"
+    os.environ["SEC_CACHE_DIR"] = str(workdir / "sec")
+    os.environ["SEC_MAX_RPS"] = str(args.sec_rps)
+    os.environ["SEC_MAX_RETRIES"] = "0"
+    # The stub Reddit client is local; don't pace it like the real API.
+    os.environ["REDDIT_MAX_RPS"] = "1000000"
+    os.environ["VELOCITY_SNAPSHOT"] = str(workdir / "velocity.npz")
+    shutil.rmtree(workdir / "sec", ignore_errors=True)
+
+    from benchmarks.datagen import make_tickers
+    from tradebot.migrations import migrate
+
+    migrate()
+    tickers = make_tickers(args.tickers, seed=args.seed)
+    bench = Bench(args.repeat)
+    print(f"scale={args.scale:,} seed={args.seed} workdir={workdir}")
+    try:
+        if "edgar" in groups:
+            print("edgar")
+            bench_edgar(bench, args, tickers)
+        if "reddit" in groups:
+            print("reddit")
+            bench_reddit(bench, args, tickers)
+        if "extract" in groups:
+            print("extract")
+            bench_extract(bench, args, tickers)
+        if "score" in groups:
+            print("score")
+            bench_score(bench, args, tickers)
+        if "queries" in groups:
+            print("queries")
+            bench_queries(bench, args, tickers)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "workdir")},
+        },
+        "results": bench.results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nwrote {args.out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("args", {}).get("scale") != args.scale:
+            print("warning: baseline was recorded at a different --scale")
+        regressions = compare(bench.results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
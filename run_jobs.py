@@ -1,9 +1,129 @@
-from tradebot.db import Base, engine, SessionLocal
-from tradebot.collectors.reddit import ingest_reddit
+import argparse
+import logging
+
+from tradebot.migrations import migrate
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    migrate()
 
-if __name__ == "__main__":
+def rebuild_stats():
+    from tradebot.archive import archived_stats_delta
+    from tradebot.db import run_write
+    from tradebot.stats import apply_delta, rebuild_symbol_stats
+
+    archived = archived_stats_delta()
+
+    def rebuild(db):
+        rebuild_symbol_stats(db)
+        apply_delta(db, archived)
+
+    run_write(rebuild)
+    print("symbol_stats rebuilt")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trade Idea Bot background jobs")
+    sub = parser.add_subparsers(dest="command")
+
+    reddit = sub.add_parser("reddit", help="one-shot Reddit ingest (default)")
+    reddit.add_argument("--limit-per-sub", type=int, default=75)
+    stream = sub.add_parser("reddit-stream", help="follow new Reddit submissions and comments until Ctrl-C")
+    stream.add_argument("--batch-size", type=int, help="items per micro-batch (default REDDIT_STREAM_BATCH)")
+    stream.add_argument("--flush-seconds", type=float, help="default REDDIT_STREAM_FLUSH_SECONDS")
+    sub.add_parser("reddit-refresh", help="re-read score/comment counts of recent Reddit posts")
+
+    edgar = sub.add_parser("edgar", help="one-shot EDGAR ingest")
+    edgar.add_argument("--universe", choices=["watchlist", "all"], help="default EDGAR_UNIVERSE")
+    edgar.add_argument("--shard", help="i/n: only poll CIKs with cik %% n == i (default EDGAR_SHARD)")
+
+    sub.add_parser("filings", help="download/parse pending filing documents for dilution signals")
+    sub.add_parser("scheduler", help="run EDGAR/Reddit ingestion on their configured intervals")
+    sub.add_parser("snapshots", help="rebuild the JSON snapshots served by `python -m tradebot.api`")
+    sub.add_parser("rebuild-stats", help="recompute the symbol_stats aggregate table from history")
+    sub.add_parser("dedup-backfill", help="sign existing posts, link near-duplicates, then rebuild stats")
+
+    archive = sub.add_parser("archive", help="move old posts to the Parquet archive")
+    archive.add_argument("--older-than-days", type=float, help="retention horizon (default ARCHIVE_AFTER_DAYS)")
+    archive.add_argument("--compact", action="store_true", help="only compact existing archive partitions")
+    archive.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards to shrink the file")
+
+    backfill = sub.add_parser("backfill-edgar", help="load full filing history from SEC's bulk submissions.zip")
+    backfill.add_argument("--zip", default=".cache/sec/submissions.zip", help="path to submissions.zip")
+    backfill.add_argument("--download", action="store_true", help="download the archive to --zip first")
+    backfill.add_argument("--universe", choices=["watchlist", "all"], default="watchlist")
+    backfill.add_argument("--since", help="only filings on/after YYYY-MM-DD")
+    backfill.add_argument("--reset", action="store_true", help="ignore the saved checkpoint")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     init_db()
-    print(ingest_reddit(limit_per_sub=75))
+
+    if args.command == "scheduler":
+        from tradebot.scheduler import run_scheduler
+
+        run_scheduler()
+    elif args.command in ("edgar", "filings", "reddit-refresh"):
+        from tradebot.config import settings
+        from tradebot.jobs import run_job
+
+        if getattr(args, "universe", None):
+            settings.edgar_universe = args.universe
+        if getattr(args, "shard", None):
+            from tradebot.collectors.edgar import parse_shard
+
+            try:
+                parse_shard(args.shard)
+            except ValueError as exc:
+                parser.error(str(exc))
+            settings.edgar_shard = args.shard
+        print(run_job(args.command, trigger="manual"))
+    elif args.command == "reddit-stream":
+        from tradebot.collectors.reddit import stream_reddit
+        from tradebot.jobs import run_post_ingest_hooks
+
+        print(stream_reddit(
+            batch_size=args.batch_size, flush_seconds=args.flush_seconds,
+            on_flush=lambda totals: run_post_ingest_hooks("reddit", totals),
+        ))
+    elif args.command == "backfill-edgar":
+        from tradebot.collectors.edgar_bulk import backfill_edgar, download_bulk_submissions
+
+        if args.download:
+            download_bulk_submissions(args.zip)
+        print(backfill_edgar(args.zip, universe=args.universe, since=args.since, reset=args.reset))
+    elif args.command == "archive":
+        from tradebot import archive as archive_mod
+
+        if args.compact:
+            print({"compacted": archive_mod.compact_archive(min_files=2)})
+        elif args.older_than_days is None:
+            from tradebot.jobs import run_job
+
+            print(run_job("archive", trigger="manual"))
+        else:
+            print(archive_mod.archive_posts(older_than_days=args.older_than_days))
+        if args.vacuum:
+            archive_mod.vacuum()
+    elif args.command == "dedup-backfill":
+        from tradebot.dedup import index_existing
+
+        print({"duplicates": index_existing()})
+        rebuild_stats()
+    elif args.command == "snapshots":
+        from tradebot.snapshots import write_snapshots
+
+        for name, path in write_snapshots().items():
+            print(f"{name}: {path}")
+    elif args.command == "rebuild-stats":
+        rebuild_stats()
+    else:
+        from tradebot.jobs import run_job
+
+        print(run_job("reddit", trigger="manual", limit_per_sub=getattr(args, "limit_per_sub", 75)))
+
+    from tradebot.jobs import wait_for_background_jobs
+
+    # e.g. the filings job queued after an EDGAR ingest
+    wait_for_background_jobs()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Shared fixtures.
+
+Settings are read at import time, so the environment points tradebot at a
+throwaway SQLite DB and cache directories before anything imports it. Network
+calls go to the local fakes in `benchmarks/`.
+"""
+from pathlib import Path
+import os
+import shutil
+import tempfile
+
+_root = Path(tempfile.mkdtemp(prefix="tradebot-tests-"))
+os.environ.update({
+    "TRADEBOT_DB_URL": f"sqlite:///{_root / 'test.sqlite'}",
+    "SEC_CACHE_DIR": str(_root / "sec"),
+    "SEC_MAX_RPS": "1000",
+    "SEC_MAX_RETRIES": "0",
+    "REDDIT_MAX_RPS": "1000000",
+    "VELOCITY_SNAPSHOT": str(_root / "velocity.npz"),
+    "SNAPSHOT_DIR": str(_root / "snapshots"),
+    "ARCHIVE_DIR": str(_root / "archive"),
+    "METRICS_ENABLED": "0",
+})
+
+import pytest
+from sqlalchemy import text
+
+from benchmarks.datagen import make_tickers
+from benchmarks.fake_sec import FakeSec
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from tradebot.migrations import migrate
+    migrate()
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    from tradebot.cache import query_cache
+    from tradebot.collectors import edgar
+    from tradebot.db import Base, engine
+
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(text(f"DELETE FROM {table.name}"))
+    shutil.rmtree(_root / "sec", ignore_errors=True)
+    edgar._ticker_maps.clear()
+    query_cache.clear()
+    yield
+
+
+@pytest.fixture
+def tickers():
+    return make_tickers(20, seed=1)
+
+
+@pytest.fixture
+def sec(tickers, monkeypatch):
+    """Local fake SEC with the EDGAR collector pointed at it."""
+    from tradebot.collectors import edgar
+
+    with FakeSec(tickers, filings_per_cik=5) as fake:
+        monkeypatch.setattr(edgar, "COMPANY_TICKERS_URL", fake.company_tickers_url)
+        monkeypatch.setattr(edgar, "SUBMISSIONS_URL", fake.submissions_url)
+        yield fake
@@ -0,0 +1,101 @@
+from datetime import datetime
+from threading import Thread
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tradebot import api, snapshots
+from tradebot.api import ApiError, SnapshotStore, resolve
+from tradebot.db import run_write
+from tradebot.snapshots import write_snapshots
+from tradebot.store import upsert_posts
+
+NOW = datetime(2026, 1, 5, 12)
+
+
+def add_post(key, *symbols):
+    row = {
+        "platform_post_id": key, "url": f"https://reddit.com/{key}", "title": key, "body": "",
+        "created_at": datetime(2026, 1, 5, 10),
+        "mentions": [
+            {"symbol": s, "asset_type": "stock", "thesis_type": "momentum", "confidence": 0.8}
+            for s in symbols
+        ],
+    }
+    run_write(lambda db: upsert_posts(db, "reddit", [row]))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots.settings, "snapshot_dir", str(tmp_path))
+    add_post("a", "ABC", "XYZ")
+    add_post("b", "ABC")
+    write_snapshots(now=NOW)
+    return SnapshotStore(str(tmp_path))
+
+
+def render(store, path, params=None):
+    return resolve(store, path, params or {})[1]()
+
+
+def test_resolve_filters_and_limits(store):
+    ideas = render(store, "/ideas", {"limit": "1"})["ideas"]
+    assert [i["symbol"] for i in ideas] == ["ABC"]
+    assert render(store, "/ideas", {"asset_type": "crypto"})["ideas"] == []
+    assert render(store, "/filings/abc") == {"generated_at": "2026-01-05T12:00:00", "symbol": "ABC", "filings": []}
+    with pytest.raises(ApiError) as err:
+        render(store, "/ideas", {"sort": "nope"})
+    assert err.value.status == 400
+
+
+def test_missing_snapshot_is_503(tmp_path):
+    with pytest.raises(ApiError) as err:
+        resolve(SnapshotStore(str(tmp_path / "empty")), "/ideas", {})
+    assert err.value.status == 503
+
+
+def test_etag_is_stable_until_the_snapshot_is_rewritten(store):
+    etag, _ = resolve(store, "/ideas", {"limit": "5"})
+    assert resolve(store, "/ideas", {"limit": "5"})[0] == etag
+    assert resolve(store, "/ideas", {"limit": "6"})[0] != etag
+
+    add_post("c", "NEW")
+    write_snapshots(now=NOW)
+
+    new_etag, render_new = resolve(store, "/ideas", {"limit": "5"})
+    assert new_etag != etag
+    assert "NEW" in {i["symbol"] for i in render_new()["ideas"]}
+
+
+def test_body_cache_renders_each_etag_once_and_evicts_lru(store, monkeypatch):
+    monkeypatch.setattr(api, "BODY_CACHE_SIZE", 2)
+    calls = []
+
+    def body(etag):
+        return store.body(etag, lambda: calls.append(etag) or {"etag": etag})
+
+    body("a"), body("b"), body("a"), body("c")
+    assert calls == ["a", "b", "c"]
+    body("b")  # least recently used, evicted by "c"
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_if_none_match_gets_a_304(store):
+    server = api.serve("127.0.0.1", 0, store)
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/ideas?limit=5"
+    try:
+        with urllib.request.urlopen(url) as resp:
+            etag = resp.headers["ETag"]
+            assert resp.status == 200
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(urllib.request.Request(url, headers={"If-None-Match": etag}))
+        assert err.value.code == 304
+        stale = urllib.request.Request(url, headers={"If-None-Match": '"stale"'})
+        with urllib.request.urlopen(stale) as resp:
+            assert resp.status == 200
+            assert resp.headers["ETag"] == etag
+    finally:
+        server.shutdown()
+        server.server_close()
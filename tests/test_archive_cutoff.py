@@ -0,0 +1,50 @@
+from datetime import datetime
+import json
+import zipfile
+
+from tradebot.collectors.edgar_bulk import backfill_edgar
+from tradebot.db import run_write
+from tradebot.state import ARCHIVE_CUTOFF_KEY, set_state
+from tradebot.store import upsert_posts
+
+CUTOFF = datetime(2025, 6, 1)
+
+
+def set_cutoff():
+    run_write(lambda db: set_state(db, ARCHIVE_CUTOFF_KEY, CUTOFF.isoformat()))
+
+
+def post(key, created_at):
+    return {"platform_post_id": key, "url": f"https://example.com/{key}", "title": key, "body": "",
+            "created_at": created_at, "mentions": []}
+
+
+def test_upsert_reports_posts_older_than_the_cutoff():
+    set_cutoff()
+    res = run_write(lambda db: upsert_posts(db, "edgar", [post("old", datetime(2025, 1, 1)),
+                                                          post("new", datetime(2025, 7, 1))]))
+    assert (res["inserted"], res["skipped_archived"]) == (1, 1)
+
+
+def test_backfill_reports_filings_skipped_for_the_archive(sec, tickers, tmp_path, monkeypatch, caplog):
+    from tradebot.collectors import edgar
+
+    monkeypatch.setattr(edgar, "load_watchlist", lambda: tickers[:3])
+    zip_path = tmp_path / "submissions.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for i in range(3):
+            cik = 1_000_000 + i
+            body, _ = sec.document(f"/submissions/CIK{cik:010d}.json")
+            zf.writestr(f"CIK{cik:010d}.json", body)
+    filings = sum(
+        len(json.loads(sec.document(f"/submissions/CIK{1_000_000 + i:010d}.json")[0])["filings"]["recent"]["form"])
+        for i in range(3)
+    )
+    set_cutoff()
+
+    res = backfill_edgar(zip_path)
+
+    assert res["filings"] == filings
+    assert res["skipped_archived"] > 0
+    assert res["new_posts"] + res["skipped_archived"] == filings
+    assert "will NOT be loaded" in caplog.text
@@ -0,0 +1,52 @@
+import zipfile
+
+from tradebot.collectors.edgar_bulk import backfill_edgar
+from tradebot.db import ReadSession, run_write
+from tradebot.state import get_state, set_state
+
+
+def make_zip(sec, path, count=3):
+    with zipfile.ZipFile(path, "w") as zf:
+        for i in range(count):
+            cik = 1_000_000 + i
+            body, _ = sec.document(f"/submissions/CIK{cik:010d}.json")
+            zf.writestr(f"CIK{cik:010d}.json", body)
+    return path
+
+
+def checkpoint(zip_path):
+    db = ReadSession()
+    try:
+        return get_state(db, f"edgar_backfill:{zip_path.name}")
+    finally:
+        db.close()
+
+
+def test_resumes_after_the_checkpoint(sec, tickers, tmp_path, monkeypatch):
+    from tradebot.collectors import edgar
+
+    monkeypatch.setattr(edgar, "load_watchlist", lambda: tickers[:3])
+    zip_path = make_zip(sec, tmp_path / "submissions.zip")
+    run_write(lambda db: set_state(db, f"edgar_backfill:{zip_path.name}", f"{1_000_000:010d}"))
+
+    res = backfill_edgar(zip_path)
+
+    assert res["ciks"] == 2
+    assert res["resumed_after"] == f"{1_000_000:010d}"
+
+
+def test_completed_run_clears_the_checkpoint(sec, tickers, tmp_path, monkeypatch):
+    from tradebot.collectors import edgar
+
+    monkeypatch.setattr(edgar, "load_watchlist", lambda: tickers[:3])
+    zip_path = make_zip(sec, tmp_path / "submissions.zip")
+
+    first = backfill_edgar(zip_path)
+    assert checkpoint(zip_path) is None
+    # A refreshed archive at the same path is read in full, not skipped.
+    second = backfill_edgar(zip_path)
+
+    assert first["ciks"] == second["ciks"] == 3
+    assert first["new_posts"] > 0
+    assert second["new_posts"] == 0
+    assert second["resumed_after"] is None
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from tradebot.collectors import edgar
+from tradebot.collectors.edgar_feed import HWM_KEY, fetch_feed_since, ingest_edgar_feed
+from tradebot.collectors.sec import thread_session
+from tradebot.config import settings
+from tradebot.db import ReadSession
+from tradebot.state import get_state
+
+T0 = datetime(2026, 1, 2, 9, 0)
+
+
+@pytest.fixture
+def feed(sec, tickers, monkeypatch):
+    monkeypatch.setattr(settings, "sec_feed_url", sec.feed_url)
+    monkeypatch.setattr(settings, "edgar_universe", "watchlist")
+    monkeypatch.setattr(settings, "edgar_shard", "0/1")
+    monkeypatch.setattr(edgar, "load_watchlist", lambda: tickers[:5])
+    return sec
+
+
+def cik(i):
+    return 1_000_000 + i
+
+
+def hwm():
+    db = ReadSession()
+    try:
+        raw = get_state(db, HWM_KEY)
+    finally:
+        db.close()
+    return datetime.fromisoformat(raw) if raw else None
+
+
+def stored(accession):
+    db = ReadSession()
+    try:
+        return db.execute(
+            text("SELECT COUNT(*) FROM posts WHERE body LIKE :pat"), {"pat": f"%Accession: {accession}%"}
+        ).scalar() > 0
+    finally:
+        db.close()
+
+
+def test_first_poll_is_full_then_feed_polls_only_new_entries(feed):
+    feed.publish(cik(0), updated=T0)
+    first = ingest_edgar_feed(page_size=10)
+    assert first["mode"] == "full"
+    assert first["ciks"] == 5
+    assert hwm() == feed.feed[0]["updated"]
+
+    accession = feed.publish(cik(1), updated=T0 + timedelta(hours=1))
+    second = ingest_edgar_feed(page_size=10)
+    assert second["mode"] == "feed"
+    # The entry at the old mark is re-read (`>=`), so CIK 0 is polled again (a cheap 304).
+    assert second["ciks"] == 2
+    assert stored(accession)
+    assert hwm() == feed.feed[0]["updated"]
+
+
+def test_fetch_feed_since_keeps_entries_at_the_mark_and_pages(feed):
+    for i in range(5):
+        feed.publish(cik(i), updated=T0 + timedelta(minutes=i))
+    session = thread_session()
+    mark = feed.feed[2]["updated"]
+
+    entries, complete = fetch_feed_since(session, mark, page_size=2)
+    assert complete
+    assert [e["updated"] for e in entries] == [e["updated"] for e in feed.feed[:3]]
+
+    entries, complete = fetch_feed_since(session, feed.feed[-1]["updated"], page_size=2, max_pages=1)
+    assert not complete
+    assert len(entries) == 2
+
+
+def test_failed_cik_is_retried_on_the_next_poll(feed):
+    feed.publish(cik(0), updated=T0)
+    ingest_edgar_feed(page_size=10)
+
+    missed = feed.publish(cik(1), updated=T0 + timedelta(hours=1))
+    later = feed.publish(cik(2), updated=T0 + timedelta(hours=2))
+    feed.failing.add(cik(1))
+    result = ingest_edgar_feed(page_size=10)
+    assert result["errors"] == 1
+    assert stored(later) and not stored(missed)
+    # The mark stops at the failed CIK's entry rather than the newest one.
+    assert hwm() == T0.replace(tzinfo=feed.feed[0]["updated"].tzinfo) + timedelta(hours=1)
+
+    feed.failing.clear()
+    result = ingest_edgar_feed(page_size=10)
+    assert result["errors"] == 0
+    assert stored(missed)
+    assert hwm() == feed.feed[0]["updated"]
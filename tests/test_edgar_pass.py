@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import select
+
+from tradebot.collectors import edgar
+from tradebot.collectors.edgar import PASS_ATTEMPTS, ingest_edgar
+from tradebot.config import settings
+from tradebot.db import ReadSession
+from tradebot.models import EdgarProgress
+
+FAILING = 1_000_001
+
+
+@pytest.fixture
+def universe(sec, tickers, monkeypatch):
+    monkeypatch.setattr(settings, "edgar_universe", "watchlist")
+    monkeypatch.setattr(settings, "edgar_shard", "0/1")
+    monkeypatch.setattr(edgar, "load_watchlist", lambda: tickers[:5])
+    return sec
+
+
+def progress(cik):
+    db = ReadSession()
+    try:
+        return db.execute(select(EdgarProgress).where(EdgarProgress.cik == cik)).scalar_one()
+    finally:
+        db.close()
+
+
+def test_transient_failure_is_requeued_within_the_run(universe):
+    universe.flaky[FAILING] = 1
+
+    result = ingest_edgar()
+
+    assert (result["errors"], result["retried"]) == (0, 1)
+    row = progress(FAILING)
+    assert (row.status, row.failures) == ("ok", 0)
+    assert row.checked_at is not None
+
+
+def test_failed_cik_stays_due_until_its_attempts_run_out(universe):
+    universe.failing.add(FAILING)
+
+    first = ingest_edgar()
+    assert (first["ciks"], first["errors"]) == (5, 1)
+    row = progress(FAILING)
+    assert (row.status, row.checked_at, row.failures) == ("error", None, 2)
+
+    # The pass is not over: only the failed CIK is polled again.
+    second = ingest_edgar()
+    assert (second["resumed"], second["ciks"]) == (True, 1)
+    assert progress(FAILING).failures >= PASS_ATTEMPTS
+
+    # Out of attempts for this pass, so a new pass starts.
+    universe.failing.clear()
+    third = ingest_edgar()
+    assert (third["resumed"], third["ciks"], third["errors"]) == (False, 5, 0)
+    assert progress(FAILING).failures == 0
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import requests
+from sqlalchemy import select
+
+from tradebot.collectors import filing_text
+from tradebot.collectors.filing_text import pending_filings, process_filing_texts
+from tradebot.db import ReadSession, run_write
+from tradebot.models import FilingSignal
+from tradebot.nlp.dilution import extract_dilution_signals, is_dilutive
+from tradebot.store import upsert_posts
+
+NOW = datetime(2026, 1, 5, 12)
+DOC = b"<html><body><p>We entered into an at-the-market sales agreement with Cowen.</p></body></html>"
+
+
+class Resp:
+    def __init__(self, status, content=b""):
+        self.status_code = status
+        self.content = content
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+def add_filing():
+    row = {
+        "platform_post_id": "1000001-0001000001-26-000001-8-K",
+        "url": "https://www.sec.gov/Archives/edgar/data/1000001/000100000126000001/doc.htm",
+        "title": "8-K - doc.htm",
+        "body": "Form: 8-K\nFiling date: 2026-01-02\nReport date: n/a\nAccession: 0001000001-26-000001",
+        "created_at": datetime(2026, 1, 2),
+        "mentions": [{"symbol": "ABC", "asset_type": "stock", "thesis_type": "8-K", "confidence": 0.8}],
+    }
+    run_write(lambda db: upsert_posts(db, "edgar", [row]))
+
+
+def pending(now):
+    db = ReadSession()
+    try:
+        return pending_filings(db, 10, now)
+    finally:
+        db.close()
+
+
+def signal():
+    db = ReadSession()
+    try:
+        return db.execute(select(FilingSignal)).scalar_one()
+    finally:
+        db.close()
+
+
+def test_failed_downloads_are_retried_with_backoff(monkeypatch):
+    add_filing()
+    responses = [Resp(429), Resp(503), Resp(200, DOC)]
+    monkeypatch.setattr(filing_text, "sec_get", lambda *a, **kw: responses.pop(0))
+
+    assert process_filing_texts(workers=1, now=NOW)["errors"] == 1
+    assert signal().attempts == 1
+    assert pending(NOW + timedelta(minutes=10)) == []
+    assert len(pending(NOW + timedelta(minutes=15))) == 1
+
+    later = NOW + timedelta(minutes=15)
+    assert process_filing_texts(workers=1, now=later)["errors"] == 1
+    # Backoff doubles after each failure.
+    assert signal().retry_at == later + timedelta(minutes=30)
+
+    result = process_filing_texts(workers=1, now=later + timedelta(minutes=30))
+    assert result == {"processed": 1, "dilutive": 1, "errors": 0}
+    row = signal()
+    assert (row.status, row.attempts, row.is_atm, row.retry_at) == ("ok", 3, 1, None)
+
+
+def test_retries_stop_after_max_attempts(monkeypatch):
+    add_filing()
+    monkeypatch.setattr(filing_text, "sec_get", lambda *a, **kw: Resp(500))
+    monkeypatch.setattr(filing_text.settings, "filing_max_attempts", 2)
+
+    process_filing_texts(workers=1, now=NOW)
+    process_filing_texts(workers=1, now=NOW + timedelta(days=1))
+    assert signal().attempts == 2
+    assert pending(NOW + timedelta(days=30)) == []
+
+
+def test_sales_agreement_needs_atm_context():
+    assert extract_dilution_signals("The Company entered into a sales agreement with a distributor.")["is_atm"] == 0
+    assert extract_dilution_signals("an ATM program under the Open Market Sales Agreement with Jefferies")["is_atm"] == 1
+    assert extract_dilution_signals("shares offered in an at-the-market offering")["is_atm"] == 1
+
+
+def test_share_count_and_price_need_offering_context():
+    buyback = ("The Board approved the repurchase of 2,000,000 shares of common stock "
+               "at a purchase price of $12.50 per share.")
+    merger = ("Each holder will receive 1,500,000 shares of common stock of Parent "
+              "at a price of $8.00 per share as merger consideration.")
+    offering = ("The Company priced an underwritten public offering of 5,000,000 shares of "
+                "common stock at a public offering price of $4.00 per share.")
+
+    assert not is_dilutive(extract_dilution_signals(buyback))
+    assert not is_dilutive(extract_dilution_signals(merger))
+    signals = extract_dilution_signals(offering)
+    assert (signals["shares"], signals["price_per_share"]) == (5_000_000, 4.0)
+    assert is_dilutive(signals)
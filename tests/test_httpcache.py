@@ -0,0 +1,30 @@
+from tradebot.collectors.httpcache import HttpCache, conditional_get
+from tradebot.collectors.sec import thread_session
+
+
+def test_revalidates_with_etag(sec):
+    cache, session, url = HttpCache(), thread_session(), sec.company_tickers_url
+    first = conditional_get(session, url, cache)
+    first.save()
+    second = conditional_get(session, url, cache)
+
+    assert not first.not_modified
+    assert second.not_modified
+    assert second.content == first.content
+    assert sec.not_modified == 1
+
+
+def test_304_without_cached_body_refetches(sec, monkeypatch):
+    cache, session, url = HttpCache(), thread_session(), sec.company_tickers_url
+    first = conditional_get(session, url, cache)
+    first.save()
+    # Body evicted after the entry was read: the 304 can't be served from disk.
+    entry = cache.entry(url)
+    cache._paths(url)[1].unlink()
+    monkeypatch.setattr(cache, "entry", lambda _url: entry)
+
+    resp = conditional_get(session, url, cache)
+
+    assert sec.not_modified == 1
+    assert not resp.not_modified
+    assert resp.content == first.content
@@ -0,0 +1,69 @@
+from pathlib import Path
+import threading
+import time
+
+from sqlalchemy import select
+
+import run_jobs
+from benchmarks.fake_reddit import FakeReddit
+from tradebot.collectors import reddit
+from tradebot.config import settings
+from tradebot.db import ReadSession
+from tradebot.models import JobRun
+
+
+def job_runs():
+    db = ReadSession()
+    try:
+        return [(r.job, r.status, r.trigger) for r in db.execute(select(JobRun).order_by(JobRun.id)).scalars()]
+    finally:
+        db.close()
+
+
+def test_reddit_command_runs_as_a_job(tickers, monkeypatch):
+    client = FakeReddit(["stocks"], 20, tickers, seed=1)
+    monkeypatch.setattr(reddit, "thread_client", lambda: client)
+    monkeypatch.setattr(settings, "reddit_comments", False)
+
+    run_jobs.main(["reddit", "--limit-per-sub", "5"])
+
+    assert job_runs() == [("reddit", "success", "manual")]
+    # Post-ingest hooks ran: the API snapshots exist.
+    assert (Path(settings.snapshot_dir) / "ideas.json").exists()
+
+
+def test_background_job_is_joined_before_exit(monkeypatch):
+    from tradebot import jobs
+
+    monkeypatch.setattr(jobs, "POST_INGEST_HOOKS", [])
+    monkeypatch.setitem(jobs.JOBS, "filings", lambda: time.sleep(0.2) or {"processed": 0})
+
+    assert jobs.trigger_job_async("filings", trigger="after-edgar")
+    jobs.wait_for_background_jobs()
+
+    assert job_runs() == [("filings", "success", "after-edgar")]
+
+
+def test_runs_in_progress_at_exit_are_marked_failed(monkeypatch):
+    from tradebot import jobs
+
+    started, release = threading.Event(), threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+        return {}
+
+    monkeypatch.setattr(jobs, "POST_INGEST_HOOKS", [])
+    monkeypatch.setitem(jobs.JOBS, "filings", blocked)
+    jobs.trigger_job_async("filings")
+    started.wait(5)
+    try:
+        jobs._abandon_runs()
+        assert job_runs() == [("filings", "error", "manual")]
+    finally:
+        release.set()
+        jobs.wait_for_background_jobs()
+    # Nothing blocks the next run.
+    jobs.run_job("filings", trigger="manual")
+    assert job_runs()[-1] == ("filings", "success", "manual")
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+
+from tradebot.migrations import MIGRATIONS, migrate, schema_version
+from tradebot.models import Mention, Post, Summary
+
+
+def test_upgrade_from_version_2(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite'}")
+    with engine.begin() as conn:
+        for table in (Post.__table__, Mention.__table__, Summary.__table__):
+            table.create(conn)
+        # Columns added by later steps.
+        conn.exec_driver_sql("ALTER TABLE posts DROP COLUMN canonical_post_id")
+        conn.exec_driver_sql("DROP INDEX ix_summaries_scope_symbol")
+        conn.exec_driver_sql("ALTER TABLE summaries DROP COLUMN source_hash")
+        conn.exec_driver_sql("PRAGMA user_version = 2")
+        conn.execute(text(
+            "INSERT INTO posts (id, platform, platform_post_id, url, created_at, collected_at, score, comments) "
+            "VALUES (1, 'reddit', 't3_a', 'u', :ts, :ts, 3, 1)"
+        ), {"ts": datetime(2026, 1, 1)})
+        conn.execute(text("INSERT INTO mentions (post_id, symbol, asset_type, confidence) VALUES (1, 'ABC', 'stock', 0.6)"))
+
+    migrate(engine)
+
+    with engine.connect() as conn:
+        assert schema_version(conn) == MIGRATIONS[-1][0]
+        assert "canonical_post_id" in {c["name"] for c in inspect(conn).get_columns("posts")}
+        stats = conn.execute(text("SELECT symbol, mentions, total_score FROM symbol_stats")).all()
+    assert stats == [("ABC", 1, 3)]
+
+
+def test_edgar_progress_errors_become_unchecked(tmp_path):
+    from tradebot.db import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'v10.sqlite'}")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        conn.exec_driver_sql("DROP TABLE edgar_progress")
+        conn.exec_driver_sql(
+            "CREATE TABLE edgar_progress (cik INTEGER NOT NULL PRIMARY KEY, checked_at DATETIME NOT NULL, "
+            "last_filing_at DATETIME, status VARCHAR NOT NULL, error TEXT)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO edgar_progress VALUES (1, '2026-01-01 00:00:00', NULL, 'ok', NULL), "
+            "(2, '2026-01-01 00:00:00', NULL, 'error', 'HTTPError: 429')"
+        )
+        conn.exec_driver_sql("PRAGMA user_version = 10")
+
+    migrate(engine)
+
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT cik, checked_at IS NULL, failed_at IS NULL, failures FROM edgar_progress ORDER BY cik"
+        ).all()
+    assert rows == [(1, 0, 1, 0), (2, 1, 0, 1)]
@@ -0,0 +1,63 @@
+from tradebot.nlp import names
+from tradebot.nlp.names import build_name_index, resolve_company_names, set_name_index
+
+COMPANIES = {
+    "0": {"ticker": "RKLB", "title": "Rocket Lab USA, Inc."},
+    "1": {"ticker": "POST", "title": "Post Holdings, Inc."},
+    "2": {"ticker": "MTCH", "title": "Match Group, Inc."},
+    "3": {"ticker": "SOUN", "title": "SoundHound AI, Inc."},
+    "4": {"ticker": "PLTR", "title": "Palantir Technologies Inc."},
+    "5": {"ticker": "ABCD", "title": "Acme Energy Corp"},
+    "6": {"ticker": "ABCE", "title": "Acme Systems Inc"},
+}
+
+
+def setup_function():
+    set_name_index(build_name_index(COMPANIES))
+
+
+def teardown_function():
+    set_name_index(None)
+
+
+def test_multi_word_names_match_fuzzily():
+    assert set(resolve_company_names("Loading up on Rocket Labs before launch")) == {"RKLB"}
+    assert set(resolve_company_names("SoundHound AI keeps ripping")) == {"SOUN"}
+
+
+def test_one_word_names_need_a_market_cue_mid_sentence():
+    assert resolve_company_names("Post your positions below.") == {}
+    assert resolve_company_names("Great game. Match was close and nice to watch.") == {}
+    assert resolve_company_names("I think Match is a great match for us") == {}
+    assert set(resolve_company_names("I bought more Match shares today")) == {"MTCH"}
+    # Sentence-initial words never count, cue or not.
+    assert resolve_company_names("Post earnings were fine.") == {}
+
+
+def test_brand_names_resolve_without_the_registered_suffix():
+    assert set(resolve_company_names("I bought SoundHound shares")) == {"SOUN"}
+    assert set(resolve_company_names("Still holding Palantir stock")) == {"PLTR"}
+    # Short aliases are one-word names: still no match without a market cue.
+    assert resolve_company_names("Saw a documentary about Palantir yesterday") == {}
+
+
+def test_ambiguous_short_aliases_are_not_indexed():
+    index = build_name_index(COMPANIES)
+    assert "palantir" in index.tickers
+    assert "acme" not in index.tickers
+    assert index.tickers["acme energy"] == "ABCD"
+
+
+def test_reload_only_rebuilds_when_the_sec_file_changes(monkeypatch):
+    stamp = [(1, 10)]
+    loads = []
+    monkeypatch.setattr(names, "_source_stamp", lambda: stamp[0])
+    monkeypatch.setattr(names, "load_name_index", lambda: loads.append(1) or build_name_index(COMPANIES))
+    set_name_index(None)
+
+    names.name_index(reload=True)
+    names.name_index(reload=True)
+    assert len(loads) == 1
+    stamp[0] = (2, 11)
+    names.name_index(reload=True)
+    assert len(loads) == 2
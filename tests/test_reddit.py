@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+import threading
+import time
+
+import pytest
+from sqlalchemy import func, select
+
+from benchmarks.datagen import BASE_TIME
+from benchmarks.fake_reddit import FakeReddit
+from tradebot.collectors.reddit import ingest_reddit, refresh_reddit_scores, stream_reddit
+from tradebot.db import ReadSession
+from tradebot.models import Post
+
+SUBS = ["stocks", "options"]
+
+
+@pytest.fixture
+def client(tickers):
+    return FakeReddit(SUBS, 30, tickers, seed=3, comments_per_sub=20)
+
+
+def posts(*where):
+    db = ReadSession()
+    try:
+        return db.execute(select(Post).where(Post.platform == "reddit", *where)).scalars().all()
+    finally:
+        db.close()
+
+
+def count():
+    db = ReadSession()
+    try:
+        return db.execute(select(func.count()).select_from(Post)).scalar()
+    finally:
+        db.close()
+
+
+def test_incremental_runs_only_fetch_past_the_high_water_mark(client):
+    first = ingest_reddit(limit_per_sub=100, subs=SUBS, client=client, comments=True, comment_limit=100)
+    assert (first["new_posts"], first["errors"]) == (100, 0)
+
+    second = ingest_reddit(limit_per_sub=100, subs=SUBS, client=client, comments=True, comment_limit=100)
+    assert second["new_posts"] == 0
+    # Only items sharing the newest second of each listing are read again.
+    assert second["fetched"] <= 4
+
+    client.publish("stocks", posts=3, comments=2, created=BASE_TIME + timedelta(hours=1))
+    third = ingest_reddit(limit_per_sub=100, subs=SUBS, client=client, comments=True, comment_limit=100)
+    assert third["new_posts"] == 5
+    assert count() == 105
+
+
+def test_comments_are_stored_as_untitled_t1_posts(client):
+    ingest_reddit(limit_per_sub=100, subs=SUBS, client=client, comments=False)
+    assert not posts(Post.platform_post_id.like("t1\\_%", escape="\\"))
+
+    ingest_reddit(limit_per_sub=100, subs=SUBS, client=client, comments=True, comment_limit=100)
+    comments = posts(Post.platform_post_id.like("t1\\_%", escape="\\"))
+    assert len(comments) == 40
+    assert all(c.title is None and c.body for c in comments)
+
+
+def test_refresh_rereads_scores_through_info(client):
+    ingest_reddit(limit_per_sub=100, subs=SUBS, client=client, comments=False)
+    for submission in client.posts["stocks"]:
+        submission.score += 1000
+    hours = (datetime.utcnow() - BASE_TIME).total_seconds() / 3600 + 24 * 8
+
+    result = refresh_reddit_scores(hours=hours, client=client)
+
+    assert result == {"checked": 60, "updated": 30}
+    assert sum(p.score >= 1000 for p in posts()) == 30
+
+
+def test_stream_stores_new_items_in_micro_batches(client):
+    stop = threading.Event()
+    totals = {}
+    thread = threading.Thread(target=lambda: totals.update(stream_reddit(
+        subs=SUBS, client=client, comments=True, batch_size=25, flush_seconds=0.05, poll_seconds=0.01, stop=stop,
+    )))
+    thread.start()
+    try:
+        wait_for(lambda: count() == 100)
+        client.publish("options", posts=2, comments=1, created=BASE_TIME + timedelta(hours=1))
+        wait_for(lambda: count() == 103)
+    finally:
+        stop.set()
+        thread.join(5)
+    assert totals["new_posts"] == 103
+    assert totals["batches"] >= 4
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from tradebot import velocity
+from tradebot.db import read_engine, run_write
+from tradebot.store import upsert_posts
+
+NOW = datetime(2026, 1, 2, 12)
+
+
+def post(key, created_at, symbol="ABC"):
+    return {
+        "platform_post_id": key, "url": f"https://example.com/{key}", "title": key, "body": "",
+        "created_at": created_at, "mentions": [{"symbol": symbol, "confidence": 0.6}],
+    }
+
+
+def test_only_social_platforms_are_tracked(monkeypatch):
+    staged = []
+    monkeypatch.setattr(velocity, "stage", lambda db, symbols, timestamps: staged.extend(symbols))
+
+    run_write(lambda db: upsert_posts(db, "edgar", [post("filing", datetime(2026, 1, 2))]))
+    run_write(lambda db: upsert_posts(db, "reddit", [post("t3_a", datetime(2026, 1, 2, 11, 30))]))
+
+    assert staged == ["ABC"]
+
+
+def test_rebuild_ignores_edgar_filings():
+    rows = [post(f"filing{i}", datetime(2026, 1, 2)) for i in range(50)]
+    run_write(lambda db: upsert_posts(db, "edgar", rows))
+    run_write(lambda db: upsert_posts(db, "reddit", [post("t3_a", datetime(2026, 1, 2, 11, 30), "XYZ")]))
+
+    frame = velocity.rebuild(read_engine, now=NOW).frame(NOW)
+
+    assert set(frame["symbol"]) == {"XYZ"}
@@ -0,0 +1,246 @@
+"""Headless JSON API and CLI over the precomputed snapshots (`tradebot.snapshots`).
+
+    python -m tradebot.api serve --port 8765
+    python -m tradebot.api ideas --asset-type stock --limit 20
+    python -m tradebot.api filings SOUN
+
+Routes: `/ideas` (asset_type, min_score, sort, limit), `/catalysts` (symbol,
+thesis_type, limit), `/filings/<SYMBOL>` and `/health`. Requests only read the
+snapshot files, which are re-parsed when their mtime changes; SQLite, pandas
+and the collectors are never imported. Responses carry an ETag derived from
+the snapshot and the query, and `If-None-Match` gets a 304 without building
+the body.
+"""
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+
+from .config import settings
+
+IDEA_SORTS = ("idea_score", "decay_score", "boosted_score")
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+# Rendered response bodies kept per (ETag), so hot queries are served as raw bytes.
+BODY_CACHE_SIZE = 256
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class SnapshotStore:
+    """Parsed snapshot files, reloaded whenever a file's mtime or size changes."""
+
+    def __init__(self, root=None):
+        self.root = root or settings.snapshot_dir
+        self._files = {}
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """(etag, payload) of `name`.json; raises ApiError(503) if it has not been written yet."""
+        path = os.path.join(self.root, f"{name}.json")
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise ApiError(503, f"no {name} snapshot yet; run an ingest job or `run_jobs.py snapshots`")
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._files.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        entry = (key, hashlib.sha1(raw).hexdigest()[:16], json.loads(raw))
+        with self._lock:
+            self._files[name] = entry
+        return entry[1], entry[2]
+
+    def body(self, etag, render):
+        with self._lock:
+            data = self._bodies.get(etag)
+            if data is not None:
+                self._bodies.move_to_end(etag)
+                return data
+        data = json.dumps(render(), separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._bodies[etag] = data
+            while len(self._bodies) > BODY_CACHE_SIZE:
+                self._bodies.popitem(last=False)
+        return data
+
+def _int(params, name, default, high=MAX_LIMIT):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    return max(0, min(value, high))
+
+def _float(params, name):
+    if name not in params:
+        return None
+    try:
+        return float(params[name])
+    except ValueError:
+        raise ApiError(400, f"{name} must be a number")
+
+def _ideas(snapshot, params):
+    sort = params.get("sort", IDEA_SORTS[0])
+    if sort not in IDEA_SORTS:
+        raise ApiError(400, f"sort must be one of {', '.join(IDEA_SORTS)}")
+    asset_type = params.get("asset_type")
+    min_score = _float(params, "min_score")
+    limit = _int(params, "limit", DEFAULT_LIMIT)
+    ideas = [
+        idea for idea in snapshot["ideas"]
+        if (asset_type is None or idea["asset_type"] == asset_type)
+        and (min_score is None or (idea[sort] or 0) >= min_score)
+    ]
+    ideas.sort(key=lambda idea: idea[sort] or 0, reverse=True)
+    return {"generated_at": snapshot["generated_at"], "sort": sort, "ideas": ideas[:limit]}
+
+def _catalysts(snapshot, params):
+    symbol = params.get("symbol", "").upper() or None
+    thesis_type = params.get("thesis_type")
+    limit = _int(params, "limit", MAX_LIMIT)
+    rows = [
+        row for row in snapshot["catalysts"]
+        if (symbol is None or row["symbol"] == symbol)
+        and (thesis_type is None or row["thesis_type"] == thesis_type)
+    ]
+    return {"generated_at": snapshot["generated_at"], "catalysts": rows[:limit]}
+
+def _filings(snapshot, params, symbol):
+    return {
+        "generated_at": snapshot["generated_at"],
+        "symbol": symbol,
+        "filings": snapshot["filings"].get(symbol, []),
+    }
+
+def resolve(store, path, params):
+    """Map a request to (snapshot name, etag, render()) without rendering it."""
+    parts = [p for p in path.split("/") if p]
+    if parts == ["ideas"]:
+        name, render = "ideas", lambda snap: _ideas(snap, params)
+    elif parts == ["catalysts"]:
+        name, render = "catalysts", lambda snap: _catalysts(snap, params)
+    elif len(parts) == 2 and parts[0] == "filings":
+        symbol = parts[1].upper()
+        name, render = "filings", lambda snap: _filings(snap, params, symbol)
+    else:
+        raise ApiError(404, f"unknown path {path}")
+    snap_etag, snapshot = store.get(name)
+    query = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+    etag = hashlib.sha1(f"{snap_etag}|{'/'.join(parts)}|{query}".encode("utf-8")).hexdigest()[:20]
+    return etag, lambda: render(snapshot)
+
+def health(store):
+    status = {}
+    for name in ("ideas", "catalysts", "filings"):
+        try:
+            status[name] = store.get(name)[1]["generated_at"]
+        except ApiError:
+            status[name] = None
+    return status
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path.rstrip("/") == "/health":
+                self._send(200, json.dumps(health(store)).encode("utf-8"))
+                return
+            try:
+                etag, render = resolve(store, url.path, dict(parse_qsl(url.query)))
+                quoted = f'"{etag}"'
+                if quoted in self.headers.get("If-None-Match", ""):
+                    self._send(304, b"", quoted)
+                    return
+                self._send(200, store.body(etag, render), quoted)
+            except ApiError as exc:
+                self._send(exc.status, json.dumps({"error": str(exc)}).encode("utf-8"))
+
+        def _send(self, status, data, etag=None):
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+            if status != 304:
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def serve(host=None, port=None, store=None):
+    server = ThreadingHTTPServer(
+        (host or settings.api_host, settings.api_port if port is None else port),
+        make_handler(store or SnapshotStore()),
+    )
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trade Idea Bot headless API")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    srv = sub.add_parser("serve", help="serve the JSON API over HTTP")
+    srv.add_argument("--host", help="default API_HOST")
+    srv.add_argument("--port", type=int, help="default API_PORT")
+
+    ideas = sub.add_parser("ideas", help="print ranked ideas")
+    ideas.add_argument("--asset-type")
+    ideas.add_argument("--min-score", type=float)
+    ideas.add_argument("--sort", choices=IDEA_SORTS)
+    ideas.add_argument("--limit", type=int)
+
+    catalysts = sub.add_parser("catalysts", help="print the 48h catalysts")
+    catalysts.add_argument("--symbol")
+    catalysts.add_argument("--thesis-type")
+    catalysts.add_argument("--limit", type=int)
+
+    filings = sub.add_parser("filings", help="print a symbol's filings from the last 7 days")
+    filings.add_argument("symbol")
+
+    args = parser.parse_args(argv)
+    store = SnapshotStore()
+    if args.command == "serve":
+        server = serve(args.host, args.port, store)
+        host, port = server.server_address[:2]
+        print(f"serving on http://{host}:{port}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.command == "filings":
+        path, params = f"/filings/{args.symbol}", {}
+    else:
+        path = f"/{args.command}"
+        params = {
+            key: str(value) for key, value in vars(args).items()
+            if key != "command" and value is not None
+        }
+    try:
+        _, render = resolve(store, path, params)
+    except ApiError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    json.dump(render(), sys.stdout, indent=2)
+    print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Hot/cold tiering: old posts move from SQLite to month-partitioned Parquet.
+
+`archive_posts` copies posts created before the retention horizon, with their
+mentions and filing signals, to `<ARCHIVE_DIR>/<table>/month=YYYY-MM/*.parquet`
+and then deletes them from SQLite. The cutoff is kept in `app_state` so
+collectors don't re-insert archived posts. `symbol_stats` is left untouched,
+so the all-time ranking still counts archived mentions.
+
+`post_history` returns hot and cold rows as one frame. The scan skips month
+partitions outside the requested window and pushes symbol/platform/time
+filters down to the Parquet row groups.
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import DateTime, Float, Integer, delete, select, text
+
+from . import dedup, metrics
+from .cache import cached_query
+from .config import settings
+from .db import ReadSession, read_engine, run_write, submit_write
+from .models import FilingSignal, Mention, Post
+from .state import ARCHIVE_CUTOFF_KEY, archive_cutoff, bump_data_version, set_state
+from .stats import StatsDelta
+
+CHUNK_SIZE = 500
+MODELS = {"posts": Post, "mentions": Mention, "filing_signals": FilingSignal}
+# Columns copied from the post so cold mentions/signals can be pruned without a join.
+EXTRA_COLUMNS = {"posts": [], "mentions": ["platform", "created_at"], "filing_signals": ["created_at"]}
+KEYS = {"posts": "id", "mentions": "id", "filing_signals": "post_id"}
+# Sort order inside each file; clusters row groups for predicate pushdown.
+SORT = {"posts": ["id"], "mentions": ["symbol", "created_at"], "filing_signals": ["post_id"]}
+PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+HISTORY_COLUMNS = [
+    "created_at", "platform", "symbol", "asset_type", "thesis_type",
+    "title", "url", "score", "comments", "post_id",
+]
+
+def _arrow_type(column):
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    return pa.string()
+
+def _schema(table):
+    columns = MODELS[table].__table__.columns
+    fields = [pa.field(c.name, _arrow_type(c)) for c in columns]
+    fields += [pa.field(name, _arrow_type(Post.__table__.c[name])) for name in EXTRA_COLUMNS[table]]
+    return pa.schema(fields)
+
+def archive_root():
+    return Path(settings.archive_dir)
+
+def _chunks(items, size=CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _read_chunked(bind, model, column, ids):
+    frames = [pd.read_sql(select(model.__table__).where(column.in_(chunk)), bind) for chunk in _chunks(ids)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def _hot_batch(bind, cutoff, after_id, limit):
+    """Next batch of archivable posts (by id) plus their mentions and filing signals."""
+    posts = pd.read_sql(
+        select(Post.__table__).where(Post.created_at < cutoff, Post.id > after_id).order_by(Post.id).limit(limit),
+        bind,
+    )
+    ids = posts["id"].tolist()
+    origin = posts[["id", "platform", "created_at"]].rename(columns={"id": "post_id"})
+    mentions = _read_chunked(bind, Mention, Mention.post_id, ids)
+    signals = _read_chunked(bind, FilingSignal, FilingSignal.post_id, ids)
+    frames = {"posts": posts}
+    for table, frame in (("mentions", mentions), ("filing_signals", signals)):
+        if frame.empty:
+            frame = pd.DataFrame(columns=_schema(table).names)
+        else:
+            frame = frame.merge(origin[["post_id"] + EXTRA_COLUMNS[table]], on="post_id")
+        frames[table] = frame
+    return frames
+
+def _write_file(table, month, df, name):
+    directory = archive_root() / table / f"month={month}"
+    directory.mkdir(parents=True, exist_ok=True)
+    df = df.sort_values(SORT[table], kind="stable")
+    arrow = pa.Table.from_pandas(df, schema=_schema(table), preserve_index=False)
+    # A leading dot keeps half-written files out of dataset scans.
+    tmp = directory / f".{name}.tmp"
+    pq.write_table(arrow, tmp, compression="zstd")
+    os.replace(tmp, directory / name)
+
+def _write_partitions(table, df, tag):
+    months = set()
+    if df.empty:
+        return months
+    created = pd.to_datetime(df["created_at"])
+    for month, part in df.groupby(created.dt.strftime("%Y-%m"), sort=True):
+        # Named after the batch's first post id, so a rerun after a crash
+        # overwrites the same file instead of adding a duplicate.
+        _write_file(table, month, part, f"part-{tag:012d}.parquet")
+        months.add(month)
+    return months
+
+def _delete_posts(ids):
+    def write(db, chunk):
+        dedup.forget(db, chunk)
+        db.execute(delete(FilingSignal).where(FilingSignal.post_id.in_(chunk)))
+        db.execute(delete(Mention).where(Mention.post_id.in_(chunk)))
+        db.execute(delete(Post).where(Post.id.in_(chunk)))
+
+    # One queued write per chunk keeps each transaction short.
+    futures = [submit_write(lambda db, chunk=chunk: write(db, chunk)) for chunk in _chunks(ids)]
+    for future in futures:
+        future.result()
+
+def compact_archive(tables=tuple(MODELS), months=None, min_files=None):
+    """Rewrite month partitions holding at least `min_files` parts as one file."""
+    min_files = min_files or settings.archive_compact_files
+    compacted = 0
+    for table in tables:
+        root = archive_root() / table
+        if not root.exists():
+            continue
+        for directory in sorted(root.glob("month=*")):
+            month = directory.name.split("=", 1)[1]
+            if months is not None and month not in months:
+                continue
+            files = sorted(directory.glob("*.parquet"))
+            if len(files) < min_files:
+                continue
+            df = pq.read_table(files, schema=_schema(table)).to_pandas()
+            df = df.drop_duplicates(KEYS[table], keep="last")
+            _write_file(table, month, df, f"compacted-{time.time_ns()}.parquet")
+            for path in files:
+                path.unlink()
+            compacted += 1
+    return compacted
+
+def archive_posts(older_than_days=None, now=None, batch=None):
+    """Move posts older than the horizon (and their mentions/signals) to Parquet."""
+    days = settings.archive_after_days if older_than_days is None else older_than_days
+    batch = batch or settings.archive_batch
+    now = now or datetime.utcnow()
+    cutoff = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    db = ReadSession()
+    try:
+        previous = archive_cutoff(db)
+    finally:
+        db.close()
+    # Never move the cutoff back: posts before it are already gone from SQLite.
+    if previous is not None and previous > cutoff:
+        cutoff = previous
+    # Record the cutoff first so collectors stop inserting posts we are about to move.
+    run_write(lambda db: set_state(db, ARCHIVE_CUTOFF_KEY, cutoff.isoformat()))
+
+    counts = {table: 0 for table in MODELS}
+    touched = {table: set() for table in MODELS}
+    after_id = 0
+    while True:
+        with metrics.timer("archive_stage_seconds", stage="read"):
+            frames = _hot_batch(read_engine, cutoff, after_id, batch)
+        ids = frames["posts"]["id"].tolist()
+        if not ids:
+            break
+        with metrics.timer("archive_stage_seconds", stage="write"):
+            for table, frame in frames.items():
+                touched[table] |= _write_partitions(table, frame, ids[0])
+                counts[table] += len(frame)
+        with metrics.timer("archive_stage_seconds", stage="delete"):
+            _delete_posts(ids)
+        after_id = ids[-1]
+
+    if counts["posts"]:
+        run_write(bump_data_version)
+    metrics.inc("rows_archived_total", counts["posts"], table="posts")
+    metrics.inc("rows_archived_total", counts["mentions"], table="mentions")
+    compacted = 0
+    with metrics.timer("archive_stage_seconds", stage="compact"):
+        for table, months in touched.items():
+            if months:
+                compacted += compact_archive((table,), months)
+    return {**counts, "cutoff": cutoff.isoformat(), "compacted": compacted}
+
+def vacuum():
+    """Return pages freed by archiving to the OS (rewrites the whole DB file)."""
+    from .db import engine
+
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().execute("VACUUM")
+    finally:
+        raw.close()
+
+def _dataset(table):
+    root = archive_root() / table
+    if not root.exists():
+        return None
+    return ds.dataset(root, format="parquet", partitioning=PARTITIONING, schema=_schema(table).append(
+        pa.field("month", pa.string())
+    ))
+
+def _month_filter(since, until):
+    expr = None
+    if since is not None:
+        expr = ds.field("month") >= since.strftime("%Y-%m")
+    if until is not None:
+        upper = ds.field("month") <= until.strftime("%Y-%m")
+        expr = upper if expr is None else expr & upper
+    return expr
+
+def _and(*exprs):
+    out = None
+    for expr in exprs:
+        if expr is not None:
+            out = expr if out is None else out & expr
+    return out
+
+def _cold_history(symbol, since, until, platform):
+    mentions_ds, posts_ds = _dataset("mentions"), _dataset("posts")
+    if mentions_ds is None or posts_ds is None:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    window = _month_filter(since, until)
+    mention_filter = _and(
+        window,
+        None if symbol is None else ds.field("symbol") == symbol,
+        None if platform is None else ds.field("platform") == platform,
+        None if since is None else ds.field("created_at") >= pa.scalar(since, pa.timestamp("us")),
+        None if until is None else ds.field("created_at") < pa.scalar(until, pa.timestamp("us")),
+    )
+    mentions = mentions_ds.to_table(
+        columns=["id", "post_id", "symbol", "asset_type", "thesis_type", "month"], filter=mention_filter
+    ).to_pandas()
+    if mentions.empty:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    # Only open the months the matching mentions live in.
+    post_filter = _and(
+        ds.field("month").isin(sorted(mentions["month"].unique())),
+        ds.field("id").isin(mentions["post_id"].unique().tolist()),
+    )
+    posts = posts_ds.to_table(
+        columns=["id", "created_at", "platform", "title", "url", "score", "comments"], filter=post_filter
+    ).to_pandas()
+    # Compaction and crash recovery can leave the same row in two files.
+    mentions = mentions.drop_duplicates("id")
+    posts = posts.drop_duplicates("id").rename(columns={"id": "post_id"})
+    return mentions.merge(posts, on="post_id")[HISTORY_COLUMNS + ["id"]]
+
+def _hot_history(bind, symbol, since, until, platform):
+    q = """
+    SELECT p.created_at, p.platform, m.symbol, m.asset_type, m.thesis_type,
+           p.title, p.url, p.score, p.comments, p.id AS post_id, m.id
+    FROM posts p
+    JOIN mentions m ON m.post_id = p.id
+    WHERE 1 = 1
+    """
+    params = {}
+    if symbol is not None:
+        q += " AND m.symbol = :symbol"
+        params["symbol"] = symbol
+    if platform is not None:
+        q += " AND p.platform = :platform"
+        params["platform"] = platform
+    if since is not None:
+        q += " AND p.created_at >= :since"
+        params["since"] = since
+    if until is not None:
+        q += " AND p.created_at < :until"
+        params["until"] = until
+    df = pd.read_sql(text(q), bind, params=params)
+    df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce")
+    return df
+
+@cached_query
+def post_history(bind, symbol=None, since=None, until=None, platform=None):
+    """Mentions joined to their posts across SQLite and the Parquet archive, newest first.
+
+    Returns one row per mention with `HISTORY_COLUMNS`; the cold side is only
+    scanned when the window reaches back past the archive cutoff.
+    """
+    with bind.connect() as conn:
+        cutoff = archive_cutoff(conn)
+    frames = []
+    if cutoff is None or until is None or until > cutoff:
+        frames.append(_hot_history(bind, symbol, since, until, platform))
+    if cutoff is not None and (since is None or since < cutoff):
+        with metrics.timer("archive_scan_seconds"):
+            frames.append(_cold_history(symbol, since, until, platform))
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    # Hot first: a post that is mid-archive (or was in a crashed run) exists in both tiers.
+    df = pd.concat(frames, ignore_index=True).drop_duplicates("id")
+    return df.sort_values("created_at", ascending=False, kind="stable")[HISTORY_COLUMNS].reset_index(drop=True)
+
+def archived_stats_delta():
+    """symbol_stats contributions of archived mentions, for rebuilding the table."""
+    mentions_ds, posts_ds = _dataset("mentions"), _dataset("posts")
+    delta = StatsDelta()
+    if mentions_ds is None or posts_ds is None:
+        return delta
+    mentions = mentions_ds.to_table(columns=["id", "post_id", "symbol", "asset_type", "platform"]).to_pandas()
+    posts = posts_ds.to_table(
+        columns=["id", "score", "comments", "created_at"], filter=ds.field("canonical_post_id").is_null()
+    ).to_pandas()
+    df = mentions.drop_duplicates("id").merge(
+        posts.drop_duplicates("id").rename(columns={"id": "post_id"}), on="post_id"
+    )
+    grouped = df.groupby(["symbol", "asset_type", "platform"]).agg(
+        mentions=("id", "size"), score=("score", "sum"), comments=("comments", "sum"),
+        first_seen=("created_at", "min"), last_seen=("created_at", "max"),
+    )
+    for key, row in grouped.iterrows():
+        delta.rows[key] = [
+            int(row.mentions), int(row.score), int(row.comments),
+            row.first_seen.to_pydatetime(), row.last_seen.to_pydatetime(),
+        ]
+    return delta
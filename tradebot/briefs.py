@@ -0,0 +1,162 @@
+"""Deterministic daily/ticker briefs, precomputed after ingest.
+
+Briefs are built with one sort plus grouped `head(n)` over the filings frame
+and stored in `summaries` (scopes `daily_brief` / `ticker_brief`) together
+with a content hash of the source rows, so the dashboard only reads text and
+a refresh rewrites only the briefs whose inputs changed.
+"""
+from datetime import datetime
+import hashlib
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, select
+
+from .db import read_engine, run_write
+from .models import Summary
+from .queries import fetch_edgar_filings, window_start
+
+SEVERITY = ["offering", "8k", "insider", "ownership", "earnings/filing", "other"]
+DAILY_SCOPE = "daily_brief"
+TICKER_SCOPE = "ticker_brief"
+DAILY_WINDOW_DAYS = 2
+TICKER_WINDOW_DAYS = 7
+DAILY_LINKS = 3
+TICKER_LINKS = 5
+HASH_COLUMNS = ["created_at", "symbol", "thesis_type", "title", "url"]
+
+def source_hash(df):
+    """Order-independent SHA-256 of the rows a brief is built from."""
+    if df.empty:
+        return hashlib.sha256(b"").hexdigest()
+    row_hashes = np.sort(pd.util.hash_pandas_object(df[HASH_COLUMNS], index=False).to_numpy())
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+def _links(df):
+    return "[" + df["title"].astype(str) + "](" + df["url"].astype(str) + ")"
+
+def _dates(series):
+    return series.dt.strftime("%Y-%m-%d").fillna("unknown")
+
+def build_daily_brief(df_filings):
+    if df_filings.empty:
+        return "_No EDGAR filings in the last 48 hours._"
+
+    df = df_filings[df_filings["thesis_type"].isin(SEVERITY)]
+    if df.empty:
+        return ""
+    df = df.assign(_sev=pd.Categorical(df["thesis_type"], categories=SEVERITY, ordered=True))
+    df = df.sort_values(["_sev", "symbol", "created_at"], ascending=[True, True, False], kind="stable")
+
+    keys = ["_sev", "symbol"]
+    grouped = df.groupby(keys, observed=True, sort=False)
+    top = df.assign(link=_links(df)).groupby(keys, observed=True, sort=False).head(DAILY_LINKS)
+    groups = pd.DataFrame({
+        "count": grouped.size(),
+        "latest": grouped["created_at"].first(),
+        "links": top.groupby(keys, observed=True, sort=False)["link"].agg(" | ".join),
+    }).reset_index()
+
+    lines = (
+        "- **" + groups["symbol"].astype(str) + "** (" + groups["_sev"].astype(str) + ", "
+        + groups["count"].astype(str) + " filings, latest " + _dates(groups["latest"]) + "): "
+        + groups["links"]
+    )
+    return "\n".join(lines)
+
+def build_ticker_brief(df_filings, symbol):
+    if df_filings.empty:
+        return f"_No EDGAR filings for {symbol} in the last 7 days._"
+
+    latest_date = df_filings["created_at"].max().date().isoformat()
+    counts = df_filings["thesis_type"].value_counts()
+    counts_text = ", ".join(f"{k}: {v}" for k, v in counts.items())
+    recent = df_filings.sort_values("created_at", ascending=False, kind="stable").head(TICKER_LINKS)
+    return (
+        f"**{symbol}** — latest filing {latest_date}\n\n"
+        f"Counts by thesis_type: {counts_text}\n\n"
+        f"{' | '.join(_links(recent))}"
+    )
+
+def _upsert_brief(db, existing, scope, symbol, window_days, text_value, digest, source_max, now):
+    row = existing.get(symbol)
+    if row is not None and row.source_hash == digest:
+        return False
+    if row is None:
+        row = Summary(scope=scope, symbol=symbol, time_window_days=window_days)
+        db.add(row)
+    row.summary_text = text_value
+    row.source_hash = digest
+    row.source_max_created_at = None if pd.isna(source_max) else source_max.to_pydatetime()
+    row.generated_at = now
+    return True
+
+def refresh_briefs(bind=None, now=None):
+    """Rebuild briefs whose source rows changed; returns counts of rewritten briefs.
+
+    Filings are read on `bind` (default: the read engine); the comparison and
+    rewrite run as one operation on the DB writer.
+    """
+    bind = bind or read_engine
+    now = now or datetime.utcnow()
+    df_48h = fetch_edgar_filings.uncached(bind, window_start(now, hours=48))
+    df_7d = fetch_edgar_filings.uncached(bind, window_start(now, days=TICKER_WINDOW_DAYS))
+
+    def write(db):
+        stored = db.execute(select(Summary).where(Summary.scope.in_([DAILY_SCOPE, TICKER_SCOPE]))).scalars()
+        existing = {DAILY_SCOPE: {}, TICKER_SCOPE: {}}
+        for row in stored:
+            existing[row.scope][row.symbol] = row
+
+        daily = _upsert_brief(
+            db, existing[DAILY_SCOPE], DAILY_SCOPE, None, DAILY_WINDOW_DAYS,
+            build_daily_brief(df_48h), source_hash(df_48h), df_48h["created_at"].max(), now,
+        )
+
+        tickers = 0
+        for symbol, group in df_7d.groupby("symbol", sort=False):
+            tickers += _upsert_brief(
+                db, existing[TICKER_SCOPE], TICKER_SCOPE, symbol, TICKER_WINDOW_DAYS,
+                build_ticker_brief(group, symbol), source_hash(group), group["created_at"].max(), now,
+            )
+        # Symbols whose filings aged out of the window.
+        gone = set(existing[TICKER_SCOPE]) - set(df_7d["symbol"].unique())
+        if gone:
+            db.execute(delete(Summary).where(Summary.scope == TICKER_SCOPE, Summary.symbol.in_(gone)))
+        return {"daily": int(daily), "tickers": tickers, "removed": len(gone)}
+
+    return run_write(write)
+
+def _symbol_is(symbol):
+    return Summary.symbol.is_(None) if symbol is None else Summary.symbol == symbol
+
+def load_brief(db, scope, symbol=None):
+    """Stored brief row for `scope`/`symbol`, or None."""
+    return db.execute(
+        select(Summary).where(Summary.scope == scope, _symbol_is(symbol))
+        .order_by(Summary.generated_at.desc())
+        .limit(1)
+    ).scalar()
+
+def cached_summary(db, scope, symbol, window_days, digest):
+    """AI summary text generated from the same source rows, if any."""
+    row = db.execute(
+        select(Summary.summary_text).where(
+            Summary.scope == scope,
+            _symbol_is(symbol),
+            Summary.time_window_days == window_days,
+            Summary.source_hash == digest,
+        ).order_by(Summary.generated_at.desc()).limit(1)
+    ).first()
+    return row[0] if row else None
+
+def save_summary(scope, symbol, window_days, digest, source_max, text_value):
+    run_write(lambda db: db.add(Summary(
+        scope=scope,
+        symbol=symbol,
+        time_window_days=window_days,
+        summary_text=text_value,
+        generated_at=datetime.utcnow(),
+        source_max_created_at=source_max,
+        source_hash=digest,
+    )))
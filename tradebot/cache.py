@@ -0,0 +1,98 @@
+"""Process-wide LRU cache for dashboard query results.
+
+Entries are keyed by query name, arguments and the database's data version
+(bumped by every write through `tradebot.store`), so a cached frame is never
+served after new data lands, even when another process did the ingest.
+"""
+from collections import OrderedDict
+import functools
+import threading
+
+from . import metrics
+from .config import settings
+from .state import data_version
+
+def frame_nbytes(df):
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except AttributeError:
+        return 0
+
+class QueryCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (frame, nbytes)
+        self._nbytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                self._clear_locked()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, version, frame):
+        nbytes = frame_nbytes(frame)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[1]
+            self._entries[key] = (frame, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+            self._version = None
+
+    def _clear_locked(self):
+        self._entries.clear()
+        self._nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+query_cache = QueryCache(settings.query_cache_mb * 1024 * 1024)
+
+def cached_query(fn):
+    """Cache `fn(bind, *args, **kwargs)` results; callers get their own copy."""
+    @functools.wraps(fn)
+    def wrapper(bind, *args, **kwargs):
+        version = (str(bind.engine.url), data_version(bind))
+        key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+        frame = query_cache.get(key, version)
+        if frame is None:
+            metrics.inc("query_cache_total", query=fn.__name__, result="miss")
+            with metrics.timer("query_seconds", query=fn.__name__):
+                frame = fn(bind, *args, **kwargs)
+            query_cache.put(key, version, frame)
+        else:
+            metrics.inc("query_cache_total", query=fn.__name__, result="hit")
+        return frame.copy()
+
+    wrapper.uncached = fn
+    return wrapper
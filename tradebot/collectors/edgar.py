@@ -1,15 +1,38 @@
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
+import json
+import logging
+import queue
 import time
 import requests
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+from .. import metrics
 from ..config import settings
-from ..db import SessionLocal
-from ..models import Post, Mention
+from ..db import ReadSession, run_write, submit_write
+from ..models import CikMap, EdgarProgress
+from ..state import get_state, set_state
+from ..store import upsert_posts
+from .httpcache import HttpCache, conditional_get
+from .sec import sec_get, thread_session
 
 DEFAULT_WATCHLIST = ["SOUN", "MARA", "RIOT", "PLTR", "GME"]
 COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
 SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik}.json"
+COMMIT_EVERY = 50
+EDGAR_UPDATE_FIELDS = ("url", "title", "body", "created_at")
+CIK_MAP_KEY = "cik_map_refreshed_at"
+PASS_KEY = "edgar_pass"
+# Polls a CIK gets per pass while it keeps failing (each run retries failures once at its end).
+PASS_ATTEMPTS = 3
+
+log = logging.getLogger(__name__)
+
+# url -> (loaded_at, ticker map); avoids re-parsing the multi-MB file in-process.
+_ticker_maps = {}
 
 def project_root():
     return Path(__file__).resolve().parents[2]
@@ -27,13 +50,47 @@ def load_watchlist():
         tickers.append(sym)
     return tickers or DEFAULT_WATCHLIST
 
-def sec_headers():
-    return {"User-Agent": settings.sec_user_agent}
+def fetch_company_tickers(session, cache=None, max_age=None):
+    if cache is None:
+        resp = sec_get(session, COMPANY_TICKERS_URL)
+        resp.raise_for_status()
+        return parse_company_tickers(resp.json())
+
+    memo = _ticker_maps.get(COMPANY_TICKERS_URL)
+    if memo and max_age is not None and time.time() - memo[0] < max_age:
+        return memo[1]
+
+    resp = conditional_get(session, COMPANY_TICKERS_URL, cache, max_age=max_age, load_body=memo is None)
+    if resp.not_modified and memo:
+        mapping = memo[1]
+    else:
+        mapping = parse_company_tickers(resp.json())
+    resp.save()
+    _ticker_maps[COMPANY_TICKERS_URL] = (time.time(), mapping)
+    return mapping
 
-def fetch_company_tickers(session):
-    resp = session.get(COMPANY_TICKERS_URL, headers=sec_headers(), timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
+def cached_company_tickers_file(cache=None):
+    """(raw company_tickers.json dict, cache entry) from disk, or (None, None)."""
+    cache = cache or HttpCache()
+    entry = cache.entry(COMPANY_TICKERS_URL)
+    body = cache.body(COMPANY_TICKERS_URL) if entry is not None else None
+    if body is None:
+        return None, None
+    return json.loads(body), entry
+
+def cached_company_tickers(cache=None):
+    """Ticker map from memory or the on-disk SEC cache; never hits the network."""
+    memo = _ticker_maps.get(COMPANY_TICKERS_URL)
+    if memo:
+        return memo[1]
+    data, entry = cached_company_tickers_file(cache)
+    if data is None:
+        return {}
+    mapping = parse_company_tickers(data)
+    _ticker_maps[COMPANY_TICKERS_URL] = (entry["fetched_at"], mapping)
+    return mapping
+
+def parse_company_tickers(data):
     mapping = {}
     for entry in data.values():
         ticker = str(entry.get("ticker", "")).upper()
@@ -48,6 +105,169 @@ def resolve_cik(ticker, mapping):
         return None
     return str(cik).zfill(10)
 
+def company_rows(data):
+    """`cik_map` rows from company_tickers.json, in file order."""
+    rows = {}
+    for rank, entry in enumerate(data.values()):
+        ticker = str(entry.get("ticker", "")).upper()
+        cik_str = entry.get("cik_str")
+        if ticker and cik_str and ticker not in rows:
+            rows[ticker] = {"ticker": ticker, "cik": int(cik_str), "title": entry.get("title"), "rank": rank}
+    return list(rows.values())
+
+def refresh_cik_map(session=None, cache=None, force=False):
+    """Reload `cik_map` from SEC once it is older than SEC_TICKERS_TTL_HOURS.
+
+    The table is shared by every process and shard, so the multi-MB ticker
+    file is revalidated once per TTL rather than parsed on every run. A failed
+    refresh keeps the existing map. Returns True if the table was rewritten.
+    """
+    db = ReadSession()
+    try:
+        stamp = get_state(db, CIK_MAP_KEY)
+    finally:
+        db.close()
+    max_age = timedelta(hours=settings.sec_tickers_ttl_hours)
+    if not force and stamp and datetime.utcnow() - datetime.fromisoformat(stamp) < max_age:
+        return False
+
+    cache = HttpCache() if cache is None else cache
+    try:
+        resp = conditional_get(
+            session or thread_session(), COMPANY_TICKERS_URL, cache, load_body=stamp is None
+        )
+    except requests.RequestException:
+        if stamp is None:
+            raise
+        log.warning("company_tickers.json refresh failed; keeping the CIK map from %s", stamp, exc_info=True)
+        return False
+    rows = None if resp.not_modified and stamp else company_rows(resp.json())
+
+    def write(db):
+        if rows is not None:
+            db.execute(delete(CikMap))
+            db.execute(insert(CikMap), rows)
+        set_state(db, CIK_MAP_KEY, datetime.utcnow().isoformat())
+
+    run_write(write)
+    resp.save()
+    _ticker_maps.pop(COMPANY_TICKERS_URL, None)
+    return rows is not None
+
+def load_cik_map():
+    """Ticker -> CIK from `cik_map`, in SEC file order; refreshes the table first if stale."""
+    refresh_cik_map()
+    db = ReadSession()
+    try:
+        return dict(db.execute(select(CikMap.ticker, CikMap.cik).order_by(CikMap.rank)).all())
+    finally:
+        db.close()
+
+def parse_shard(spec):
+    """"i/n" -> (i, n)."""
+    index, _, count = str(spec or "0/1").partition("/")
+    index, count = int(index), int(count or 1)
+    if not 0 <= index < count:
+        raise ValueError(f"invalid shard {spec!r}; expected i/n with 0 <= i < n")
+    return index, count
+
+def resolve_tickers(tickers, mapping):
+    """(CIK (10-digit) -> first ticker resolving to it, number of unknown tickers)."""
+    ciks = {}
+    skipped = 0
+    for ticker in tickers:
+        cik = resolve_cik(ticker, mapping)
+        if cik:
+            ciks.setdefault(cik, ticker)
+        else:
+            skipped += 1
+    return ciks, skipped
+
+def universe_ciks(universe=None, shard=None):
+    """(CIK -> ticker, unknown tickers) for "watchlist" or "all", limited to `shard`.
+
+    With "all", each company is filed under its primary ticker, which
+    company_tickers.json lists first.
+    """
+    universe = universe or settings.edgar_universe
+    index, count = parse_shard(shard or settings.edgar_shard)
+    mapping = load_cik_map()
+    ciks, skipped = resolve_tickers(list(mapping) if universe == "all" else load_watchlist(), mapping)
+    if count > 1:
+        ciks = {cik: ticker for cik, ticker in ciks.items() if int(cik) % count == index}
+    return ciks, skipped
+
+def plan_pass(ciks, key):
+    """CIKs still due in the current pass, most recently active filers first.
+
+    A pass polls every CIK once. Each CIK's progress row commits with its
+    filings, so a run that dies part-way is resumed by the next one; once
+    nothing is left, a new pass starts. A CIK whose poll failed stays due,
+    behind the others, until it has failed PASS_ATTEMPTS times in a row
+    during this pass. Returns (todo, resumed).
+    """
+    db = ReadSession()
+    try:
+        started = get_state(db, key)
+        progress = {
+            str(row.cik).zfill(10): row
+            for row in db.execute(select(
+                EdgarProgress.cik, EdgarProgress.checked_at, EdgarProgress.last_filing_at,
+                EdgarProgress.failed_at, EdgarProgress.failures,
+            ))
+        }
+    finally:
+        db.close()
+    started = datetime.fromisoformat(started) if started else None
+
+    def due(cik):
+        row = progress.get(cik)
+        if started is None or row is None:
+            return True
+        if row.checked_at is not None and row.checked_at >= started:
+            return False
+        return not (row.failed_at is not None and row.failed_at >= started and row.failures >= PASS_ATTEMPTS)
+
+    todo = [cik for cik in ciks if due(cik)]
+    resumed = started is not None and bool(todo)
+    if not resumed:
+        now = datetime.utcnow().isoformat()
+        run_write(lambda db: set_state(db, key, now))
+        todo = list(ciks)
+    todo.sort()
+    # Stable sorts: failed CIKs go last; filers without a known filing keep CIK order.
+    todo.sort(key=lambda cik: getattr(progress.get(cik), "last_filing_at", None) or datetime.min, reverse=True)
+    todo.sort(key=lambda cik: bool(getattr(progress.get(cik), "failures", 0)))
+    return todo, resumed
+
+def record_progress(db, progress):
+    if not progress:
+        return
+    table = EdgarProgress.__table__
+    stmt = sqlite_insert(table)
+    ex = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["cik"],
+        set_={
+            # A failed poll keeps the last successful checked_at.
+            "checked_at": func.coalesce(ex.checked_at, table.c.checked_at),
+            "status": ex.status,
+            "error": ex.error,
+            "last_filing_at": func.coalesce(ex.last_filing_at, table.c.last_filing_at),
+            "failed_at": func.coalesce(ex.failed_at, table.c.failed_at),
+            "failures": case((ex.status == "error", table.c.failures + 1), else_=0),
+        },
+    )
+    db.execute(stmt, progress)
+
+def fetch_submissions(session, cik, cache=None):
+    """Conditional GET of a submissions document; `.not_modified` means skip the CIK."""
+    return conditional_get(session, SUBMISSIONS_URL.format(cik=cik), cache, load_body=False)
+
+def submissions_file_url(name):
+    """URL of an overflow page listed in a submissions document's `filings.files`."""
+    return SUBMISSIONS_URL.rsplit("/", 1)[0] + "/" + name
+
 def build_filing_url(cik, accession, primary_doc):
     accession_no_dashes = accession.replace("-", "")
     cik_int = str(int(cik))
@@ -77,98 +297,227 @@ def classify_thesis_type(form, description):
         return "offering"
     return "other"
 
-def ingest_edgar(limit_per_ticker=25, sleep_seconds=0.3):
-    tickers = load_watchlist()
-    session = requests.Session()
+def iter_recent_filings(data, cik, limit_per_ticker):
+    recent = data.get("filings", {}).get("recent", {})
+    return iter_filing_columns(recent, cik, limit_per_ticker)
 
-    mapping = fetch_company_tickers(session)
-    db = SessionLocal()
-    new_posts = 0
-    skipped = 0
+def iter_filing_columns(columns, cik, limit=None):
+    """Yield filing dicts from SEC's columnar layout (`filings.recent` or an overflow page)."""
+    accessions = columns.get("accessionNumber", [])
+    forms = columns.get("form", [])
+    filing_dates = columns.get("filingDate", [])
+    report_dates = columns.get("reportDate", [])
+    primary_docs = columns.get("primaryDocument", [])
+    descriptions = columns.get("primaryDocDescription", [])
+
+    count = len(accessions) if limit is None else min(len(accessions), limit)
+    for i in range(count):
+        accession = accessions[i]
+        form = forms[i] if i < len(forms) else ""
+        filing_date = filing_dates[i] if i < len(filing_dates) else ""
+        report_date = report_dates[i] if i < len(report_dates) else ""
+        primary_doc = primary_docs[i] if i < len(primary_docs) else ""
+        description = descriptions[i] if i < len(descriptions) else ""
+
+        if not accession or not filing_date:
+            continue
+
+        try:
+            created_at = datetime.strptime(filing_date, "%Y-%m-%d")
+        except ValueError:
+            continue
+
+        title_desc = primary_doc or description or "Filing"
+        title = f"{form} - {title_desc}".strip(" -")
+        body = (
+            f"Form: {form}\n"
+            f"Filing date: {filing_date}\n"
+            f"Report date: {report_date or 'n/a'}\n"
+            f"Accession: {accession}"
+        )
+        yield {
+            "platform_post_id": f"{cik}-{accession}-{form}",
+            "url": build_filing_url(cik, accession, primary_doc),
+            "title": title,
+            "body": body,
+            "created_at": created_at,
+            "thesis_type": classify_thesis_type(form, f"{title} {description} {body}"),
+        }
+
+def filing_rows(ticker, filings):
+    for filing in filings:
+        yield {
+            "platform_post_id": filing["platform_post_id"],
+            "url": filing["url"],
+            "title": filing["title"],
+            "body": filing["body"],
+            "created_at": filing["created_at"],
+            "mentions": [{
+                "symbol": ticker,
+                "asset_type": "stock",
+                "stance": None,
+                "thesis_type": filing["thesis_type"],
+                "confidence": 0.8,
+            }],
+        }
+
+def store_filings(db, rows, progress=()):
+    res = upsert_posts(db, "edgar", rows, update_fields=EDGAR_UPDATE_FIELDS)
+    record_progress(db, list(progress))
+    return res["inserted"]
 
+_DONE = object()
+
+def _fetch_worker(jobs, results, limit_per_ticker, cache):
+    session = thread_session()
     try:
-        for ticker in tickers:
-            cik = resolve_cik(ticker, mapping)
-            if not cik:
-                skipped += 1
-                continue
-
-            url = SUBMISSIONS_URL.format(cik=cik)
-            resp = session.get(url, headers=sec_headers(), timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-            recent = data.get("filings", {}).get("recent", {})
-
-            accessions = recent.get("accessionNumber", [])
-            forms = recent.get("form", [])
-            filing_dates = recent.get("filingDate", [])
-            report_dates = recent.get("reportDate", [])
-            primary_docs = recent.get("primaryDocument", [])
-            descriptions = recent.get("primaryDocDescription", [])
-
-            for i in range(min(len(accessions), limit_per_ticker)):
-                accession = accessions[i]
-                form = forms[i] if i < len(forms) else ""
-                filing_date = filing_dates[i] if i < len(filing_dates) else ""
-                report_date = report_dates[i] if i < len(report_dates) else ""
-                primary_doc = primary_docs[i] if i < len(primary_docs) else ""
-                description = descriptions[i] if i < len(descriptions) else ""
-
-                if not accession or not filing_date:
+        while True:
+            try:
+                ticker, cik = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                with metrics.timer("ingest_stage_seconds", collector="edgar", stage="fetch"):
+                    resp = fetch_submissions(session, cik, cache)
+                if resp.not_modified:
+                    results.put((ticker, cik, None, resp, None))
                     continue
+                with metrics.timer("ingest_stage_seconds", collector="edgar", stage="parse"):
+                    filings = list(iter_recent_filings(resp.json(), cik, limit_per_ticker))
+                results.put((ticker, cik, filings, resp, None))
+            except (requests.RequestException, ValueError) as exc:
+                results.put((ticker, cik, None, None, exc))
+    finally:
+        results.put(_DONE)
 
-                try:
-                    created_at = datetime.strptime(filing_date, "%Y-%m-%d")
-                except ValueError:
-                    continue
+def _drain(jobs, results, running):
+    # Unblock workers stuck on the bounded queue so the pool can shut down.
+    while True:
+        try:
+            jobs.get_nowait()
+        except queue.Empty:
+            break
+    while running:
+        if results.get() is _DONE:
+            running -= 1
 
-                title_desc = primary_doc or description or "Filing"
-                title = f"{form} - {title_desc}".strip(" -")
-                body = (
-                    f"Form: {form}\n"
-                    f"Filing date: {filing_date}\n"
-                    f"Report date: {report_date or 'n/a'}\n"
-                    f"Accession: {accession}"
-                )
-                platform_post_id = f"{cik}-{accession}-{form}"
-                url = build_filing_url(cik, accession, primary_doc)
-
-                exists = db.query(Post).filter_by(platform="edgar", platform_post_id=platform_post_id).first()
-                if exists:
-                    exists.url = url
-                    exists.title = title
-                    exists.body = body
-                    exists.created_at = created_at
-                    continue
+def ingest_edgar(limit_per_ticker=25, workers=None, tickers=None, use_cache=True,
+                 ciks=None, universe=None, shard=None, failed=None):
+    """Fetch submissions for the configured universe on a thread pool.
 
-                post = Post(
-                    platform="edgar",
-                    platform_post_id=platform_post_id,
-                    url=url,
-                    author=None,
-                    title=title,
-                    body=body,
-                    created_at=created_at,
-                    score=0,
-                    comments=0,
-                )
-                db.add(post)
-                db.flush()
-
-                thesis_type = classify_thesis_type(form, f"{title} {description} {body}")
-                db.add(Mention(
-                    post_id=post.id,
-                    symbol=ticker,
-                    asset_type="stock",
-                    stance=None,
-                    thesis_type=thesis_type,
-                    confidence=0.8,
-                ))
-                new_posts += 1
-
-            time.sleep(sleep_seconds)
-
-        db.commit()
-        return {"new_posts": new_posts, "skipped": skipped}
-    finally:
-        db.close()
+    Without `tickers` or `ciks` (CIK -> ticker) this polls the next stretch of
+    the current pass over `universe` / `shard` (see `plan_pass`). All fetches
+    share the process-wide SEC token bucket (`settings.sec_max_rps`), and parsed
+    filings flow through a bounded queue to this thread, which hands batches to
+    the DB writer thread without waiting for them; each batch carries its CIKs'
+    progress rows. With `use_cache`, requests are conditional and a 304 skips
+    the CIK; validators are only saved after the rows commit, so a crashed run
+    never leaves a CIK marked as seen. CIKs whose fetch fails are polled once
+    more at the end of the run; those that fail again are added to the
+    `failed` set when one is given.
+    """
+    workers = max(1, workers or settings.sec_workers)
+    cache = HttpCache() if use_cache else None
+
+    resumed = False
+    skipped = 0
+    if ciks is None and tickers is None:
+        universe = universe or settings.edgar_universe
+        shard = shard or settings.edgar_shard
+        ciks, skipped = universe_ciks(universe, shard)
+        todo, resumed = plan_pass(ciks, f"{PASS_KEY}:{universe}:{shard}")
+    else:
+        if ciks is None:
+            ciks, skipped = resolve_tickers(tickers, load_cik_map())
+        todo = list(ciks)
+
+    new_posts = 0
+    unchanged = 0
+    pending = []
+    rows = []
+    progress = []
+    inflight = deque()  # (write future, responses to save once it commits)
+
+    def settle(block):
+        nonlocal new_posts
+        while inflight and (block or inflight[0][0].done()):
+            future, responses = inflight.popleft()
+            new_posts += future.result()
+            with metrics.timer("ingest_stage_seconds", collector="edgar", stage="cache_save"):
+                for resp in responses:
+                    resp.save()
+
+    def commit():
+        if progress:
+            batch, checked = list(rows), list(progress)
+            inflight.append((submit_write(lambda db: store_filings(db, batch, checked)), list(pending)))
+            rows.clear()
+            pending.clear()
+            progress.clear()
+        settle(block=False)
+
+    def poll(batch):
+        """Fetch and queue writes for `batch` (CIKs); returns the ones that failed."""
+        nonlocal unchanged
+        jobs = queue.Queue()
+        for cik in batch:
+            jobs.put((ciks[cik], cik))
+        pool_size = min(workers, max(1, jobs.qsize()))
+        results = queue.Queue(maxsize=pool_size * 2)
+        failures = set()
+        with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="edgar") as pool:
+            for _ in range(pool_size):
+                pool.submit(_fetch_worker, jobs, results, limit_per_ticker, cache)
+
+            running = pool_size
+            try:
+                while running:
+                    item = results.get()
+                    if item is _DONE:
+                        running -= 1
+                        continue
+                    ticker, cik, filings, resp, exc = item
+                    now = datetime.utcnow()
+                    checked = {
+                        "cik": int(cik), "checked_at": now, "last_filing_at": None, "error": None,
+                        "failed_at": None, "failures": 0,
+                    }
+                    if exc is not None:
+                        failures.add(cik)
+                        # Not checked: the CIK stays due in this pass (see plan_pass).
+                        checked.update(status="error", error=f"{type(exc).__name__}: {exc}", checked_at=None,
+                                       failed_at=now, failures=1)
+                    elif filings is None:
+                        unchanged += 1
+                        checked.update(status="unchanged")
+                    else:
+                        rows.extend(filing_rows(ticker, filings))
+                        latest = max((f["created_at"] for f in filings), default=None)
+                        checked.update(status="ok", last_filing_at=latest)
+                    if resp is not None:
+                        pending.append(resp)
+                    progress.append(checked)
+                    if len(progress) >= COMMIT_EVERY:
+                        commit()
+            except BaseException:
+                _drain(jobs, results, running)
+                raise
+        return failures
+
+    failures = poll(todo)
+    retried = len(failures)
+    if failures:
+        # Requeue failed CIKs once at the end, after whatever caused them (e.g. a burst of 429s) has passed.
+        failures = poll(sorted(failures))
+    if failed is not None:
+        failed.update(failures)
+    errors = len(failures)
+
+    commit()
+    settle(block=True)
+    metrics.inc("edgar_ciks_total", unchanged, result="unchanged")
+    metrics.inc("edgar_ciks_total", errors, result="error")
+    return {
+        "new_posts": new_posts, "ciks": len(todo), "skipped": skipped, "unchanged": unchanged,
+        "errors": errors, "retried": retried, "resumed": resumed,
+    }
@@ -0,0 +1,143 @@
+"""Full-history EDGAR backfill from SEC's bulk `submissions.zip`.
+
+The archive holds one `CIK##########.json` per filer plus
+`CIK##########-submissions-NNN.json` overflow pages for busy filers. Members
+are read straight out of the zip one at a time (nothing is extracted to
+disk), filtered to the configured universe, and written through the batched
+`upsert_posts` path. Each member is decoded with a single `json.load`: the
+stdlib has no incremental parser, and `filings.recent` is columnar (every
+field is a parallel array), so a filing can't be emitted before all of its
+columns have been read anyway. A member is at most a few MB, and only one is
+held at a time.
+
+Progress is checkpointed per CIK in `app_state`, in the same transaction as
+the rows, so an interrupted backfill resumes where it stopped. The checkpoint
+is cleared when a run finishes, so the next run (e.g. after `--download`
+refreshes the archive) starts from the first CIK again. Filings older than the archive cutoff (`tradebot.archive`) are not
+written to SQLite; they are reported as `skipped_archived`.
+"""
+from datetime import datetime
+from pathlib import Path
+import json
+import logging
+import re
+import zipfile
+
+from ..db import ReadSession, run_write
+from ..state import archive_cutoff, delete_state, get_state, set_state
+from .edgar import filing_rows, iter_filing_columns, store_filings, submissions_file_url, universe_ciks
+from .sec import sec_get, sec_headers, sec_limiter, thread_session
+
+BULK_SUBMISSIONS_URL = "https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip"
+MAIN_MEMBER = re.compile(r"^CIK(\d{10})\.json$")
+CHECKPOINT_EVERY = 25
+
+log = logging.getLogger(__name__)
+
+def download_bulk_submissions(dest, session=None, chunk_size=1 << 20):
+    """Stream the bulk archive to `dest` (one rate-limited request)."""
+    session = session or thread_session()
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(".part")
+    sec_limiter().acquire()
+    with session.get(BULK_SUBMISSIONS_URL, headers=sec_headers(), stream=True, timeout=60) as resp:
+        resp.raise_for_status()
+        with tmp.open("wb") as fh:
+            for chunk in resp.iter_content(chunk_size=chunk_size):
+                fh.write(chunk)
+    tmp.replace(dest)
+    return dest
+
+def backfill_universe(universe="watchlist"):
+    """CIK (10-digit) -> ticker for the companies to backfill (every shard)."""
+    ciks, _ = universe_ciks(universe, shard="0/1")
+    return ciks
+
+def _read_member(zf, name):
+    with zf.open(name) as fh:
+        return json.load(fh)
+
+def iter_company_filings(zf, names, doc, cik, session=None):
+    """Filings from the main document plus every overflow page it lists."""
+    yield from iter_filing_columns(doc.get("filings", {}).get("recent", {}), cik)
+    for page in doc.get("filings", {}).get("files", []):
+        name = page.get("name")
+        if not name:
+            continue
+        if name in names:
+            columns = _read_member(zf, name)
+        else:
+            # Archive older than the document; fall back to the API.
+            resp = sec_get(session or thread_session(), submissions_file_url(name))
+            resp.raise_for_status()
+            columns = resp.json()
+        yield from iter_filing_columns(columns, cik)
+
+def _store_batch(rows, checkpoint_key, last_cik):
+    """Write `rows` and move the checkpoint to `last_cik`; None clears it (run finished)."""
+    def write(db):
+        stored = store_filings(db, rows)
+        if last_cik is None:
+            delete_state(db, checkpoint_key)
+        else:
+            set_state(db, checkpoint_key, last_cik)
+        return stored
+    return write
+
+def backfill_edgar(zip_path, universe="watchlist", since=None, reset=False):
+    zip_path = Path(zip_path)
+    checkpoint_key = f"edgar_backfill:{zip_path.name}"
+    ciks = backfill_universe(universe)
+    since_dt = datetime.strptime(since, "%Y-%m-%d") if since else None
+
+    db = ReadSession()
+    try:
+        done_through = None if reset else get_state(db, checkpoint_key)
+        cutoff = archive_cutoff(db)
+    finally:
+        db.close()
+    if cutoff is not None and (since_dt is None or since_dt < cutoff):
+        log.warning(
+            "posts before the archive cutoff %s have been moved to Parquet; filings older than it "
+            "will NOT be loaded by this backfill", cutoff.date(),
+        )
+    processed = new_posts = filings_seen = skipped_archived = 0
+    rows = []
+    last_cik = None
+
+    with zipfile.ZipFile(zip_path) as zf:
+        names = set(zf.namelist())
+        todo = sorted(
+            m.group(1) for m in map(MAIN_MEMBER.match, names)
+            if m and m.group(1) in ciks and (done_through is None or m.group(1) > done_through)
+        )
+        log.info("backfilling %d CIKs from %s (resume after %s)", len(todo), zip_path, done_through)
+
+        for cik in todo:
+            doc = _read_member(zf, f"CIK{cik}.json")
+            filings = [
+                f for f in iter_company_filings(zf, names, doc, cik)
+                if since_dt is None or f["created_at"] >= since_dt
+            ]
+            filings_seen += len(filings)
+            if cutoff is not None:
+                kept = [f for f in filings if f["created_at"] >= cutoff]
+                skipped_archived += len(filings) - len(kept)
+                filings = kept
+            rows.extend(filing_rows(ciks[cik], filings))
+            processed += 1
+            last_cik = cik
+
+            if processed % CHECKPOINT_EVERY == 0:
+                new_posts += run_write(_store_batch(rows, checkpoint_key, last_cik))
+                rows = []
+
+    new_posts += run_write(_store_batch(rows, checkpoint_key, None))
+    if skipped_archived:
+        log.warning("skipped %d of %d filings older than the archive cutoff %s",
+                    skipped_archived, filings_seen, cutoff.date())
+    return {
+        "ciks": processed, "filings": filings_seen, "new_posts": new_posts,
+        "skipped_archived": skipped_archived, "resumed_after": done_through,
+    }
@@ -0,0 +1,102 @@
+"""Feed-driven EDGAR discovery.
+
+Instead of pulling every watched CIK's submissions document, poll EDGAR's
+"latest filings" Atom feed, keep only entries whose CIK is in this process's
+universe and shard, and run the regular submissions ingest for just those
+companies. A persisted high-water mark (newest `<updated>` seen, one per
+shard) bounds how far back each poll pages. When a CIK's submissions fetch
+fails, the mark stops at that CIK's oldest entry, so the next poll sees the
+entry again and retries it.
+"""
+from datetime import datetime
+import re
+import xml.etree.ElementTree as ET
+
+from ..config import settings
+from ..db import ReadSession, run_write
+from ..state import get_state, set_state
+from .edgar import ingest_edgar, parse_shard, universe_ciks
+from .sec import sec_get, thread_session
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+HWM_KEY = "edgar_feed_hwm"
+CIK_IN_TITLE = re.compile(r"\((\d{10})\)")
+ACCESSION_IN_ID = re.compile(r"accession-number=([\d-]+)")
+
+def parse_feed(content):
+    """Yield dicts (cik, accession, form, updated) from an EDGAR Atom page."""
+    root = ET.fromstring(content)
+    for entry in root.iter(f"{ATOM}entry"):
+        title = entry.findtext(f"{ATOM}title") or ""
+        updated = entry.findtext(f"{ATOM}updated") or ""
+        entry_id = entry.findtext(f"{ATOM}id") or ""
+        category = entry.find(f"{ATOM}category")
+
+        cik = CIK_IN_TITLE.search(title)
+        accession = ACCESSION_IN_ID.search(entry_id)
+        try:
+            updated_at = datetime.fromisoformat(updated.strip())
+        except ValueError:
+            continue
+        if not cik:
+            continue
+        yield {
+            "cik": cik.group(1),
+            "accession": accession.group(1) if accession else None,
+            "form": category.get("term") if category is not None else title.split(" - ")[0],
+            "updated": updated_at,
+        }
+
+def fetch_feed_since(session, hwm, page_size=100, max_pages=None):
+    """Page through the feed until entries are older than `hwm`.
+
+    Returns (entries, complete); `complete` is False when `max_pages` ran out
+    before reaching the high-water mark, i.e. filings may have been missed.
+    """
+    max_pages = max_pages or settings.sec_feed_max_pages
+    entries = []
+    for page in range(max_pages):
+        url = settings.sec_feed_url.format(start=page * page_size, count=page_size)
+        resp = sec_get(session, url)
+        resp.raise_for_status()
+        batch = list(parse_feed(resp.content))
+        entries.extend(e for e in batch if hwm is None or e["updated"] >= hwm)
+        if hwm is None or len(batch) < page_size or any(e["updated"] < hwm for e in batch):
+            return entries, True
+    return entries, False
+
+def ingest_edgar_feed(limit_per_ticker=25, workers=None, page_size=100, max_pages=None):
+    session = thread_session()
+    watched, _ = universe_ciks()
+    _, shards = parse_shard(settings.edgar_shard)
+    hwm_key = HWM_KEY if shards == 1 else f"{HWM_KEY}:{settings.edgar_shard}"
+
+    db = ReadSession()
+    try:
+        raw = get_state(db, hwm_key)
+    finally:
+        db.close()
+    hwm = datetime.fromisoformat(raw) if raw else None
+
+    entries, complete = fetch_feed_since(session, hwm, page_size=page_size, max_pages=max_pages)
+    newest = max((e["updated"] for e in entries), default=hwm)
+
+    if hwm is None or not complete:
+        # No baseline yet, or a gap the feed can't cover: poll everything once.
+        ciks = None
+        mode = "full"
+    else:
+        ciks = {e["cik"]: watched[e["cik"]] for e in entries if e["cik"] in watched}
+        mode = "feed"
+
+    failed = set()
+    result = ingest_edgar(limit_per_ticker=limit_per_ticker, workers=workers, ciks=ciks, failed=failed)
+
+    # Entries at the mark are fetched again (`>=`), so stopping at the oldest
+    # failed entry keeps it, and everything after it, in the next poll.
+    mark = min((e["updated"] for e in entries if e["cik"] in failed), default=newest)
+    if mark is not None and mark != hwm:
+        run_write(lambda db: set_state(db, hwm_key, mark.isoformat()))
+
+    result.update({"mode": mode, "feed_entries": len(entries), "retry_ciks": len(failed)})
+    return result
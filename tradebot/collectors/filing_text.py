@@ -0,0 +1,221 @@
+"""Post-ingest stage: download primary documents and extract dilution signals.
+
+Documents are kept in a gzip-compressed, content-addressed store under
+`<SEC_CACHE_DIR>/docs` (objects by SHA-256, plus a ref per accession), so a
+filing is never downloaded twice. Parsing runs on a process pool, and results
+land in `filing_signals`; mentions of dilutive filings are re-tagged as
+`offering` with higher confidence. Failed downloads/parses (429s, 5xx,
+timeouts) are stored as "error" rows and retried with exponential backoff,
+up to FILING_MAX_ATTEMPTS times.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+import gzip
+import hashlib
+import io
+import os
+import re
+
+import requests
+from sqlalchemy import DateTime, bindparam, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .. import metrics
+from ..config import settings
+from ..db import ReadSession, run_write
+from ..models import FilingSignal, Mention
+from ..nlp.dilution import extract_dilution_signals, html_to_text, is_dilutive
+from ..state import bump_data_version
+from .sec import sec_get, thread_session
+
+FORM_PREFIXES = ("8-K", "S-1", "S-3", "424B")
+FORM_LINE = re.compile(r"^Form: (.*)$", re.M)
+ACCESSION_LINE = re.compile(r"^Accession: (.*)$", re.M)
+READ_CHUNK = 1 << 16
+
+class DocStore:
+    def __init__(self, root=None):
+        self.root = Path(root or Path(settings.sec_cache_dir) / "docs")
+
+    def _ref_path(self, accession):
+        return self.root / "refs" / accession
+
+    def object_path(self, sha):
+        return self.root / "objects" / sha[:2] / f"{sha}.gz"
+
+    def lookup(self, accession):
+        ref = self._ref_path(accession)
+        if not ref.exists():
+            return None
+        sha = ref.read_text(encoding="ascii").strip()
+        return sha if self.object_path(sha).exists() else None
+
+    def put(self, accession, content):
+        sha = hashlib.sha256(content).hexdigest()
+        obj = self.object_path(sha)
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp = obj.with_name(f"{obj.name}.{os.getpid()}.tmp")
+            with gzip.open(tmp, "wb") as fh:
+                fh.write(content)
+            os.replace(tmp, obj)
+        ref = self._ref_path(accession)
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        ref.write_text(sha, encoding="ascii")
+        return sha
+
+def iter_text_chunks(path):
+    with gzip.open(path, "rb") as raw:
+        reader = io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+        while True:
+            chunk = reader.read(READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+def parse_document(job):
+    """Process-pool worker: (post_id, object path) -> (post_id, signals, error)."""
+    post_id, path = job
+    try:
+        return post_id, extract_dilution_signals(html_to_text(iter_text_chunks(path))), None
+    except Exception as exc:
+        return post_id, None, f"{type(exc).__name__}: {exc}"
+
+def pending_filings(db, limit, now=None):
+    """Filings never processed, plus failed ones whose retry is due."""
+    forms = " OR ".join(f"p.body LIKE 'Form: {prefix}%'" for prefix in FORM_PREFIXES)
+    q = f"""
+    SELECT p.id, p.url, p.body, COALESCE(f.attempts, 0)
+    FROM posts p
+    LEFT JOIN filing_signals f ON f.post_id = p.id
+    WHERE p.platform = 'edgar'
+      AND (f.post_id IS NULL
+           OR (f.status = 'error' AND f.attempts < :max_attempts AND f.retry_at <= :now))
+      AND ({forms})
+    ORDER BY p.created_at DESC
+    LIMIT :limit
+    """
+    params = {"limit": limit, "max_attempts": settings.filing_max_attempts, "now": now or datetime.utcnow()}
+    out = []
+    # Typed so :now is formatted like the stored retry_at values.
+    stmt = text(q).bindparams(bindparam("now", type_=DateTime))
+    for post_id, url, body, attempts in db.execute(stmt, params):
+        form = FORM_LINE.search(body or "")
+        accession = ACCESSION_LINE.search(body or "")
+        if accession:
+            out.append({
+                "post_id": post_id,
+                "url": url,
+                "form": form.group(1).strip() if form else None,
+                "accession": accession.group(1).strip(),
+                "attempts": attempts,
+            })
+    return out
+
+def retry_at(now, attempts):
+    """When a filing that has failed `attempts` times is next due."""
+    return now + timedelta(minutes=settings.filing_retry_minutes * 2 ** (attempts - 1))
+
+def _fetch(store, filing):
+    """-> (sha, status, error); status is None when the document is available."""
+    sha = store.lookup(filing["accession"])
+    if sha:
+        return sha, None, None
+    if filing["url"].endswith("-index.html"):
+        return None, "skipped", "no primary document"
+    try:
+        resp = sec_get(thread_session(), filing["url"], timeout=60)
+        resp.raise_for_status()
+    except requests.RequestException as exc:
+        return None, "error", f"{type(exc).__name__}: {exc}"
+    return store.put(filing["accession"], resp.content), None, None
+
+def process_filing_texts(limit=200, workers=None, now=None):
+    workers = settings.filing_workers if workers is None else workers
+    now = now or datetime.utcnow()
+    store = DocStore()
+    db = ReadSession()
+    try:
+        filings = pending_filings(db, limit, now)
+    finally:
+        db.close()
+    if not filings:
+        return {"processed": 0, "dilutive": 0, "errors": 0}
+
+    with metrics.timer("ingest_stage_seconds", collector="filings", stage="fetch"):
+        with ThreadPoolExecutor(max_workers=settings.sec_workers, thread_name_prefix="filing-doc") as pool:
+            fetched = list(pool.map(lambda f: _fetch(store, f), filings))
+
+    by_post = {f["post_id"]: f for f in filings}
+    results = {}
+    jobs = []
+    for filing, (sha, status, error) in zip(filings, fetched):
+        filing["sha"] = sha
+        if sha is None:
+            results[filing["post_id"]] = (None, status, error)
+        else:
+            jobs.append((filing["post_id"], str(store.object_path(sha))))
+
+    with metrics.timer("ingest_stage_seconds", collector="filings", stage="parse"):
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parsed = list(pool.map(parse_document, jobs, chunksize=4))
+        else:
+            parsed = [parse_document(job) for job in jobs]
+    for post_id, signals, error in parsed:
+        results[post_id] = (signals, "ok" if signals is not None else "error", error)
+
+    rows = []
+    dilutive = []
+    for post_id, (signals, status, error) in results.items():
+        filing = by_post[post_id]
+        attempts = filing["attempts"] + 1
+        row = {
+            "post_id": post_id,
+            "accession": filing["accession"],
+            "form": filing["form"],
+            "doc_sha256": filing["sha"],
+            "status": status,
+            "is_atm": 0,
+            "offering_amount": None,
+            "shares": None,
+            "price_per_share": None,
+            "warrant_shares": None,
+            "warrant_exercise_price": None,
+            "snippet": None,
+            "error": error,
+            "parsed_at": now,
+            "attempts": attempts,
+            "retry_at": retry_at(now, attempts) if status == "error" else None,
+        }
+        if signals is not None:
+            row.update(signals)
+            if is_dilutive(signals):
+                dilutive.append((post_id, signals))
+        rows.append(row)
+
+    def write(db):
+        stmt = sqlite_insert(FilingSignal)
+        # Retried filings replace their previous "error" row.
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["post_id"],
+            set_={c: stmt.excluded[c] for c in rows[0] if c != "post_id"},
+        )
+        db.execute(stmt, rows)
+        for post_id, signals in dilutive:
+            confidence = 0.9 if signals["is_atm"] or signals["offering_amount"] else 0.85
+            db.execute(
+                update(Mention)
+                .where(Mention.post_id == post_id)
+                .values(thesis_type="offering", confidence=confidence)
+            )
+        if rows:
+            bump_data_version(db)
+
+    run_write(write)
+    return {
+        "processed": len(rows),
+        "dilutive": len(dilutive),
+        "errors": sum(1 for r in rows if r["status"] == "error"),
+    }
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from .. import metrics
+from ..config import settings
+from .sec import sec_get
+
+class HttpCache:
+    """On-disk store of response bodies plus their ETag/Last-Modified validators."""
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.sec_cache_dir) / "http"
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        folder = self.root / key[:2]
+        return folder / f"{key}.json", folder / f"{key}.body"
+
+    def entry(self, url):
+        meta_path, body_path = self._paths(url)
+        if not meta_path.exists() or not body_path.exists():
+            return None
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except ValueError:
+            return None
+
+    def body(self, url):
+        """Cached body, or None if it has been evicted since `entry()`."""
+        try:
+            return self._paths(url)[1].read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def stamp(self, url):
+        """(mtime_ns, size) of the cached body, or None; cheap change detection."""
+        try:
+            stat = self._paths(url)[1].stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def store(self, url, headers, content):
+        meta_path, body_path = self._paths(url)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        _atomic_write(body_path, content)
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def touch(self, url):
+        entry = self.entry(url)
+        if entry is None:
+            return
+        entry["fetched_at"] = time.time()
+        _atomic_write(self._paths(url)[0], json.dumps(entry).encode("utf-8"))
+
+def _atomic_write(path, data):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+class CachedResponse:
+    def __init__(self, url, content, headers, not_modified, cache):
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.not_modified = not_modified
+        self._cache = cache
+
+    def json(self):
+        return json.loads(self.content)
+
+    def save(self):
+        """Persist the body and validators; call once the data has been stored."""
+        if self._cache is None:
+            return
+        if self.not_modified:
+            self._cache.touch(self.url)
+        else:
+            self._cache.store(self.url, self.headers, self.content)
+
+def conditional_get(session, url, cache, max_age=None, load_body=True):
+    """GET `url`, revalidating against the cache.
+
+    Within `max_age` seconds of the last fetch the cached body is returned with
+    no request at all. Otherwise the request carries If-None-Match /
+    If-Modified-Since; on 304 `not_modified` is set and the cached body is only
+    read from disk when `load_body` is true. A 304 with no usable cached body
+    (evicted, corrupt, or no validators sent) is retried as a plain GET.
+    """
+    entry = cache.entry(url) if cache is not None else None
+    if entry and max_age is not None and time.time() - entry["fetched_at"] < max_age:
+        content = cache.body(url)
+        if content is not None:
+            metrics.inc("http_cache_total", result="fresh")
+            return CachedResponse(url, content, {}, True, None)
+        entry = None
+
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    resp = sec_get(session, url, headers=headers)
+    if resp.status_code == 304:
+        content = cache.body(url) if entry and load_body else None
+        if entry and (content is not None or not load_body):
+            metrics.inc("http_cache_total", result="not_modified")
+            return CachedResponse(url, content, resp.headers, True, cache)
+        metrics.inc("http_cache_total", result="refetch")
+        resp = sec_get(session, url)
+    resp.raise_for_status()
+    metrics.inc("http_cache_total", result="miss" if cache is not None else "uncached")
+    return CachedResponse(url, resp.content, resp.headers, False, cache)
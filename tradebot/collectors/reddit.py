@@ -1,11 +1,49 @@
-from datetime import datetime, timezone
+"""Reddit collector.
+
+`ingest_reddit` fetches each subreddit's newest submissions (and comments)
+concurrently, stopping at a per-subreddit high-water mark, so a run only
+processes items it has not seen. `stream_reddit` follows the same listings
+continuously and stores them in micro-batches. Score/comment counts of
+recent submissions are re-read separately by `refresh_reddit_scores`.
+
+All Reddit requests in the process share one token bucket
+(`REDDIT_MAX_RPS`). PRAW clients are not thread-safe, so each worker thread
+builds its own unless a client is passed in.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import logging
+import threading
+import time
+
 import praw
+from sqlalchemy import select
+
+from .. import metrics
 from ..config import settings
-from ..db import SessionLocal
-from ..models import Post, Mention
-from ..nlp.tickers import extract_symbols, classify_asset_type
+from ..db import ReadSession, run_write, submit_write
+from .. import dedup
+from ..models import Post
+from ..ratelimit import shared_bucket
+from ..state import get_state, set_state
+from ..store import known_post_keys, upsert_posts
+from ..nlp.tickers import extract_symbols, classify_asset_type, symbol_universe
+from ..nlp.names import name_index, resolve_company_names
 
 SUBS_DEFAULT = ["wallstreetbets", "stocks", "options", "investing"]
+REDDIT_UPDATE_FIELDS = ("score", "comments")
+# Rows per queued write, so one big fetch doesn't hold the write lock for long.
+WRITE_CHUNK = 1000
+# Items per Reddit listing request.
+PAGE_SIZE = 100
+# app_state key prefix: f"{HWM_KEY}:{kind}:{sub}" -> created_utc of the newest item stored.
+HWM_KEY = "reddit_hwm"
+KINDS = ("submissions", "comments")
+# Minimum seconds between `on_flush` calls while streaming.
+FLUSH_HOOK_SECONDS = 60
+
+log = logging.getLogger(__name__)
+_local = threading.local()
 
 def reddit_client():
     if not settings.reddit_client_id or not settings.reddit_client_secret:
@@ -16,51 +54,313 @@ def reddit_client():
         user_agent=settings.reddit_user_agent,
     )
 
-def ingest_reddit(limit_per_sub=50, subs=None):
+def thread_client():
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = reddit_client()
+        _local.client = client
+    return client
+
+def reddit_limiter():
+    return shared_bucket("reddit", settings.reddit_max_rps)
+
+def paced(listing):
+    """Iterate a lazy PRAW listing, taking a token from the Reddit budget before each page."""
+    limiter = reddit_limiter()
+    items = iter(listing)
+    count = 0
+    while True:
+        if count % PAGE_SIZE == 0:
+            limiter.acquire()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        yield item
+        count += 1
+
+def _created(item):
+    return datetime.fromtimestamp(item.created_utc, tz=timezone.utc).replace(tzinfo=None)
+
+def submission_row(s):
+    return {
+        "platform_post_id": s.id,
+        "url": f"https://www.reddit.com{s.permalink}",
+        "author": str(s.author) if s.author else None,
+        "title": s.title,
+        "body": getattr(s, "selftext", None),
+        "created_at": _created(s),
+        "score": int(getattr(s, "score", 0) or 0),
+        "comments": int(getattr(s, "num_comments", 0) or 0),
+    }
+
+def comment_row(c):
+    # Comment and submission ids are separate sequences; the t1_ fullname keeps them apart.
+    return {
+        "platform_post_id": f"t1_{c.id}",
+        "url": f"https://www.reddit.com{c.permalink}",
+        "author": str(c.author) if c.author else None,
+        "title": None,
+        "body": c.body,
+        "created_at": _created(c),
+        "score": int(getattr(c, "score", 0) or 0),
+        "comments": 0,
+    }
+
+ROW_BUILDERS = {"submissions": submission_row, "comments": comment_row}
+
+def post_mentions(row):
+    text = f"{row['title'] or ''}\n{row['body'] or ''}"
+    mentions = [
+        {"symbol": sym, "asset_type": classify_asset_type(sym), "confidence": 0.6}
+        for sym in extract_symbols(text)
+    ]
+    seen = {m["symbol"] for m in mentions}
+    for sym, confidence in resolve_company_names(text).items():
+        if sym not in seen:
+            mentions.append({"symbol": sym, "asset_type": "stock", "confidence": confidence})
+    return mentions
+
+def _hwm_key(kind, sub):
+    return f"{HWM_KEY}:{kind}:{sub.lower()}"
+
+def load_hwms(subs, kinds=KINDS):
+    """{(kind, sub): created_utc of the newest stored item} for the pairs that have one."""
+    db = ReadSession()
+    try:
+        hwms = {}
+        for kind in kinds:
+            for sub in subs:
+                value = get_state(db, _hwm_key(kind, sub))
+                if value is not None:
+                    hwms[(kind, sub.lower())] = float(value)
+        return hwms
+    finally:
+        db.close()
+
+def save_hwms(hwms):
+    def write(db):
+        for (kind, sub), value in hwms.items():
+            set_state(db, _hwm_key(kind, sub), value)
+
+    if hwms:
+        run_write(write)
+
+def fetch_new(client, sub, kind, limit, hwm=None):
+    """Rows for `sub`'s newest `kind` items, stopping at the first one older than `hwm`.
+
+    Returns (rows, newest created_utc seen). Items exactly at `hwm` are kept,
+    since several can share a second; the store skips the ones already known.
+    """
+    subreddit = client.subreddit(sub)
+    listing = subreddit.new(limit=limit) if kind == "submissions" else subreddit.comments(limit=limit)
+    to_row = ROW_BUILDERS[kind]
+    rows = []
+    newest = hwm
+    reached = hwm is None
+    for item in paced(listing):
+        if hwm is not None and item.created_utc < hwm:
+            reached = True
+            break
+        rows.append(to_row(item))
+        newest = item.created_utc if newest is None else max(newest, item.created_utc)
+    metrics.inc("reddit_requests_total", max(1, -(-len(rows) // PAGE_SIZE)), subreddit=sub)
+    if not reached and len(rows) >= limit:
+        log.warning("r/%s: %d new %s fill the listing limit; some may have been missed", sub, len(rows), kind)
+    return rows, newest
+
+def store_rows(rows):
+    """Extract mentions for unseen rows, then upsert them in chunks; returns the summed counts.
+
+    Mentions and dedup signatures are computed here, not inside the write
+    transaction. Known posts only get their score/comments refreshed.
+    """
+    if not rows:
+        return {"new_posts": 0, "duplicates": 0}
+    with metrics.timer("ingest_stage_seconds", collector="reddit", stage="extract"):
+        db = ReadSession()
+        try:
+            known = known_post_keys(db, "reddit", [row["platform_post_id"] for row in rows])
+        finally:
+            db.close()
+        mentions = {row["platform_post_id"]: post_mentions(row) for row in rows if row["platform_post_id"] not in known}
+        if dedup.dedup_enabled("reddit"):
+            for row in rows:
+                if row["platform_post_id"] not in known:
+                    row["signature"] = dedup.post_signature(row)
+
+    def mentions_for(row):
+        found = mentions.get(row["platform_post_id"])
+        return post_mentions(row) if found is None else found
+
+    with metrics.timer("ingest_stage_seconds", collector="reddit", stage="store"):
+        futures = [
+            submit_write(lambda db, chunk=rows[i:i + WRITE_CHUNK]: upsert_posts(
+                db, "reddit", chunk, update_fields=REDDIT_UPDATE_FIELDS, mentions_for=mentions_for,
+            ))
+            for i in range(0, len(rows), WRITE_CHUNK)
+        ]
+        results = [f.result() for f in futures]
+    return {
+        "new_posts": sum(r["inserted"] for r in results),
+        "duplicates": sum(r["duplicates"] for r in results),
+    }
+
+def ingest_reddit(limit_per_sub=50, subs=None, client=None, comments=None, comment_limit=None):
+    """Fetch new submissions (and comments) of `subs` concurrently and store them.
+
+    High-water marks only advance once the rows are committed, so a failed
+    subreddit or a crashed run is fetched again next time.
+    """
+    subs = subs or SUBS_DEFAULT
+    comments = settings.reddit_comments if comments is None else comments
+    comment_limit = comment_limit or settings.reddit_comment_limit
+    symbol_universe(reload=True)
+    name_index(reload=True)
+
+    kinds = KINDS if comments else KINDS[:1]
+    tasks = [(sub, kind) for sub in subs for kind in kinds]
+    hwms = load_hwms(subs, kinds)
+
+    def fetch(task):
+        sub, kind = task
+        limit = limit_per_sub if kind == "submissions" else comment_limit
+        try:
+            return fetch_new(client or thread_client(), sub, kind, limit, hwms.get((kind, sub.lower())))
+        except Exception:
+            log.exception("r/%s %s fetch failed", sub, kind)
+            return None
+
+    with metrics.timer("ingest_stage_seconds", collector="reddit", stage="fetch"):
+        with ThreadPoolExecutor(max_workers=max(1, min(settings.reddit_workers, len(tasks))),
+                                thread_name_prefix="reddit") as pool:
+            fetched = list(pool.map(fetch, tasks))
+
+    rows = []
+    newest = {}
+    errors = 0
+    for (sub, kind), result in zip(tasks, fetched):
+        if result is None:
+            errors += 1
+            continue
+        task_rows, task_newest = result
+        rows.extend(task_rows)
+        if task_newest is not None and task_newest != hwms.get((kind, sub.lower())):
+            newest[(kind, sub.lower())] = task_newest
+
+    result = store_rows(rows)
+    save_hwms(newest)
+    metrics.inc("reddit_fetch_errors_total", errors)
+    result.update({"fetched": len(rows), "errors": errors})
+    return result
+
+def stream_reddit(subs=None, client=None, comments=None, batch_size=None, flush_seconds=None,
+                  poll_seconds=2.0, stop=None, on_flush=None):
+    """Follow new submissions (and comments) of `subs` until `stop` is set or Ctrl-C.
+
+    Items are stored in micro-batches of up to `batch_size`, at least every
+    `flush_seconds` while anything is pending. Items older than a
+    subreddit's high-water mark (PRAW replays up to 100 on start) are
+    dropped. `on_flush(totals)` runs at most every FLUSH_HOOK_SECONDS and
+    once more on exit. Returns the running totals.
+    """
     subs = subs or SUBS_DEFAULT
-    r = reddit_client()
+    comments = settings.reddit_comments if comments is None else comments
+    batch_size = batch_size or settings.reddit_stream_batch
+    flush_seconds = settings.reddit_stream_flush_seconds if flush_seconds is None else flush_seconds
+    stop = stop or threading.Event()
+    r = client or reddit_client()
+    symbol_universe(reload=True)
+    name_index(reload=True)
+
+    kinds = KINDS if comments else KINDS[:1]
+    hwms = load_hwms(subs, kinds)
+    multi = r.subreddit("+".join(subs))
+    streams = {kind: getattr(multi.stream, kind)(pause_after=0) for kind in kinds}
+    limiter = reddit_limiter()
+
+    totals = {"new_posts": 0, "duplicates": 0, "fetched": 0, "batches": 0}
+    batch = []
+    newest = {}
+    flush_due = time.monotonic() + flush_seconds
+    hook_due = time.monotonic() + FLUSH_HOOK_SECONDS
+
+    def flush():
+        stored = store_rows(batch)
+        save_hwms(newest)
+        hwms.update(newest)
+        totals["new_posts"] += stored["new_posts"]
+        totals["duplicates"] += stored["duplicates"]
+        totals["fetched"] += len(batch)
+        totals["batches"] += 1
+        batch.clear()
+        newest.clear()
+
+    try:
+        while not stop.is_set():
+            idle = True
+            for kind, stream in streams.items():
+                limiter.acquire()
+                for item in stream:
+                    if item is None:
+                        break
+                    idle = False
+                    key = (kind, str(item.subreddit).lower())
+                    if item.created_utc < hwms.get(key, 0):
+                        continue
+                    batch.append(ROW_BUILDERS[kind](item))
+                    newest[key] = max(newest.get(key, 0), item.created_utc)
+                    if len(batch) >= batch_size:
+                        break
+            now = time.monotonic()
+            if batch and (len(batch) >= batch_size or now >= flush_due):
+                flush()
+            if now >= flush_due:
+                flush_due = now + flush_seconds
+            if on_flush and now >= hook_due:
+                on_flush(dict(totals))
+                hook_due = now + FLUSH_HOOK_SECONDS
+            if idle:
+                stop.wait(poll_seconds)
+    except KeyboardInterrupt:
+        pass
+    if batch:
+        flush()
+    if on_flush:
+        on_flush(dict(totals))
+    return totals
 
-    db = SessionLocal()
-    new_posts = 0
+def refresh_reddit_scores(hours=None, client=None):
+    """Re-read score and comment counts of submissions from the last `hours`.
 
+    Uses `info()`, which returns up to 100 submissions per request, so this is
+    far cheaper than re-walking the listings. Comments are not refreshed.
+    """
+    hours = settings.reddit_refresh_hours if hours is None else hours
+    since = datetime.utcnow() - timedelta(hours=hours)
+    db = ReadSession()
     try:
-        for sub in subs:
-            for s in r.subreddit(sub).hot(limit=limit_per_sub):
-                created = datetime.fromtimestamp(s.created_utc, tz=timezone.utc).replace(tzinfo=None)
-                p = Post(
-                    platform="reddit",
-                    platform_post_id=s.id,
-                    url=f"https://www.reddit.com{s.permalink}",
-                    author=str(s.author) if s.author else None,
-                    title=s.title,
-                    body=getattr(s, "selftext", None),
-                    created_at=created,
-                    score=int(getattr(s, "score", 0) or 0),
-                    comments=int(getattr(s, "num_comments", 0) or 0),
-                )
-
-                # upsert behavior
-                exists = db.query(Post).filter_by(platform="reddit", platform_post_id=s.id).first()
-                if exists:
-                    exists.score = p.score
-                    exists.comments = p.comments
-                    continue
-
-                db.add(p)
-                db.flush()
-
-                text = f"{p.title or ''}\n{p.body or ''}"
-                syms = extract_symbols(text)
-                for sym in syms:
-                    db.add(Mention(
-                        post_id=p.id,
-                        symbol=sym,
-                        asset_type=classify_asset_type(sym),
-                        confidence=0.6,
-                    ))
-                new_posts += 1
-
-        db.commit()
-        return {"new_posts": new_posts}
+        ids = db.execute(
+            select(Post.platform_post_id)
+            .where(Post.platform == "reddit", Post.created_at >= since,
+                   Post.platform_post_id.not_like("t1\\_%", escape="\\"))
+            .order_by(Post.created_at.desc())
+        ).scalars().all()
     finally:
         db.close()
+    r = client or reddit_client()
+    limiter = reddit_limiter()
+    rows = []
+    with metrics.timer("ingest_stage_seconds", collector="reddit", stage="refresh"):
+        for i in range(0, len(ids), PAGE_SIZE):
+            limiter.acquire()
+            metrics.inc("reddit_requests_total", subreddit="info")
+            fullnames = [f"t3_{post_id}" for post_id in ids[i:i + PAGE_SIZE]]
+            rows.extend(submission_row(s) for s in r.info(fullnames=fullnames))
+    futures = [
+        submit_write(lambda db, chunk=rows[i:i + WRITE_CHUNK]: upsert_posts(
+            db, "reddit", chunk, update_fields=REDDIT_UPDATE_FIELDS, mentions_for=post_mentions,
+        ))
+        for i in range(0, len(rows), WRITE_CHUNK)
+    ]
+    return {"checked": len(ids), "updated": sum(f.result()["updated"] for f in futures)}
@@ -0,0 +1,63 @@
+import random
+import threading
+import time
+import requests
+
+from .. import metrics
+from ..config import settings
+from ..ratelimit import shared_bucket
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_local = threading.local()
+
+def sec_headers():
+    return {"User-Agent": settings.sec_user_agent}
+
+def sec_limiter():
+    # One bucket per process so every thread and collector shares SEC's budget.
+    return shared_bucket("sec", settings.sec_max_rps)
+
+def thread_session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
+def sec_get(session, url, headers=None, timeout=30, retries=None, backoff=None):
+    retries = settings.sec_max_retries if retries is None else retries
+    backoff = settings.sec_backoff_seconds if backoff is None else backoff
+    merged = sec_headers()
+    if headers:
+        merged.update(headers)
+
+    limiter = sec_limiter()
+    attempt = 0
+    while True:
+        with metrics.timer("sec_wait_seconds", reason="rate_limit"):
+            limiter.acquire()
+        try:
+            with metrics.timer("sec_http_seconds"):
+                resp = session.get(url, headers=merged, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            metrics.inc("sec_requests_total", status="error")
+            if attempt >= retries:
+                raise
+        else:
+            metrics.inc("sec_requests_total", status=str(resp.status_code))
+            metrics.inc("sec_bytes_total", len(resp.content))
+            if resp.status_code not in RETRY_STATUSES or attempt >= retries:
+                return resp
+            retry_after = resp.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                metrics.inc("sec_retries_total")
+                with metrics.timer("sec_wait_seconds", reason="retry_after"):
+                    time.sleep(float(retry_after))
+                attempt += 1
+                continue
+
+        metrics.inc("sec_retries_total")
+        with metrics.timer("sec_wait_seconds", reason="backoff"):
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random() * 0.25))
+        attempt += 1
@@ -5,7 +5,7 @@ import os
 load_dotenv()
 
 class Settings(BaseModel):
-    db_url: str = "sqlite:///tradebot.sqlite"
+    db_url: str = os.getenv("TRADEBOT_DB_URL", "sqlite:///tradebot.sqlite")
     reddit_client_id: str = os.getenv("REDDIT_CLIENT_ID", "")
     reddit_client_secret: str = os.getenv("REDDIT_CLIENT_SECRET", "")
     reddit_user_agent: str = os.getenv("REDDIT_USER_AGENT", "tradebot:local:v0.1")
@@ -13,4 +13,97 @@ class Settings(BaseModel):
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     x_bearer_token: str = os.getenv("X_BEARER_TOKEN", "")
 
+    sqlite_mmap_mb: int = int(os.getenv("SQLITE_MMAP_MB", "256"))
+    sqlite_cache_mb: int = int(os.getenv("SQLITE_CACHE_MB", "64"))
+    query_cache_mb: int = int(os.getenv("QUERY_CACHE_MB", "128"))
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+    # Single writer thread: queued writes are group-committed in batches of up to
+    # DB_WRITE_BATCH, waiting DB_WRITE_LINGER_MS for more to arrive; a transaction
+    # is committed early once it has run for DB_WRITE_MAX_TXN_MS.
+    db_write_batch: int = int(os.getenv("DB_WRITE_BATCH", "64"))
+    db_write_linger_ms: float = float(os.getenv("DB_WRITE_LINGER_MS", "5"))
+    db_write_max_txn_ms: float = float(os.getenv("DB_WRITE_MAX_TXN_MS", "250"))
+    db_read_pool_size: int = int(os.getenv("DB_READ_POOL_SIZE", "5"))
+
+    # SEC fair-access policy allows 10 requests/second; stay a little under it.
+    sec_max_rps: float = float(os.getenv("SEC_MAX_RPS", "8"))
+    sec_workers: int = int(os.getenv("SEC_WORKERS", "8"))
+    sec_max_retries: int = int(os.getenv("SEC_MAX_RETRIES", "4"))
+    sec_backoff_seconds: float = float(os.getenv("SEC_BACKOFF_SECONDS", "0.5"))
+    sec_cache_dir: str = os.getenv("SEC_CACHE_DIR", ".cache/sec")
+    sec_tickers_ttl_hours: float = float(os.getenv("SEC_TICKERS_TTL_HOURS", "24"))
+    # "feed" polls EDGAR's latest-filings Atom feed and only fetches changed CIKs; "full" polls every CIK.
+    edgar_discovery: str = os.getenv("EDGAR_DISCOVERY", "feed")
+    sec_feed_url: str = os.getenv(
+        "SEC_FEED_URL",
+        "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=&company=&dateb="
+        "&owner=include&start={start}&count={count}&output=atom",
+    )
+    sec_feed_max_pages: int = int(os.getenv("SEC_FEED_MAX_PAGES", "10"))
+    # "watchlist" polls watchlist.txt; "all" polls every company in SEC's ticker file.
+    # EDGAR_SHARD=i/n only polls CIKs with cik % n == i, so n processes can split the universe.
+    edgar_universe: str = os.getenv("EDGAR_UNIVERSE", "watchlist")
+    edgar_shard: str = os.getenv("EDGAR_SHARD", "0/1")
+    # Processes used to parse downloaded filing documents (1 = inline).
+    filing_workers: int = int(os.getenv("FILING_WORKERS", "2"))
+    # A filing whose download or parse failed is retried up to FILING_MAX_ATTEMPTS times,
+    # FILING_RETRY_MINUTES after the first failure and twice as long after each later one.
+    filing_max_attempts: int = int(os.getenv("FILING_MAX_ATTEMPTS", "5"))
+    filing_retry_minutes: float = float(os.getenv("FILING_RETRY_MINUTES", "15"))
+
+    # Reddit (tradebot/collectors/reddit.py): OAuth clients get ~100 requests/minute, shared
+    # by REDDIT_WORKERS fetch threads. Runs also pull up to REDDIT_COMMENT_LIMIT new comments
+    # per subreddit, and the refresh job re-reads scores of posts from the last REDDIT_REFRESH_HOURS.
+    reddit_max_rps: float = float(os.getenv("REDDIT_MAX_RPS", "1.5"))
+    reddit_workers: int = int(os.getenv("REDDIT_WORKERS", "4"))
+    reddit_comments: bool = os.getenv("REDDIT_COMMENTS", "1").lower() in ("1", "true", "yes")
+    reddit_comment_limit: int = int(os.getenv("REDDIT_COMMENT_LIMIT", "500"))
+    reddit_refresh_hours: float = float(os.getenv("REDDIT_REFRESH_HOURS", "24"))
+    # `run_jobs.py reddit-stream` stores items in batches of up to REDDIT_STREAM_BATCH,
+    # at least every REDDIT_STREAM_FLUSH_SECONDS.
+    reddit_stream_batch: int = int(os.getenv("REDDIT_STREAM_BATCH", "200"))
+    reddit_stream_flush_seconds: float = float(os.getenv("REDDIT_STREAM_FLUSH_SECONDS", "5"))
+
+    edgar_interval_minutes: float = float(os.getenv("EDGAR_INTERVAL_MINUTES", "15"))
+    reddit_interval_minutes: float = float(os.getenv("REDDIT_INTERVAL_MINUTES", "10"))
+    reddit_refresh_minutes: float = float(os.getenv("REDDIT_REFRESH_MINUTES", "60"))
+    job_jitter_seconds: int = int(os.getenv("JOB_JITTER_SECONDS", "30"))
+    # A "running" job row older than this is treated as a crashed run.
+    job_stale_minutes: float = float(os.getenv("JOB_STALE_MINUTES", "60"))
+
+    # Hot/cold tiering (tradebot/archive.py): posts older than ARCHIVE_AFTER_DAYS move
+    # to month-partitioned Parquet under ARCHIVE_DIR; 0 disables the scheduled job.
+    archive_dir: str = os.getenv("ARCHIVE_DIR", ".cache/archive")
+    archive_after_days: float = float(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+    archive_interval_hours: float = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "24"))
+    archive_batch: int = int(os.getenv("ARCHIVE_BATCH", "50000"))
+    # A month partition is rewritten as one file once it has this many parts.
+    archive_compact_files: int = int(os.getenv("ARCHIVE_COMPACT_FILES", "8"))
+
+    # Near-duplicate detection (tradebot/dedup.py): comma-separated platforms, estimated
+    # Jaccard similarity that counts as a duplicate, and the shortest text considered.
+    dedup_platforms: str = os.getenv("DEDUP_PLATFORMS", "reddit")
+    dedup_threshold: float = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+    dedup_min_tokens: int = int(os.getenv("DEDUP_MIN_TOKENS", "15"))
+
+    # Streaming mention velocity (tradebot/velocity.py). Only comma-separated VELOCITY_PLATFORMS
+    # are tracked; EDGAR filings carry date-only timestamps and would all land at midnight.
+    velocity_enabled: bool = os.getenv("VELOCITY_ENABLED", "1").lower() in ("1", "true", "yes")
+    velocity_platforms: str = os.getenv("VELOCITY_PLATFORMS", "reddit")
+    velocity_snapshot: str = os.getenv("VELOCITY_SNAPSHOT", ".cache/velocity.npz")
+    velocity_half_life_hours: float = float(os.getenv("VELOCITY_HALF_LIFE_HOURS", "24"))
+    velocity_spike_z: float = float(os.getenv("VELOCITY_SPIKE_Z", "3"))
+    velocity_min_mentions: int = int(os.getenv("VELOCITY_MIN_MENTIONS", "5"))
+
+    # Headless API (tradebot/api.py) over JSON snapshots written to SNAPSHOT_DIR after each job.
+    snapshot_dir: str = os.getenv("SNAPSHOT_DIR", ".cache/snapshots")
+    api_host: str = os.getenv("API_HOST", "127.0.0.1")
+    api_port: int = int(os.getenv("API_PORT", "8765"))
+
+    # Instrumentation (tradebot/metrics.py); everything is a no-op unless enabled.
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+    metrics_file: str = os.getenv("METRICS_FILE", ".cache/metrics.json")
+    # Scheduler serves /metrics and /metrics.json on this port when > 0.
+    metrics_port: int = int(os.getenv("METRICS_PORT", "0"))
+
 settings = Settings()
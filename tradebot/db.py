@@ -1,7 +1,186 @@
-from sqlalchemy import create_engine
+"""Engines and sessions.
+
+Writes go through a single writer thread (`submit_write` / `run_write`):
+callers hand over a function taking a Session, and the writer group-commits
+whatever is queued in one short transaction, so parallel collectors never
+fight over SQLite's write lock. Reads use `read_engine` / `ReadSession`, a
+separate pool of `query_only` connections that WAL lets run alongside the
+writer.
+"""
+from concurrent.futures import Future
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
+from .metrics import inc, instrument_engine, observe
+
+log = logging.getLogger(__name__)
 
 engine = create_engine(settings.db_url, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
+
+def _is_memory_db(url):
+    return url.database in (None, "", ":memory:")
+
+def _sqlite_pragmas(dbapi_conn, read_only=False):
+    cur = dbapi_conn.cursor()
+    if read_only:
+        cur.execute("PRAGMA query_only=ON")
+    elif not _is_memory_db(engine.url):
+        cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_mb * 1024 * 1024}")
+    # Negative cache_size is in KiB rather than pages.
+    cur.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_mb * 1024}")
+    cur.close()
+
+if engine.dialect.name == "sqlite" and not _is_memory_db(engine.url):
+    read_engine = create_engine(settings.db_url, future=True, pool_size=settings.db_read_pool_size)
+else:
+    # An in-memory DB only exists on its own connection(s); share the engine.
+    read_engine = engine
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _write_connect(dbapi_conn, _record):
+        _sqlite_pragmas(dbapi_conn)
+        # Let SQLAlchemy emit BEGIN itself (see _begin_immediate) instead of pysqlite.
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(conn):
+        # Take the write lock up front: a deferred transaction that reads and
+        # then writes fails outright if another process wrote in between,
+        # whereas BEGIN IMMEDIATE just waits out busy_timeout.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    if read_engine is not engine:
+        event.listen(read_engine, "connect", lambda conn, _record: _sqlite_pragmas(conn, read_only=True))
+
+ReadSession = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
+
+if settings.metrics_enabled:
+    instrument_engine(engine)
+    if read_engine is not engine:
+        instrument_engine(read_engine)
+
+class DbWriter:
+    """One thread that owns every write transaction.
+
+    Queued operations are drained in batches of up to `max_batch` (waiting up
+    to `linger` seconds for stragglers) and committed together, closing the
+    transaction early once it has run for `max_txn` seconds so other
+    processes are never locked out for long. If a transaction fails, it is
+    rolled back and its operations are retried one per transaction so one bad
+    write only fails its own caller.
+    """
+
+    def __init__(self, session_factory, max_batch=64, linger=0.005, max_txn=0.25):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.linger = linger
+        self.max_txn = max_txn
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn):
+        """Queue `fn(session)`; the Future resolves with its return value after commit."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("write operations cannot be submitted from inside a write operation")
+        future = Future()
+        self._ensure_started()
+        self._queue.put((fn, future))
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            batch = [(fn, fut) for fn, fut in batch if fut.set_running_or_notify_cancel()]
+            inc("db_write_ops_total", len(batch))
+            while batch:
+                batch = batch[self._commit_some(batch):]
+
+    def _commit_some(self, batch):
+        """Run a prefix of `batch` in one transaction and resolve its futures; returns its length."""
+        session = self.session_factory()
+        start = time.perf_counter()
+        results = []
+        try:
+            for fn, _ in batch:
+                results.append(fn(session))
+                if time.perf_counter() - start >= self.max_txn:
+                    break
+            session.commit()
+        except BaseException as exc:
+            session.rollback()
+            session.close()
+            attempted = batch[:len(results) + 1]
+            if len(attempted) == 1:
+                attempted[0][1].set_exception(exc)
+            else:
+                log.warning("group commit of %d writes failed (%s); retrying individually", len(attempted), exc)
+                for item in attempted:
+                    self._commit_some([item])
+            return len(attempted)
+        session.close()
+        observe("db_write_txn_seconds", time.perf_counter() - start)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        return len(results)
+
+    def close(self, timeout=None):
+        """Finish queued writes and stop the thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+writer = DbWriter(
+    SessionLocal,
+    max_batch=settings.db_write_batch,
+    linger=settings.db_write_linger_ms / 1000.0,
+    max_txn=settings.db_write_max_txn_ms / 1000.0,
+)
+atexit.register(writer.close)
+
+def submit_write(fn):
+    return writer.submit(fn)
+
+def run_write(fn, timeout=None):
+    """Run `fn(session)` on the writer thread and return its result once committed."""
+    return writer.submit(fn).result(timeout)
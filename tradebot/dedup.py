@@ -0,0 +1,165 @@
+"""Near-duplicate post detection with MinHash signatures and an LSH index.
+
+A post's text is its body, or title plus body when the body is short. The
+text is reduced to word 3-gram shingles, and 32 multiply-shift MinHashes
+(16 bits each) estimate the Jaccard similarity between two posts.
+
+`post_lsh` indexes each post under 8 band keys. Each key is 4 MinHashes
+packed into one 64-bit integer. A new post is only compared with posts
+sharing a band key, so lookups stay sublinear in the number of stored
+posts. A pair with similarity 0.7 shares a band with ~90% probability, and
+one at 0.8 with ~99%.
+
+Duplicates get `posts.canonical_post_id` set to the earliest matching post.
+Their mentions are kept but left out of `symbol_stats`, the decay scoring
+and the velocity tracker, so a cross-post counts once.
+"""
+import hashlib
+import re
+
+import numpy as np
+from sqlalchemy import delete, insert, select, tuple_, update
+
+from .config import settings
+from .models import Post, PostLshBand, PostSignature
+
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+CHUNK_SIZE = 500
+_rng = np.random.default_rng(0x7EAD)
+_MUL = _rng.integers(1, 2**63, NUM_HASHES, dtype=np.uint64) * np.uint64(2) + np.uint64(1)  # odd
+_ADD = _rng.integers(0, 2**63, NUM_HASHES, dtype=np.uint64)
+_BAND_SALT = np.arange(BANDS, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+_URL = re.compile(r"https?://\S+")
+_TOKEN = re.compile(r"[a-z0-9$]+")
+
+def tokens(text_value):
+    return _TOKEN.findall(_URL.sub(" ", (text_value or "").lower()))
+
+def minhash(words):
+    """NUM_HASHES uint16 MinHashes of `words`' 3-gram shingles."""
+    shingles = {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+    # blake2b rather than hash(): signatures are persisted across processes.
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    # Multiply-shift: the top bits of a*h + b (mod 2**64) form a universal hash family.
+    with np.errstate(over="ignore"):
+        values = (hashes[:, None] * _MUL + _ADD) >> np.uint64(48)
+    return values.min(axis=0).astype(np.uint16)
+
+def signature(title, body, min_tokens=None):
+    """64-byte MinHash signature of a post, or None if its text is too short to compare."""
+    min_tokens = settings.dedup_min_tokens if min_tokens is None else min_tokens
+    words = tokens(body)
+    if len(words) < min_tokens:
+        # Short or link-only posts: fall back to the title as well.
+        words = tokens(title) + words
+    if len(words) < max(min_tokens, 3):
+        return None
+    return minhash(words).tobytes()
+
+def post_signature(row):
+    return signature(row.get("title"), row.get("body"))
+
+def band_keys(sig):
+    """Signed 64-bit LSH key per band: its ROWS 16-bit hashes packed together, salted by band."""
+    packed = np.frombuffer(sig, dtype=np.uint16).reshape(BANDS, ROWS).astype(np.uint64)
+    keys = np.zeros(BANDS, dtype=np.uint64)
+    for i in range(ROWS):
+        keys |= packed[:, i] << np.uint64(16 * i)
+    return (keys ^ _BAND_SALT).view(np.int64).tolist()
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(np.frombuffer(a, dtype=np.uint16) == np.frombuffer(b, dtype=np.uint16)))
+
+def _candidates(db, keys):
+    """Stored posts under any of `keys` -> {key: [(post_id, signature, root)]}."""
+    index = {}
+    found = {}
+    keys = sorted(keys)
+    for i in range(0, len(keys), CHUNK_SIZE):
+        stmt = (
+            select(PostLshBand.band_key, PostSignature.post_id, PostSignature.minhash, Post.canonical_post_id)
+            .join(PostSignature, PostSignature.post_id == PostLshBand.post_id)
+            .join(Post, Post.id == PostLshBand.post_id)
+            .where(PostLshBand.band_key.in_(keys[i:i + CHUNK_SIZE]))
+        )
+        for rec in db.execute(stmt):
+            entry = found.setdefault(rec.post_id, (rec.post_id, rec.minhash, rec.canonical_post_id or rec.post_id))
+            index.setdefault(rec.band_key, []).append(entry)
+    return index
+
+def link_duplicates(db, items):
+    """Index new posts and mark near-duplicates of earlier ones.
+
+    `items` are `(post_id, signature)` pairs for freshly inserted posts, in
+    creation order. Returns `{post_id: canonical_post_id}` for the duplicates.
+    """
+    items = [(post_id, sig, band_keys(sig)) for post_id, sig in items if sig is not None]
+    if not items:
+        return {}
+    index = _candidates(db, {key for _, _, keys in items for key in keys})
+    threshold = settings.dedup_threshold
+    canonical = {}
+    for post_id, sig, keys in items:
+        best = None
+        for key in keys:
+            for other_id, other_sig, root in index.get(key, ()):
+                score = similarity(sig, other_sig)
+                if score >= threshold and (best is None or (-score, root) < best):
+                    best = (-score, root)
+        root = post_id
+        if best is not None:
+            root = canonical[post_id] = best[1]
+        # Later posts in the same batch can match this one.
+        for key in keys:
+            index.setdefault(key, []).append((post_id, sig, root))
+
+    db.execute(insert(PostSignature), [{"post_id": post_id, "minhash": sig} for post_id, sig, _ in items])
+    db.execute(insert(PostLshBand), [
+        {"band_key": key, "post_id": post_id} for post_id, _, keys in items for key in set(keys)
+    ])
+    if canonical:
+        db.execute(update(Post), [{"id": post_id, "canonical_post_id": root} for post_id, root in canonical.items()])
+    return canonical
+
+def forget(db, post_ids):
+    """Drop the signatures and index entries of `post_ids` (e.g. when they are archived)."""
+    stmt = select(PostSignature.post_id, PostSignature.minhash).where(PostSignature.post_id.in_(post_ids))
+    pairs = [(key, post_id) for post_id, sig in db.execute(stmt) for key in set(band_keys(sig))]
+    # Deleting by (band_key, post_id) uses the primary key; there is no index on post_id alone.
+    for i in range(0, len(pairs), CHUNK_SIZE):
+        db.execute(delete(PostLshBand).where(tuple_(PostLshBand.band_key, PostLshBand.post_id).in_(pairs[i:i + CHUNK_SIZE])))
+    db.execute(delete(PostSignature).where(PostSignature.post_id.in_(post_ids)))
+
+def dedup_enabled(platform):
+    return platform in settings.dedup_platforms.split(",")
+
+def index_existing(batch=5000):
+    """Sign and link posts stored before dedup existed, oldest first; returns the duplicate count."""
+    from .db import ReadSession, run_write
+
+    platforms = settings.dedup_platforms.split(",")
+    duplicates = 0
+    after_id = 0
+    while True:
+        db = ReadSession()
+        try:
+            rows = db.execute(
+                select(Post.id, Post.title, Post.body)
+                .outerjoin(PostSignature, PostSignature.post_id == Post.id)
+                .where(Post.platform.in_(platforms), Post.id > after_id, PostSignature.post_id.is_(None))
+                .order_by(Post.id)
+                .limit(batch)
+            ).all()
+        finally:
+            db.close()
+        if not rows:
+            return duplicates
+        items = [(r.id, signature(r.title, r.body)) for r in rows]
+        duplicates += len(run_write(lambda db: link_duplicates(db, items)))
+        after_id = rows[-1].id
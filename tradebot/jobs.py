@@ -0,0 +1,196 @@
+"""Job runner shared by the scheduler service and the dashboard.
+
+Every run is recorded in `job_runs`. A job never overlaps itself: an
+in-process lock covers threads, and a fresh "running" row covers other
+processes (the scheduler and the dashboard may both trigger EDGAR). Each
+EDGAR shard (`EDGAR_SHARD`) is recorded as its own job, so shards running in
+separate processes do not skip each other.
+
+Follow-up jobs started by hooks run on daemon threads. One-shot commands call
+`wait_for_background_jobs()` before exiting, and any run still in progress at
+exit is marked as failed rather than left "running".
+"""
+from datetime import datetime, timedelta
+import atexit
+import json
+import logging
+import threading
+
+from sqlalchemy import select
+
+from . import metrics
+from .config import settings
+from .db import run_write
+from .models import JobRun
+
+log = logging.getLogger(__name__)
+
+def _ingest_edgar():
+    if settings.edgar_discovery == "feed":
+        from .collectors.edgar_feed import ingest_edgar_feed
+        return ingest_edgar_feed()
+    from .collectors.edgar import ingest_edgar
+    return ingest_edgar()
+
+def _ingest_reddit(limit_per_sub=75):
+    from .collectors.reddit import ingest_reddit
+    return ingest_reddit(limit_per_sub=limit_per_sub)
+
+def _refresh_reddit_scores():
+    from .collectors.reddit import refresh_reddit_scores
+    return refresh_reddit_scores()
+
+def _process_filing_texts():
+    from .collectors.filing_text import process_filing_texts
+    return process_filing_texts()
+
+def _archive_posts():
+    from .archive import archive_posts
+    return archive_posts()
+
+JOBS = {
+    "edgar": _ingest_edgar,
+    "reddit": _ingest_reddit,
+    "reddit-refresh": _refresh_reddit_scores,
+    "filings": _process_filing_texts,
+    "archive": _archive_posts,
+}
+
+# Called with (job_name, result) after every successful run.
+POST_INGEST_HOOKS = []
+
+_locks = {name: threading.Lock() for name in JOBS}
+_active_runs = set()    # job_runs ids in progress in this process
+_background = []        # threads started by trigger_job_async
+
+def _clear_query_cache(job, result):
+    from .cache import query_cache
+    query_cache.clear()
+
+def _queue_filing_texts(job, result):
+    # Document download/parsing stays off the EDGAR ingest path.
+    if job == "edgar":
+        trigger_job_async("filings", trigger="after-edgar")
+
+def _refresh_briefs(job, result):
+    # EDGAR adds filings; the filings job re-tags dilutive ones as offerings.
+    if job in ("edgar", "filings"):
+        from .briefs import refresh_briefs
+        refresh_briefs()
+
+def _save_velocity(job, result):
+    from .velocity import save_snapshot
+    save_snapshot()
+
+def _write_snapshots(job, result):
+    # After _save_velocity, so the ideas snapshot sees the latest velocity state.
+    from .snapshots import write_snapshots
+    write_snapshots()
+
+def _write_metrics(job, result):
+    metrics.write_metrics()
+
+POST_INGEST_HOOKS.append(_clear_query_cache)
+POST_INGEST_HOOKS.append(_queue_filing_texts)
+POST_INGEST_HOOKS.append(_refresh_briefs)
+POST_INGEST_HOOKS.append(_save_velocity)
+POST_INGEST_HOOKS.append(_write_snapshots)
+POST_INGEST_HOOKS.append(_write_metrics)
+
+def _run_name(name):
+    if name == "edgar" and settings.edgar_shard not in ("", "0/1"):
+        return f"edgar:{settings.edgar_shard}"
+    return name
+
+def _start_run(name, trigger):
+    def write(db):
+        stale = datetime.utcnow() - timedelta(minutes=settings.job_stale_minutes)
+        running = db.execute(
+            select(JobRun.id).where(JobRun.job == name, JobRun.status == "running", JobRun.started_at >= stale)
+        ).first()
+        run = JobRun(job=name, status="skipped" if running else "running", trigger=trigger,
+                     started_at=datetime.utcnow())
+        if running:
+            run.finished_at = run.started_at
+            run.error = "previous run still in progress"
+        db.add(run)
+        db.flush()
+        return None if running else run.id
+
+    return run_write(write)
+
+def _finish_run(run_id, status, result=None, error=None):
+    def write(db):
+        run = db.get(JobRun, run_id)
+        run.status = status
+        run.finished_at = datetime.utcnow()
+        run.result = json.dumps(result, default=str) if result is not None else None
+        run.error = error
+
+    run_write(write)
+
+def run_job(name, trigger="schedule", **kwargs):
+    """Run a collector job synchronously; returns its result, or None if skipped/failed.
+
+    `kwargs` are passed to the job function (e.g. `limit_per_sub` for "reddit").
+    """
+    lock = _locks[name]
+    if not lock.acquire(blocking=False):
+        log.info("job %s already running in this process; skipping", name)
+        return None
+    try:
+        run_id = _start_run(_run_name(name), trigger)
+        if run_id is None:
+            log.info("job %s already running elsewhere; skipping", name)
+            return None
+        _active_runs.add(run_id)
+        try:
+            with metrics.timer("job_seconds", job=name):
+                result = JOBS[name](**kwargs)
+        except Exception as exc:
+            log.exception("job %s failed", name)
+            metrics.inc("job_runs_total", job=name, status="error")
+            _finish_run(run_id, "error", error=f"{type(exc).__name__}: {exc}")
+            _active_runs.discard(run_id)
+            metrics.write_metrics()
+            return None
+        metrics.inc("job_runs_total", job=name, status="success")
+        _finish_run(run_id, "success", result=result)
+        _active_runs.discard(run_id)
+        run_post_ingest_hooks(name, result)
+        return result
+    finally:
+        lock.release()
+
+def run_post_ingest_hooks(name, result):
+    for hook in POST_INGEST_HOOKS:
+        try:
+            hook(name, result)
+        except Exception:
+            log.exception("post-ingest hook %s failed", getattr(hook, "__name__", hook))
+
+def trigger_job_async(name, trigger="manual"):
+    """Start `name` on a daemon thread and return immediately."""
+    if _locks[name].locked():
+        return False
+    thread = threading.Thread(target=run_job, args=(name, trigger), name=f"job-{name}", daemon=True)
+    _background.append(thread)
+    thread.start()
+    return True
+
+def wait_for_background_jobs(timeout=None):
+    """Join jobs started by `trigger_job_async`, including ones they start in turn."""
+    while _background:
+        _background.pop(0).join(timeout)
+
+def _abandon_runs():
+    # Daemon job threads die with the process; don't leave their rows "running"
+    # (and later runs skipped) until JOB_STALE_MINUTES passes.
+    for run_id in list(_active_runs):
+        _finish_run(run_id, "error", error="process exited before the job finished")
+
+# Registered after tradebot.db's writer.close, so it runs first at exit.
+atexit.register(_abandon_runs)
+
+def last_runs(db, limit=10):
+    return db.execute(select(JobRun).order_by(JobRun.started_at.desc()).limit(limit)).scalars().all()
@@ -0,0 +1,277 @@
+"""In-process counters and latency histograms, off unless `METRICS_ENABLED=1`.
+
+Collectors call `inc`/`observe`/`timer` unconditionally; when metrics are
+disabled those return immediately (and `timer` hands back a shared no-op
+context manager), so instrumented code paths cost one attribute check.
+Snapshots are exported as JSON or Prometheus text, either to
+`METRICS_FILE` after each job or over HTTP with `serve_metrics(port)`.
+"""
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import bisect
+import json
+import os
+import re
+import threading
+import time
+
+from .config import settings
+
+# Upper bounds in seconds; the last bucket is +Inf.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "tradebot_"
+
+_STATEMENT = re.compile(r"^\s*(\w+)(?:.*?\b(?:FROM|INTO|UPDATE|TABLE)\s+[\"`]?(\w+))?", re.I | re.S)
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> _Histogram
+
+    def inc(self, name, value, labels):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels):
+        key = (name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram()
+            hist.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = []
+            for (name, labels), hist in sorted(self._histograms.items(), key=lambda kv: kv[0]):
+                cumulative = 0
+                buckets = []
+                for bound, count in zip(BUCKETS + (float("inf"),), hist.counts):
+                    cumulative += count
+                    buckets.append([bound, cumulative])
+                histograms.append({
+                    "name": name, "labels": dict(labels),
+                    "count": hist.count, "sum": hist.sum, "buckets": buckets,
+                })
+        return {
+            "generated_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "pid": os.getpid(),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+registry = Registry()
+
+def _labels(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+def inc(name, value=1, **labels):
+    if settings.metrics_enabled and value:
+        registry.inc(name, value, _labels(labels))
+
+def observe(name, seconds, **labels):
+    if settings.metrics_enabled:
+        registry.observe(name, seconds, _labels(labels))
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name, **labels):
+    """`with timer("stage_seconds", collector="edgar", stage="db"): ...`"""
+    if not settings.metrics_enabled:
+        return _NULL_TIMER
+    return _Timer(name, _labels(labels))
+
+def statement_labels(statement):
+    """Low-cardinality labels for a SQL statement: verb plus first table."""
+    m = _STATEMENT.match(statement)
+    if not m:
+        return (("op", "other"), ("table", ""))
+    return (("op", m.group(1).upper()), ("table", (m.group(2) or "").lower()))
+
+def instrument_engine(engine):
+    """Record per-statement latency on `engine` as `db_statement_seconds{op,table}`."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("_metrics_start")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        registry.observe("db_statement_seconds", elapsed, statement_labels(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("_metrics_start"):
+            conn.info["_metrics_start"].pop()
+        inc("db_errors_total")
+
+def histogram_quantile(hist, q):
+    """Estimate the `q` quantile from a snapshot histogram (upper bucket bound)."""
+    if not hist["count"]:
+        return None
+    target = q * hist["count"]
+    for bound, cumulative in hist["buckets"]:
+        if cumulative >= target:
+            return bound
+    return float("inf")
+
+def summary_rows(snapshot):
+    """Flatten a snapshot into (timers, counters) row lists for tabular display."""
+    fmt = lambda labels: ", ".join(f"{k}={v}" for k, v in labels.items())
+    timers = []
+    for h in snapshot["histograms"]:
+        p95 = histogram_quantile(h, 0.95)
+        timers.append({
+            "metric": h["name"],
+            "labels": fmt(h["labels"]),
+            "count": h["count"],
+            "total_s": round(h["sum"], 4),
+            "mean_ms": round(1000 * h["sum"] / h["count"], 3) if h["count"] else None,
+            "p95_ms_le": None if p95 in (None, "+Inf", float("inf")) else 1000 * p95,
+        })
+    timers.sort(key=lambda r: r["total_s"], reverse=True)
+    counters = [{"metric": c["name"], "labels": fmt(c["labels"]), "value": c["value"]} for c in snapshot["counters"]]
+    return timers, counters
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + (extra or [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+def to_prometheus(snapshot=None):
+    snapshot = snapshot or registry.snapshot()
+    lines = []
+    typed = set()
+    for c in snapshot["counters"]:
+        name = PREFIX + c["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(c['labels'])} {c['value']}")
+    for h in snapshot["histograms"]:
+        name = PREFIX + h["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        for bound, cumulative in h["buckets"]:
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_format_labels(h['labels'], [('le', le)])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(h['labels'])} {h['sum']}")
+        lines.append(f"{name}_count{_format_labels(h['labels'])} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+def to_json(snapshot=None):
+    snapshot = snapshot or registry.snapshot()
+    # json can't encode inf; Prometheus-style "+Inf" keeps the bucket readable.
+    histograms = [
+        {**h, "buckets": [["+Inf" if b == float("inf") else b, c] for b, c in h["buckets"]]}
+        for h in snapshot["histograms"]
+    ]
+    return json.dumps({**snapshot, "histograms": histograms}, indent=2)
+
+def write_metrics(path=None):
+    """Write `<path>` (JSON) and the same snapshot as Prometheus text next to it (`.prom`)."""
+    if not settings.metrics_enabled:
+        return None
+    path = Path(path or settings.metrics_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = registry.snapshot()
+    for target, body in ((path.with_suffix(".prom"), to_prometheus(snapshot)), (path, to_json(snapshot))):
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, target)
+    return path
+
+def read_metrics_file(path=None):
+    """Snapshot written by another process (e.g. the scheduler), or None."""
+    path = Path(path or settings.metrics_file)
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve `/metrics` (Prometheus text) and `/metrics.json` on a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, ctype = to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, ctype = to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,109 @@
+"""Versioned schema migrations tracked in SQLite's `PRAGMA user_version`.
+
+Append a `(version, step)` pair to MIGRATIONS for every schema change. A fresh
+database is created straight from the models and stamped with the latest
+version; existing databases run the steps they have not seen yet.
+"""
+from sqlalchemy import inspect
+
+from .db import Base, engine
+from .models import (
+    Post, Mention, Summary, SymbolStat, AppState, JobRun, FilingSignal, PostSignature, PostLshBand,
+    CikMap, EdgarProgress,
+)
+from .stats import rebuild_symbol_stats
+
+_migrated = set()
+
+def _initial_schema(conn):
+    Base.metadata.create_all(conn, tables=[Post.__table__, Mention.__table__, Summary.__table__])
+
+def _create_tables(*tables):
+    def step(conn):
+        for table in tables:
+            table.create(conn, checkfirst=True)
+    return step
+
+def _create_indexes(*tables):
+    def step(conn):
+        for table in tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    return step
+
+def _create_symbol_stats(conn):
+    SymbolStat.__table__.create(conn, checkfirst=True)
+    rebuild_symbol_stats(conn)
+
+def add_column(conn, table, column_ddl):
+    name = column_ddl.split()[0]
+    if name not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column_ddl}")
+
+def _summary_source_hash(conn):
+    add_column(conn, "summaries", "source_hash VARCHAR")
+    _create_indexes(Summary.__table__)(conn)
+
+def _post_signatures(conn):
+    add_column(conn, "posts", "canonical_post_id INTEGER")
+    _create_tables(PostSignature.__table__, PostLshBand.__table__)(conn)
+
+def _filing_signal_retries(conn):
+    add_column(conn, "filing_signals", "attempts INTEGER NOT NULL DEFAULT 1")
+    add_column(conn, "filing_signals", "retry_at DATETIME")
+    # Errors recorded before retries existed are due now.
+    conn.exec_driver_sql("UPDATE filing_signals SET retry_at = parsed_at WHERE status = 'error'")
+
+def _edgar_progress_failures(conn):
+    # checked_at becomes nullable (a failed CIK has not been checked), which
+    # SQLite only allows by copying the table.
+    conn.exec_driver_sql("ALTER TABLE edgar_progress RENAME TO edgar_progress_old")
+    EdgarProgress.__table__.create(conn)
+    conn.exec_driver_sql("""
+        INSERT INTO edgar_progress (cik, checked_at, last_filing_at, status, error, failed_at, failures)
+        SELECT cik,
+               CASE WHEN status = 'error' THEN NULL ELSE checked_at END,
+               last_filing_at, status, error,
+               CASE WHEN status = 'error' THEN checked_at END,
+               CASE WHEN status = 'error' THEN 1 ELSE 0 END
+        FROM edgar_progress_old
+    """)
+    conn.exec_driver_sql("DROP TABLE edgar_progress_old")
+
+MIGRATIONS = [
+    (1, _initial_schema),
+    (2, _create_indexes(Post.__table__, Mention.__table__)),
+    (3, _create_symbol_stats),
+    (4, _create_tables(AppState.__table__)),
+    (5, _create_tables(JobRun.__table__)),
+    (6, _create_tables(FilingSignal.__table__)),
+    (7, _summary_source_hash),
+    (8, _post_signatures),
+    (9, _create_tables(CikMap.__table__, EdgarProgress.__table__)),
+    (10, _filing_signal_retries),
+    (11, _edgar_progress_failures),
+]
+
+def schema_version(conn):
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+def _stamp(conn, version):
+    conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+def migrate(bind=None):
+    bind = bind or engine
+    key = str(bind.url)
+    if key in _migrated:
+        return
+    latest = MIGRATIONS[-1][0]
+    with bind.begin() as conn:
+        version = schema_version(conn)
+        if version == 0 and not inspect(conn).has_table(Post.__tablename__):
+            Base.metadata.create_all(conn)
+            _stamp(conn, latest)
+        else:
+            for step_version, step in MIGRATIONS:
+                if step_version > version:
+                    step(conn)
+                    _stamp(conn, step_version)
+    _migrated.add(key)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, UniqueConstraint, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, LargeBinary, UniqueConstraint, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .db import Base
@@ -17,8 +17,14 @@ class Post(Base):
 
     score = Column(Integer, default=0)      # upvotes/likes
     comments = Column(Integer, default=0)
+    # Set on near-duplicates (tradebot.dedup); aggregates only count posts where it is NULL.
+    canonical_post_id = Column(Integer, nullable=True)
 
-    __table_args__ = (UniqueConstraint("platform", "platform_post_id", name="uq_post"),)
+    __table_args__ = (
+        UniqueConstraint("platform", "platform_post_id", name="uq_post"),
+        # 48h/7d EDGAR windows: WHERE platform = ? AND created_at >= ?
+        Index("ix_posts_platform_created_at", "platform", "created_at"),
+    )
 
 class Mention(Base):
     __tablename__ = "mentions"
@@ -32,6 +38,27 @@ class Mention(Base):
 
     post = relationship("Post", backref="mentions")
 
+    __table_args__ = (
+        # Covering index for joins from posts (catalysts, filings windows).
+        Index("ix_mentions_post_id", "post_id", "symbol", "asset_type", "thesis_type"),
+        # Symbol drilldowns and GROUP BY symbol, asset_type.
+        Index("ix_mentions_symbol", "symbol", "asset_type", "post_id"),
+    )
+
+class PostSignature(Base):
+    """MinHash signature of a post's text (tradebot.dedup)."""
+    __tablename__ = "post_signatures"
+    post_id = Column(Integer, ForeignKey("posts.id"), primary_key=True)
+    minhash = Column(LargeBinary, nullable=False)
+
+class PostLshBand(Base):
+    """LSH index: one row per (band key, post) for near-duplicate candidate lookups."""
+    __tablename__ = "post_lsh"
+    band_key = Column(Integer, primary_key=True, autoincrement=False)
+    post_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
 class Summary(Base):
     __tablename__ = "summaries"
     id = Column(Integer, primary_key=True)
@@ -41,3 +68,82 @@ class Summary(Base):
     summary_text = Column(Text, nullable=False)
     generated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     source_max_created_at = Column(DateTime, nullable=True)
+    # SHA-256 of the rows the text was built from (tradebot.briefs.source_hash).
+    source_hash = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_summaries_scope_symbol", "scope", "symbol", "time_window_days", "generated_at"),
+    )
+
+class SymbolStat(Base):
+    """Per-symbol, per-platform running aggregates, maintained by tradebot.stats."""
+    __tablename__ = "symbol_stats"
+    symbol = Column(String, primary_key=True)
+    asset_type = Column(String, primary_key=True)
+    platform = Column(String, primary_key=True)
+    mentions = Column(Integer, nullable=False, default=0)
+    total_score = Column(Integer, nullable=False, default=0)
+    total_comments = Column(Integer, nullable=False, default=0)
+    first_seen = Column(DateTime, nullable=True)
+    last_seen = Column(DateTime, nullable=True)
+
+class AppState(Base):
+    """Small key/value store for counters, high-water marks and checkpoints."""
+    __tablename__ = "app_state"
+    key = Column(String, primary_key=True)
+    value = Column(Text, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class CikMap(Base):
+    """SEC's company_tickers.json, shared by every process that polls EDGAR."""
+    __tablename__ = "cik_map"
+    ticker = Column(String, primary_key=True)
+    cik = Column(Integer, nullable=False)
+    title = Column(String, nullable=True)
+    rank = Column(Integer, nullable=False)          # position in the SEC file; a company's primary ticker comes first
+
+    __table_args__ = (Index("ix_cik_map_cik", "cik", "rank"),)
+
+class EdgarProgress(Base):
+    """Per-CIK checkpoint of the EDGAR submissions poll, committed with the filings."""
+    __tablename__ = "edgar_progress"
+    cik = Column(Integer, primary_key=True, autoincrement=False)
+    checked_at = Column(DateTime, nullable=True)    # last successful poll
+    last_filing_at = Column(DateTime, nullable=True)
+    status = Column(String, nullable=False)         # ok/unchanged/error
+    error = Column(Text, nullable=True)
+    failed_at = Column(DateTime, nullable=True)
+    failures = Column(Integer, nullable=False, default=0)   # consecutive failed polls
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+    id = Column(Integer, primary_key=True)
+    job = Column(String, nullable=False)            # edgar/reddit/...
+    status = Column(String, nullable=False)         # running/success/error/skipped
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    result = Column(Text, nullable=True)            # JSON from the collector
+    error = Column(Text, nullable=True)
+    trigger = Column(String, nullable=True)         # schedule/manual
+
+    __table_args__ = (Index("ix_job_runs_job_started_at", "job", "started_at"),)
+
+class FilingSignal(Base):
+    """Dilution signals extracted from an EDGAR filing's primary document."""
+    __tablename__ = "filing_signals"
+    post_id = Column(Integer, ForeignKey("posts.id"), primary_key=True)
+    accession = Column(String, nullable=False)
+    form = Column(String, nullable=True)
+    doc_sha256 = Column(String, nullable=True)
+    status = Column(String, nullable=False)         # ok/error/skipped
+    is_atm = Column(Integer, nullable=False, default=0)
+    offering_amount = Column(Float, nullable=True)  # USD
+    shares = Column(Float, nullable=True)
+    price_per_share = Column(Float, nullable=True)
+    warrant_shares = Column(Float, nullable=True)
+    warrant_exercise_price = Column(Float, nullable=True)
+    snippet = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    parsed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=False, default=1)
+    retry_at = Column(DateTime, nullable=True)      # when an "error" row is next due
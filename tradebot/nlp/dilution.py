@@ -0,0 +1,137 @@
+"""Regex extraction of dilution signals from filing text (offerings, ATMs, warrants)."""
+from html.parser import HTMLParser
+import re
+
+SKIP_TAGS = {"script", "style", "head", "title"}
+BLOCK_TAGS = {"p", "div", "br", "tr", "td", "li", "h1", "h2", "h3", "h4", "table"}
+
+NUMBER = r"(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)"
+SCALE = {"thousand": 1e3, "million": 1e6, "billion": 1e9}
+
+ATM = re.compile(r"at[- ]the[- ]market(?: offering)?|equity distribution agreement", re.I)
+# "Sales agreement" alone is any commercial contract; it only counts as an ATM
+# with at-the-market / "ATM" / equity distribution wording within ATM_CONTEXT chars.
+SALES_AGREEMENT = re.compile(r"(?:open market )?sales agreement", re.I)
+ATM_CONTEXT_WORDS = re.compile(r"(?i:at[- ]the[- ]market|equity distribution)|\bATM\b")
+ATM_CONTEXT = 300
+OFFERING_AMOUNT = re.compile(
+    r"(?:aggregate (?:offering price|gross proceeds|sales proceeds)|gross proceeds)\s+(?:of\s+)?(?:up to\s+)?"
+    r"(?:approximately\s+)?\$\s?" + NUMBER + r"(?:\s+(thousand|million|billion))?",
+    re.I,
+)
+# A share count with a price is also how buybacks, option grants and merger
+# consideration read; it only counts as offered shares with offering wording and
+# no repurchase wording within OFFERING_CONTEXT chars.
+OFFERING_CONTEXT_WORDS = re.compile(
+    r"(?i:offering|offered|registered direct|underwrit|placement agent|at[- ]the[- ]market)|\bATM\b"
+)
+REPURCHASE_WORDS = re.compile(r"repurchas|buy[- ]?back|tender offer", re.I)
+OFFERING_CONTEXT = 300
+SHARES = re.compile(NUMBER + r"\s+shares of (?:our |the company[’']s |its )?(?:class a )?common stock", re.I)
+PRICE = re.compile(
+    r"(?:public offering price|offering price|purchase price|price)\s+(?:of\s+)?\$\s?(\d+(?:\.\d+)?)\s+per share",
+    re.I,
+)
+WARRANTS = re.compile(
+    r"warrants? to purchase (?:up to |an aggregate of )?" + NUMBER + r"\s+shares[^.]{0,200}?"
+    r"exercise price of \$\s?(\d+(?:\.\d+)?)",
+    re.I,
+)
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+def html_to_text(chunks):
+    """Incrementally parse HTML from an iterable of str chunks into plain text."""
+    parser = _TextExtractor()
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    text = "".join(parser.parts).replace("\xa0", " ")
+    return re.sub(r"[ \t\r\f\v]+", " ", text)
+
+def _number(raw, scale=None):
+    value = float(raw.replace(",", ""))
+    return value * SCALE.get((scale or "").lower(), 1.0)
+
+def _atm_sales_agreement(text):
+    for m in SALES_AGREEMENT.finditer(text):
+        window = text[max(0, m.start() - ATM_CONTEXT):m.end() + ATM_CONTEXT]
+        if ATM_CONTEXT_WORDS.search(window):
+            return m
+    return None
+
+def _offered_shares(text):
+    for m in SHARES.finditer(text):
+        window = text[max(0, m.start() - OFFERING_CONTEXT):m.end() + OFFERING_CONTEXT]
+        if OFFERING_CONTEXT_WORDS.search(window) and not REPURCHASE_WORDS.search(window):
+            return m
+    return None
+
+def extract_dilution_signals(text):
+    signals = {
+        "is_atm": 0,
+        "offering_amount": None,
+        "shares": None,
+        "price_per_share": None,
+        "warrant_shares": None,
+        "warrant_exercise_price": None,
+        "snippet": None,
+    }
+    if not text:
+        return signals
+
+    first = None
+    atm = ATM.search(text) or _atm_sales_agreement(text)
+    if atm:
+        signals["is_atm"] = 1
+        first = atm
+
+    m = OFFERING_AMOUNT.search(text)
+    if m:
+        signals["offering_amount"] = _number(m.group(1), m.group(2))
+        first = first or m
+
+    m = _offered_shares(text)
+    if m:
+        signals["shares"] = _number(m.group(1))
+        first = first or m
+
+    m = PRICE.search(text)
+    if m:
+        signals["price_per_share"] = float(m.group(1))
+
+    m = WARRANTS.search(text)
+    if m:
+        signals["warrant_shares"] = _number(m.group(1))
+        signals["warrant_exercise_price"] = float(m.group(2))
+
+    if first:
+        start = max(0, first.start() - 160)
+        signals["snippet"] = " ".join(text[start:first.end() + 240].split())
+    return signals
+
+def is_dilutive(signals):
+    return bool(
+        signals.get("is_atm")
+        or signals.get("offering_amount")
+        or (signals.get("shares") and signals.get("price_per_share"))
+        or signals.get("warrant_shares")
+    )
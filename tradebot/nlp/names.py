@@ -0,0 +1,213 @@
+"""Resolve company names written in prose ("Rocket Lab", "SoundHound") to tickers.
+
+The index is built from the SEC company_tickers.json the EDGAR collector
+caches, pickled next to it, and rebuilt only when that file changes. Each
+title is indexed in full ("soundhound ai") and, when the brand is shorter than
+the registered name, as a short alias ("soundhound") too. Lookups
+go through a prefix bucket (first four letters of the first word) so rapidfuzz
+only scores a handful of candidates, and results are memoized per n-gram.
+
+One-word names ("Post", "Match", "Root") are ordinary words too, so they only
+count on an exact match that does not start a sentence and has a market word
+("stock", "shares", "calls", ...) within a few words.
+"""
+from functools import lru_cache
+from pathlib import Path
+import pickle
+import re
+
+from rapidfuzz import fuzz, process
+
+from ..config import settings
+
+INDEX_VERSION = 2
+PREFIX_LEN = 4
+MAX_NGRAM = 4
+MIN_ALIAS_LEN = 4
+MATCH_CUTOFF = 92.0
+# Words either side of a one-word name searched for a FINANCE_CUES word.
+CUE_WINDOW = 5
+# Name matches are weaker evidence than a cashtag (0.6), scaled by match score.
+MAX_CONFIDENCE = 0.6
+
+WORD = re.compile(r"[A-Za-z][A-Za-z0-9&]*")
+# Legal/boilerplate words dropped from the end of registered names.
+GENERIC_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc",
+    "holdings", "holding", "group", "sa", "nv", "ag", "se", "lp", "llc", "trust", "usa",
+    "us", "de", "the", "class", "new", "international", "intl",
+}
+# Descriptive words people leave off when naming a company ("Palantir", not
+# "Palantir Technologies"); stripped from the end of a title for its short alias.
+BRAND_SUFFIXES = GENERIC_SUFFIXES | {
+    "ai", "technologies", "technology", "tech", "systems", "software", "solutions", "networks",
+    "therapeutics", "pharmaceuticals", "pharma", "biosciences", "bio", "energy", "motors",
+    "industries", "enterprises", "brands", "resources", "financial", "bancorp", "communications",
+}
+STOPWORDS = {"the", "and", "for", "with", "this", "that", "from", "into", "just", "what"}
+FINANCE_CUES = {
+    "stock", "stocks", "share", "shares", "ticker", "calls", "puts", "options", "earnings", "eps",
+    "revenue", "guidance", "dividend", "ipo", "buyback", "offering", "price", "valuation", "bought",
+    "sold", "buying", "selling", "long", "short", "bullish", "bearish", "position", "downgrade", "upgrade",
+}
+SENTENCE_END = ".!?\n"
+
+def normalize(name):
+    tokens = [t.lower() for t in WORD.findall(name.replace("&", " and "))]
+    if tokens and tokens[0] == "the":
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in GENERIC_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+class NameIndex:
+    def __init__(self, stamp, aliases):
+        self.stamp = stamp
+        self.aliases = aliases  # [(alias, ticker)]
+        self.buckets = {}       # prefix -> [alias]
+        self.tickers = {}       # alias -> ticker
+        for alias, ticker in aliases:
+            self.tickers[alias] = ticker
+            self.buckets.setdefault(alias[:PREFIX_LEN], []).append(alias)
+
+    def __len__(self):
+        return len(self.aliases)
+
+def short_alias(alias):
+    """`alias` with trailing BRAND_SUFFIXES dropped ("palantir technologies" -> "palantir")."""
+    tokens = alias.split()
+    while len(tokens) > 1 and tokens[-1] in BRAND_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+def build_name_index(company_tickers, stamp=None):
+    aliases = []
+    seen = set()
+    short = {}  # short alias -> {ticker}
+    # SEC lists each company's primary ticker first.
+    for entry in company_tickers.values():
+        ticker = str(entry.get("ticker", "")).upper()
+        alias = normalize(str(entry.get("title", "")))
+        if not ticker or len(alias) < MIN_ALIAS_LEN or alias.split()[0] in STOPWORDS:
+            continue
+        if alias not in seen:
+            seen.add(alias)
+            aliases.append((alias, ticker))
+        brand = short_alias(alias)
+        if brand != alias and len(brand) >= MIN_ALIAS_LEN:
+            short.setdefault(brand, set()).add(ticker)
+    # Full titles win; a short alias shared by two companies is left out.
+    for brand, tickers in short.items():
+        if brand not in seen and len(tickers) == 1:
+            aliases.append((brand, next(iter(tickers))))
+    return NameIndex(stamp, aliases)
+
+def index_path():
+    return Path(settings.sec_cache_dir) / "company_names.pkl"
+
+def load_name_index():
+    """Load the persisted index, rebuilding it if the SEC ticker file changed."""
+    from ..collectors.edgar import cached_company_tickers_file
+
+    data, entry = cached_company_tickers_file()
+    if data is None:
+        return NameIndex(None, [])
+    stamp = (INDEX_VERSION, entry.get("etag"), entry.get("last_modified"), len(data))
+
+    path = index_path()
+    if path.exists():
+        try:
+            with path.open("rb") as fh:
+                saved_stamp, aliases = pickle.load(fh)
+            if saved_stamp == stamp:
+                return NameIndex(stamp, aliases)
+        except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+            pass
+
+    index = build_name_index(data, stamp)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as fh:
+        pickle.dump((stamp, index.aliases), fh, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(path)
+    return index
+
+_index = None
+_index_file = None
+
+def _source_stamp():
+    from ..collectors.edgar import COMPANY_TICKERS_URL
+    from ..collectors.httpcache import HttpCache
+    return HttpCache().stamp(COMPANY_TICKERS_URL)
+
+def name_index(reload=False):
+    """The process-wide index; `reload` rebuilds it only if the SEC file changed on disk."""
+    global _index_file
+    if _index is None or reload:
+        stamp = _source_stamp()
+        if _index is None or stamp != _index_file:
+            set_name_index(load_name_index())
+            _index_file = stamp
+    return _index
+
+def set_name_index(index):
+    global _index, _index_file
+    _index = index
+    _index_file = None
+    _match.cache_clear()
+
+@lru_cache(maxsize=65536)
+def _match(ngram):
+    candidates = _index.buckets.get(ngram[:PREFIX_LEN]) if _index else None
+    if not candidates:
+        return None
+    best = process.extractOne(ngram, candidates, scorer=fuzz.ratio, score_cutoff=MATCH_CUTOFF)
+    if best is None:
+        return None
+    alias, score, _ = best
+    return _index.tickers[alias], score
+
+def _is_candidate_start(word):
+    # Proper-noun heuristic; all-caps short words are tickers, handled elsewhere.
+    return word[0].isupper() and not (word.isupper() and len(word) <= 5)
+
+def _starts_sentence(text, start):
+    before = text[:start].rstrip(" \t\"'(*_")
+    return not before or before[-1] in SENTENCE_END
+
+def _has_cue(lowered, i):
+    return any(w in FINANCE_CUES for w in lowered[max(0, i - CUE_WINDOW):i + CUE_WINDOW + 1])
+
+def resolve_company_names(text):
+    """Return {ticker: confidence} for company names found in `text`."""
+    if not text:
+        return {}
+    index = name_index()
+    if not index:
+        return {}
+
+    matches = list(WORD.finditer(text))
+    words = [m.group() for m in matches]
+    lowered = [w.lower() for w in words]
+    found = {}
+    for i, word in enumerate(words):
+        if not _is_candidate_start(word) or lowered[i][:PREFIX_LEN] not in index.buckets:
+            continue
+        for n in range(1, MAX_NGRAM + 1):
+            if i + n > len(words):
+                break
+            ngram = " ".join(lowered[i:i + n])
+            if len(ngram) < MIN_ALIAS_LEN:
+                continue
+            hit = _match(ngram)
+            if hit is None:
+                continue
+            ticker, score = hit
+            if n == 1 and (
+                score < 100 or _starts_sentence(text, matches[i].start()) or not _has_cue(lowered, i)
+            ):
+                continue
+            confidence = round(MAX_CONFIDENCE * score / 100.0, 3)
+            if confidence > found.get(ticker, 0.0):
+                found[ticker] = confidence
+    return found
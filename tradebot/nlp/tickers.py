@@ -1,32 +1,104 @@
 import re
+from concurrent.futures import ProcessPoolExecutor
 
-CASHTAG = re.compile(r"\$([A-Z]{1,6})\b")
-UPPER_TICKER = re.compile(r"\b([A-Z]{2,5})\b")
+# Single pass over the text matching "$TICK" cashtags (1-6 letters) and bare
+# 2-5 letter uppercase words. Both branches start with a literal/char class and
+# check word boundaries with lookarounds, which lets `re` skip lowercase text fast.
+TOKEN = re.compile(r"\$(?<!\w\$)[A-Z]{1,6}(?!\w)|[A-Z](?<!\w[A-Z])(?<!\$[A-Z])[A-Z]{1,4}(?!\w)")
 
 COMMON_FALSES = {"I", "A", "YOLO", "DD", "CEO", "ETF", "IMO", "USA", "GDP", "CPI", "FOMC"}
 FUTURES = {"ES","NQ","YM","RTY","CL","GC","SI","NG","ZB","ZN","ZF","ZT","6E","6J","6B"}
+# Real tickers that are far more often plain (shouted) words; only counted as cashtags.
+COMMON_WORDS = {
+    "AI", "ALL", "AM", "AN", "ANY", "ARE", "AT", "BE", "BIG", "BY", "CAN", "CASH", "CFO", "DO",
+    "EPS", "EV", "FOR", "FREE", "FUN", "GO", "GOOD", "HAS", "HE", "IPO", "IRS", "IT", "LOVE",
+    "LOW", "MAN", "MORE", "NEW", "NEXT", "NOW", "ON", "ONE", "OPEN", "OR", "OUT", "PM", "REAL",
+    "RH", "RUN", "SAVE", "SEC", "SEE", "SO", "TV", "TWO", "UK", "UP", "US", "WELL", "WIN",
+}
 
-def extract_symbols(text: str):
+_universe = None
+
+class SymbolUniverse:
+    """Known tradable symbols; bare uppercase words must be in here to count."""
+
+    __slots__ = ("symbols",)
+
+    def __init__(self, symbols=()):
+        self.symbols = frozenset(s.upper() for s in symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.symbols
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __bool__(self):
+        return bool(self.symbols)
+
+def load_symbol_universe():
+    """SEC tickers (from the EDGAR collector's on-disk cache) plus FUTURES."""
+    from ..collectors.edgar import cached_company_tickers
+
+    tickers = cached_company_tickers()
+    if not tickers:
+        return SymbolUniverse()
+    return SymbolUniverse(set(tickers) | FUTURES)
+
+def symbol_universe(reload=False):
+    global _universe
+    if _universe is None or reload:
+        _universe = load_symbol_universe()
+    return _universe
+
+def set_symbol_universe(universe):
+    global _universe
+    _universe = universe if isinstance(universe, SymbolUniverse) else SymbolUniverse(universe)
+
+def extract_symbols(text: str, universe=None):
+    """Cashtags are always taken; bare words only when they are known symbols.
+
+    Without a universe (SEC ticker file not downloaded yet) any 2-5 letter
+    uppercase word is accepted, as before.
+    """
     if not text:
         return []
+    if universe is None:
+        universe = symbol_universe()
 
-    found = set()
-
-    for m in CASHTAG.finditer(text):
-        sym = m.group(1)
-        if sym not in COMMON_FALSES:
-            found.add(sym)
+    hits = set(TOKEN.findall(text))
+    if not hits:
+        return []
+    cashtags = {h[1:] for h in hits if h[0] == "$"}
+    bare = {h for h in hits if h[0] != "$"} - COMMON_FALSES
 
-    for m in UPPER_TICKER.finditer(text):
-        sym = m.group(1)
-        if sym in COMMON_FALSES:
-            continue
-        if sym in FUTURES:
-            found.add(sym)
-        elif 2 <= len(sym) <= 5:
-            found.add(sym)
+    found = (cashtags - COMMON_FALSES) | (bare & FUTURES)
+    if universe:
+        found |= (bare & universe.symbols) - COMMON_WORDS
+    else:
+        found |= bare
 
     return sorted(found)
 
+def _init_worker(universe):
+    set_symbol_universe(universe)
+
+def _extract_chunk(texts):
+    universe = symbol_universe()
+    return [extract_symbols(t, universe) for t in texts]
+
+def extract_many(texts, processes=None, chunksize=500):
+    """Batch `extract_symbols`; `processes > 1` fans out to a process pool (backfills)."""
+    texts = list(texts)
+    universe = symbol_universe()
+    if not processes or processes <= 1 or len(texts) <= chunksize:
+        return [extract_symbols(t, universe) for t in texts]
+
+    chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+    out = []
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(universe,)) as pool:
+        for result in pool.map(_extract_chunk, chunks):
+            out.extend(result)
+    return out
+
 def classify_asset_type(symbol: str):
     return "future" if symbol in FUTURES else "stock"
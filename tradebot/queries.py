@@ -0,0 +1,93 @@
+"""Read queries behind the dashboard, each returning a DataFrame.
+
+Functions take an Engine/Connection as `bind` and are wrapped with
+`tradebot.cache.cached_query`, so repeated calls with the same parameters and
+an unchanged data version are served from memory.
+"""
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import text
+
+from .cache import cached_query
+from .stats import RANKED_IDEAS_SQL
+
+def window_start(now=None, **delta):
+    """`now - delta` floored to the minute, so reruns within a minute share a cache key."""
+    now = now or datetime.utcnow()
+    return (now - timedelta(**delta)).replace(second=0, microsecond=0)
+
+@cached_query
+def fetch_edgar_filings(bind, since_dt, symbol=None):
+    base = """
+    SELECT p.created_at,
+           m.symbol,
+           m.thesis_type,
+           p.title,
+           p.url
+    FROM posts p
+    JOIN mentions m ON m.post_id = p.id
+    WHERE p.platform = 'edgar'
+      AND p.created_at >= :since
+    """
+    params = {"since": since_dt}
+    if symbol:
+        base += " AND m.symbol = :symbol"
+        params["symbol"] = symbol
+    base += " ORDER BY p.created_at DESC"
+    df_filings = pd.read_sql(text(base), bind, params=params)
+    df_filings["created_at"] = pd.to_datetime(df_filings["created_at"], errors="coerce")
+    df_filings["thesis_type"] = df_filings["thesis_type"].fillna("other")
+    df_filings["title"] = df_filings["title"].fillna("Filing")
+    return df_filings
+
+@cached_query
+def distinct_symbols(bind):
+    # symbol_stats still covers symbols whose posts were all archived.
+    return pd.read_sql(text("SELECT DISTINCT symbol FROM symbol_stats ORDER BY symbol"), bind)
+
+@cached_query
+def ranked_ideas(bind, limit=200):
+    df = pd.read_sql(text(RANKED_IDEAS_SQL), bind, params={"limit": limit})
+    df["last_seen"] = pd.to_datetime(df["last_seen"], errors="coerce")
+    return df
+
+@cached_query
+def recent_mentions(bind, since_dt):
+    q = """
+    SELECT m.symbol, m.asset_type, p.score, p.comments, p.created_at
+    FROM posts p
+    JOIN mentions m ON m.post_id = p.id
+    WHERE p.created_at >= :since
+      AND p.canonical_post_id IS NULL
+    """
+    return pd.read_sql(text(q), bind, params={"since": since_dt})
+
+@cached_query
+def catalysts(bind, cutoff, limit=200):
+    cq = """
+    SELECT p.created_at as filing_date,
+           m.symbol,
+           m.thesis_type,
+           p.title,
+           p.url,
+           p.body
+    FROM posts p
+    JOIN mentions m ON m.post_id = p.id
+    WHERE p.platform = 'edgar'
+      AND p.created_at >= :cutoff
+    ORDER BY p.created_at DESC
+    LIMIT :limit
+    """
+    return pd.read_sql(text(cq), bind, params={"cutoff": cutoff, "limit": limit})
+
+@cached_query
+def symbol_posts(bind, symbol, limit=50):
+    pq = """
+    SELECT p.platform, p.url, p.created_at, p.score, p.comments, p.title
+    FROM posts p
+    JOIN mentions m ON m.post_id = p.id
+    WHERE m.symbol = :sym
+    ORDER BY p.created_at DESC
+    LIMIT :limit
+    """
+    return pd.read_sql(text(pq), bind, params={"sym": symbol, "limit": limit})
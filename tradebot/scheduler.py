@@ -0,0 +1,54 @@
+"""Long-running ingestion service: `python run_jobs.py scheduler`."""
+from datetime import datetime
+import logging
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+from . import metrics
+from .config import settings
+from .jobs import run_job
+
+log = logging.getLogger(__name__)
+
+def build_scheduler(scheduler_cls=BlockingScheduler):
+    scheduler = scheduler_cls(job_defaults={
+        "coalesce": True,          # collapse missed runs into one
+        "max_instances": 1,        # never overlap a job with itself
+        "misfire_grace_time": 300,
+    })
+    jitter = settings.job_jitter_seconds or None
+    now = datetime.now()
+
+    scheduler.add_job(
+        run_job, IntervalTrigger(minutes=settings.edgar_interval_minutes, jitter=jitter),
+        args=["edgar"], id="edgar", next_run_time=now,
+    )
+    if settings.reddit_client_id and settings.reddit_client_secret:
+        scheduler.add_job(
+            run_job, IntervalTrigger(minutes=settings.reddit_interval_minutes, jitter=jitter),
+            args=["reddit"], id="reddit", next_run_time=now,
+        )
+        scheduler.add_job(
+            run_job, IntervalTrigger(minutes=settings.reddit_refresh_minutes, jitter=jitter),
+            args=["reddit-refresh"], id="reddit-refresh",
+        )
+    else:
+        log.warning("Reddit credentials missing; reddit jobs not scheduled")
+    if settings.archive_after_days > 0:
+        scheduler.add_job(
+            run_job, IntervalTrigger(hours=settings.archive_interval_hours, jitter=jitter),
+            args=["archive"], id="archive",
+        )
+    return scheduler
+
+def run_scheduler():
+    if settings.metrics_enabled and settings.metrics_port:
+        metrics.serve_metrics(settings.metrics_port)
+        log.info("metrics on http://127.0.0.1:%d/metrics", settings.metrics_port)
+    scheduler = build_scheduler()
+    log.info("scheduler started: %s", ", ".join(job.id for job in scheduler.get_jobs()))
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
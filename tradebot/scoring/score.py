@@ -1,6 +1,65 @@
 import math
+import numpy as np
+import pandas as pd
+
+COMMENT_WEIGHT = 0.6
+DECAY_PER_HOUR = 0.15
+# Posts older than this contribute < 1e-6 of their undecayed score.
+DECAY_HORIZON_HOURS = math.ceil(math.log(1e6) / DECAY_PER_HOUR)
+UNKNOWN_AGE_HOURS = 9999.0
+# Score multiplier per unit of mention-velocity z-score (tradebot.velocity), capped.
+VELOCITY_WEIGHT = 0.25
+VELOCITY_Z_CAP = 10.0
 
 def idea_score(popularity: int, comments: int, age_hours: float):
-    pop = math.log1p(max(popularity, 0)) + 0.6 * math.log1p(max(comments, 0))
-    decay = math.exp(-0.15 * max(age_hours, 0))
+    pop = math.log1p(max(popularity, 0)) + COMMENT_WEIGHT * math.log1p(max(comments, 0))
+    decay = math.exp(-DECAY_PER_HOUR * max(age_hours, 0))
     return pop * decay
+
+def idea_scores(popularity, comments, age_hours):
+    """Vectorized `idea_score` over equal-length array-likes."""
+    popularity = np.maximum(np.asarray(popularity, dtype=np.float64), 0)
+    comments = np.maximum(np.asarray(comments, dtype=np.float64), 0)
+    age_hours = np.maximum(np.asarray(age_hours, dtype=np.float64), 0)
+    pop = np.log1p(popularity) + COMMENT_WEIGHT * np.log1p(comments)
+    return pop * np.exp(-DECAY_PER_HOUR * age_hours)
+
+def decayed_symbol_scores(symbols, popularity, comments, age_hours):
+    """Score each post on its own age, then sum per symbol.
+
+    Returns `(unique_symbols, scores)`. Unlike scoring aggregates by the latest
+    post's age, a burst of old posts no longer rides on one fresh mention.
+    """
+    codes, keys = pd.factorize(np.asarray(symbols, dtype=object), sort=True)
+    contrib = idea_scores(popularity, comments, age_hours)
+    return np.asarray(keys), np.bincount(codes, weights=contrib, minlength=len(keys))
+
+def age_hours_since(created_at, now):
+    created_at = pd.to_datetime(created_at, errors="coerce")
+    age = (now - created_at).dt.total_seconds() / 3600.0
+    return age.fillna(UNKNOWN_AGE_HOURS)
+
+def score_aggregates(df, now):
+    """Current formula: decay each row's totals by its `last_seen` age."""
+    age = age_hours_since(df["last_seen"], now)
+    return idea_scores(df["total_score"].fillna(0), df["total_comments"].fillna(0), age)
+
+def score_mentions(df, now, keys=("symbol", "asset_type")):
+    """Per-mention decayed contributions (`score`, `comments`, `created_at`) summed by `keys`."""
+    keys = list(keys)
+    if df.empty:
+        return pd.DataFrame(columns=keys + ["idea_score"])
+    age = age_hours_since(df["created_at"], now)
+    contrib = idea_scores(df["score"].fillna(0), df["comments"].fillna(0), age)
+    scored = df[keys].assign(idea_score=contrib)
+    return scored.groupby(keys, sort=False, as_index=False)["idea_score"].sum()
+
+def velocity_boost(spike_z, weight=VELOCITY_WEIGHT, cap=VELOCITY_Z_CAP):
+    """Multiplier >= 1 from a symbol's spike z-score; steady or fading symbols get 1."""
+    z = np.nan_to_num(np.asarray(spike_z, dtype=np.float64))
+    return 1.0 + weight * np.clip(z, 0.0, cap)
+
+def apply_velocity(df, trending):
+    """Scale `df["idea_score"]` by `velocity_boost` using a `VelocityTracker.frame()`."""
+    z = df["symbol"].map(trending.set_index("symbol")["spike_z"]) if not trending.empty else 0.0
+    return df.assign(spike_z=z, idea_score=df["idea_score"] * velocity_boost(z))
@@ -0,0 +1,87 @@
+"""Precomputed JSON snapshots served by `tradebot.api`.
+
+After every ingest job the ranked ideas, the 48h catalysts and the last 7
+days of filings per symbol are written to SNAPSHOT_DIR as `ideas.json`,
+`catalysts.json` and `filings.json`. Each file is replaced atomically, so API
+processes only ever read complete files and never open the database.
+"""
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from .config import settings
+from .db import read_engine
+from .state import data_version
+from . import queries, velocity
+from .scoring.score import DECAY_HORIZON_HOURS, apply_velocity, score_aggregates, score_mentions
+
+IDEAS_LIMIT = 500
+CATALYST_HOURS = 48
+FILINGS_DAYS = 7
+
+def _records(df):
+    # pandas handles NaN/NaT -> null and datetimes -> ISO strings.
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+def build_ideas(bind, now):
+    """Ranked ideas with aggregate, per-post decay and velocity-boosted scores."""
+    df = queries.ranked_ideas(bind, limit=IDEAS_LIMIT)
+    df = df.assign(
+        first_seen=pd.to_datetime(df["first_seen"], errors="coerce"),
+        idea_score=score_aggregates(df, now),
+    )
+    recent = queries.recent_mentions(bind, queries.window_start(now, hours=DECAY_HORIZON_HOURS))
+    decayed = score_mentions(recent, now).rename(columns={"idea_score": "decay_score"})
+    df = df.merge(decayed, on=["symbol", "asset_type"], how="left")
+    df["decay_score"] = df["decay_score"].fillna(0.0)
+
+    tracker = velocity.load_snapshot()
+    frame = tracker.frame(now) if tracker is not None else None
+    if frame is not None and not frame.empty:
+        boosted = apply_velocity(df, frame)
+        df = df.assign(spike_z=boosted["spike_z"].fillna(0.0), boosted_score=boosted["idea_score"])
+        spiking = frame.set_index("symbol")["spiking"]
+        df["spiking"] = df["symbol"].map(spiking).fillna(False).astype(bool)
+    else:
+        df = df.assign(spike_z=0.0, boosted_score=df["idea_score"], spiking=False)
+    return _records(df.sort_values("idea_score", ascending=False))
+
+def build_catalysts(bind, now):
+    return _records(queries.catalysts(bind, queries.window_start(now, hours=CATALYST_HOURS)))
+
+def build_filings(bind, now):
+    """{symbol: [filings, newest first]} for the last FILINGS_DAYS days."""
+    df = queries.fetch_edgar_filings(bind, queries.window_start(now, days=FILINGS_DAYS))
+    filings = {}
+    for row in _records(df):
+        filings.setdefault(row["symbol"], []).append(row)
+    return filings
+
+BUILDERS = {"ideas": build_ideas, "catalysts": build_catalysts, "filings": build_filings}
+
+def _write_json(path, payload):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+def write_snapshots(bind=None, now=None, names=None):
+    """Rebuild the snapshot files; returns {name: path}."""
+    bind = bind or read_engine
+    now = now or datetime.utcnow()
+    root = Path(settings.snapshot_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    version = data_version(bind)
+    written = {}
+    for name in names or BUILDERS:
+        payload = {
+            "generated_at": now.isoformat(timespec="seconds"),
+            "data_version": version,
+            name: BUILDERS[name](bind, now),
+        }
+        path = root / f"{name}.json"
+        _write_json(path, payload)
+        written[name] = path
+    return written
@@ -0,0 +1,44 @@
+from datetime import datetime
+from sqlalchemy import Integer, cast, delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import AppState
+
+DATA_VERSION_KEY = "data_version"
+# Posts created before this were moved to the Parquet archive (tradebot.archive).
+ARCHIVE_CUTOFF_KEY = "archive_cutoff"
+
+def get_state(db, key, default=None):
+    """`db` may be a Session or Connection."""
+    value = db.execute(select(AppState.value).where(AppState.key == key)).scalar()
+    return default if value is None else value
+
+def set_state(db, key, value):
+    table = AppState.__table__
+    stmt = sqlite_insert(table).values(key=key, value=str(value), updated_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
+
+def delete_state(db, key):
+    db.execute(delete(AppState).where(AppState.key == key))
+
+def bump_data_version(db):
+    """Advance the counter readers use to tell whether cached query results are stale."""
+    table = AppState.__table__
+    stmt = sqlite_insert(table).values(key=DATA_VERSION_KEY, value="1", updated_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"value": cast(table.c.value, Integer) + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
+
+def data_version(bind):
+    with bind.connect() as conn:
+        return int(get_state(conn, DATA_VERSION_KEY, 0))
+
+def archive_cutoff(db):
+    value = get_state(db, ARCHIVE_CUTOFF_KEY)
+    return None if value is None else datetime.fromisoformat(value)
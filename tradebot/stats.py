@@ -0,0 +1,127 @@
+"""Incremental maintenance of the `symbol_stats` aggregate table.
+
+Collectors feed every inserted mention and every score/comment change through
+`upsert_posts`, which calls into here, so the ranked-ideas view can read a
+table sized by the number of symbols instead of scanning all history.
+"""
+from collections import defaultdict
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import Mention, SymbolStat
+
+PLATFORMS = ("reddit", "edgar")
+
+class StatsDelta:
+    def __init__(self):
+        # (symbol, asset_type, platform) -> [mentions, score, comments, first_seen, last_seen]
+        self.rows = defaultdict(lambda: [0, 0, 0, None, None])
+
+    def add_mention(self, symbol, asset_type, platform, score, comments, created_at):
+        row = self.rows[(symbol, asset_type, platform)]
+        row[0] += 1
+        row[1] += score or 0
+        row[2] += comments or 0
+        if created_at is not None:
+            row[3] = created_at if row[3] is None else min(row[3], created_at)
+            row[4] = created_at if row[4] is None else max(row[4], created_at)
+
+    def add_engagement(self, symbol, asset_type, platform, score_delta, comments_delta):
+        row = self.rows[(symbol, asset_type, platform)]
+        row[1] += score_delta
+        row[2] += comments_delta
+
+    def __bool__(self):
+        return bool(self.rows)
+
+def post_mention_keys(db, post_ids):
+    """Map post_id -> [(symbol, asset_type)] for already-stored posts."""
+    keys = defaultdict(list)
+    post_ids = list(post_ids)
+    for i in range(0, len(post_ids), 500):
+        stmt = select(Mention.post_id, Mention.symbol, Mention.asset_type).where(
+            Mention.post_id.in_(post_ids[i:i + 500])
+        )
+        for post_id, symbol, asset_type in db.execute(stmt):
+            keys[post_id].append((symbol, asset_type))
+    return keys
+
+def apply_delta(db, delta):
+    if not delta:
+        return
+    values = [
+        {
+            "symbol": symbol,
+            "asset_type": asset_type,
+            "platform": platform,
+            "mentions": row[0],
+            "total_score": row[1],
+            "total_comments": row[2],
+            "first_seen": row[3],
+            "last_seen": row[4],
+        }
+        for (symbol, asset_type, platform), row in delta.rows.items()
+    ]
+    table = SymbolStat.__table__
+    stmt = sqlite_insert(table)
+    ex = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["symbol", "asset_type", "platform"],
+        set_={
+            "mentions": table.c.mentions + ex.mentions,
+            "total_score": table.c.total_score + ex.total_score,
+            "total_comments": table.c.total_comments + ex.total_comments,
+            "first_seen": func.min(
+                func.coalesce(table.c.first_seen, ex.first_seen),
+                func.coalesce(ex.first_seen, table.c.first_seen),
+            ),
+            "last_seen": func.max(
+                func.coalesce(table.c.last_seen, ex.last_seen),
+                func.coalesce(ex.last_seen, table.c.last_seen),
+            ),
+        },
+    )
+    db.execute(stmt, values)
+    delta.rows.clear()
+
+def _has_column(db, table, column):
+    return any(row[1] == column for row in db.execute(text(f"PRAGMA table_info({table})")))
+
+def rebuild_symbol_stats(db):
+    """Recompute symbol_stats from scratch (near-duplicates excluded); `db` may be a Session or Connection."""
+    # Migration step 3 runs this before step 8 adds canonical_post_id.
+    linked = "WHERE p.canonical_post_id IS NULL" if _has_column(db, "posts", "canonical_post_id") else ""
+    db.execute(text("DELETE FROM symbol_stats"))
+    db.execute(text(f"""
+        INSERT INTO symbol_stats
+            (symbol, asset_type, platform, mentions, total_score, total_comments, first_seen, last_seen)
+        SELECT m.symbol,
+               m.asset_type,
+               p.platform,
+               COUNT(*),
+               COALESCE(SUM(p.score), 0),
+               COALESCE(SUM(p.comments), 0),
+               MIN(p.created_at),
+               MAX(p.created_at)
+        FROM mentions m
+        JOIN posts p ON p.id = m.post_id
+        {linked}
+        GROUP BY m.symbol, m.asset_type, p.platform
+    """))
+
+RANKED_IDEAS_SQL = """
+SELECT symbol,
+       asset_type,
+       SUM(mentions) as mentions,
+       SUM(total_score) as total_score,
+       SUM(total_comments) as total_comments,
+       MIN(first_seen) as first_seen,
+       MAX(last_seen) as last_seen,
+       {platform_columns}
+FROM symbol_stats
+GROUP BY symbol, asset_type
+ORDER BY last_seen DESC, mentions DESC
+LIMIT :limit
+""".format(platform_columns=",\n       ".join(
+    f"SUM(CASE WHEN platform = '{p}' THEN mentions ELSE 0 END) as {p}_mentions" for p in PLATFORMS
+))
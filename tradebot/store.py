@@ -0,0 +1,163 @@
+from datetime import datetime
+import logging
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import dedup, metrics, velocity
+from .models import Post, Mention
+from .stats import StatsDelta, apply_delta, post_mention_keys
+from .state import archive_cutoff, bump_data_version
+
+log = logging.getLogger(__name__)
+
+# Keeps every statement well under SQLite's bound-parameter limit.
+CHUNK_SIZE = 500
+
+POST_FIELDS = ("url", "author", "title", "body", "created_at", "score", "comments")
+MENTION_DEFAULTS = {"asset_type": "stock", "stance": None, "thesis_type": None, "confidence": 0.5}
+
+def _chunks(items, size=CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _change(rec, values, field):
+    if field not in values:
+        return 0
+    return (values[field] or 0) - (getattr(rec, field) or 0)
+
+def known_post_keys(db, platform, keys):
+    """Subset of `keys` (platform_post_ids) already stored for `platform`."""
+    known = set()
+    for chunk in _chunks(list(keys)):
+        stmt = select(Post.platform_post_id).where(Post.platform == platform, Post.platform_post_id.in_(chunk))
+        known.update(db.execute(stmt).scalars())
+    return known
+
+def _row_mentions(row):
+    return row.get("mentions", ())
+
+def upsert_posts(db, platform, rows, update_fields=(), mentions_for=_row_mentions):
+    """Insert/update a batch of posts and their mentions in a handful of statements.
+
+    `rows` are dicts keyed by `platform_post_id` plus any of `POST_FIELDS`.
+    Existing posts get `update_fields` rewritten when they differ; new posts are
+    inserted with `INSERT ... ON CONFLICT DO NOTHING RETURNING` and
+    `mentions_for(row)` (dicts of Mention columns minus `post_id`) is only
+    evaluated for them. New posts older than the archive cutoff are skipped
+    (they belong to the Parquet archive) and counted as `skipped_archived`.
+    On dedup platforms new posts get a MinHash signature (or use a
+    precomputed `signature`), and near-duplicates are linked to their
+    canonical post and left out of the aggregates. `symbol_stats` and the data
+    version are updated in the same transaction, and on tracked platforms the
+    new mentions are fed to the velocity tracker once it commits. Nothing is
+    committed.
+    """
+    by_key = {}
+    for row in rows:
+        by_key[row["platform_post_id"]] = row
+    if not by_key:
+        return {"inserted": 0, "updated": 0, "duplicates": 0, "skipped_archived": 0, "post_ids": {}}
+
+    update_fields = tuple(update_fields)
+    existing = {}
+    columns = [Post.id, Post.platform_post_id, Post.canonical_post_id] + [getattr(Post, f) for f in update_fields]
+    for chunk in _chunks(list(by_key)):
+        stmt = select(*columns).where(Post.platform == platform, Post.platform_post_id.in_(chunk))
+        for rec in db.execute(stmt):
+            existing[rec.platform_post_id] = rec
+
+    delta = StatsDelta()
+    updates = []
+    engagement = {}
+    for key, rec in existing.items():
+        row = by_key[key]
+        values = {f: row[f] for f in update_fields if f in row}
+        if any(getattr(rec, f) != v for f, v in values.items()):
+            updates.append({"id": rec.id, **values})
+            score_delta = _change(rec, values, "score")
+            comments_delta = _change(rec, values, "comments")
+            # Near-duplicates never contributed to symbol_stats.
+            if (score_delta or comments_delta) and rec.canonical_post_id is None:
+                engagement[rec.id] = (score_delta, comments_delta)
+    if updates:
+        db.execute(update(Post), updates)
+    if engagement:
+        for post_id, keys in post_mention_keys(db, engagement).items():
+            score_delta, comments_delta = engagement[post_id]
+            for symbol, asset_type in keys:
+                delta.add_engagement(symbol, asset_type, platform, score_delta, comments_delta)
+
+    collected_at = datetime.utcnow()
+    new_rows = [row for key, row in by_key.items() if key not in existing]
+    cutoff = archive_cutoff(db)
+    skipped_archived = 0
+    if cutoff is not None:
+        kept = [row for row in new_rows if row.get("created_at") is None or row["created_at"] >= cutoff]
+        skipped_archived = len(new_rows) - len(kept)
+        new_rows = kept
+        if skipped_archived:
+            log.warning("skipped %d new %s posts older than the archive cutoff %s", skipped_archived, platform,
+                        cutoff.isoformat())
+    post_ids = {}
+    for chunk in _chunks(new_rows):
+        values = [
+            {
+                "platform": platform,
+                "platform_post_id": row["platform_post_id"],
+                "collected_at": collected_at,
+                **{f: row.get(f) for f in POST_FIELDS},
+            }
+            for row in chunk
+        ]
+        for f in ("score", "comments"):
+            for v in values:
+                v[f] = v[f] or 0
+        stmt = (
+            sqlite_insert(Post)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=["platform", "platform_post_id"])
+            .returning(Post.id, Post.platform_post_id)
+        )
+        for rec in db.execute(stmt):
+            post_ids[rec.platform_post_id] = rec.id
+
+    duplicates = {}
+    if post_ids and dedup.dedup_enabled(platform):
+        ordered = sorted(post_ids, key=lambda key: (by_key[key].get("created_at") or collected_at, post_ids[key]))
+        duplicates = dedup.link_duplicates(db, [
+            (post_ids[key], by_key[key]["signature"] if "signature" in by_key[key] else dedup.post_signature(by_key[key]))
+            for key in ordered
+        ])
+
+    mentions = []
+    counted = []
+    for key, post_id in post_ids.items():
+        row = by_key[key]
+        for mention in mentions_for(row):
+            mention = {"post_id": post_id, **MENTION_DEFAULTS, **mention}
+            mentions.append(mention)
+            if post_id in duplicates:
+                continue
+            counted.append((mention["symbol"], row.get("created_at")))
+            delta.add_mention(
+                mention["symbol"], mention["asset_type"], platform,
+                row.get("score"), row.get("comments"), row.get("created_at"),
+            )
+    if mentions:
+        db.execute(insert(Mention), mentions)
+    if counted and velocity.tracks(platform):
+        velocity.stage(db, [symbol for symbol, _ in counted], [created for _, created in counted])
+    apply_delta(db, delta)
+    if post_ids or updates:
+        bump_data_version(db)
+    metrics.inc("rows_inserted_total", len(post_ids), platform=platform, table="posts")
+    metrics.inc("rows_inserted_total", len(mentions), platform=platform, table="mentions")
+    metrics.inc("rows_updated_total", len(updates), platform=platform, table="posts")
+    metrics.inc("duplicate_posts_total", len(duplicates), platform=platform)
+    metrics.inc("rows_skipped_archived_total", skipped_archived, platform=platform)
+
+    return {
+        "inserted": len(post_ids), "updated": len(updates), "duplicates": len(duplicates),
+        "skipped_archived": skipped_archived, "post_ids": post_ids,
+    }
@@ -0,0 +1,320 @@
+"""Streaming mention velocity and spike detection per symbol.
+
+Every mention on a `VELOCITY_PLATFORMS` platform committed through
+`upsert_posts` is counted by its post time into two ring buffers per symbol:
+- twelve 5-minute buckets, covering the last hour;
+- 168 hourly buckets, covering the last 7 days.
+
+When an hour closes, it feeds an EWMA mean/variance of the symbol's hourly
+rate. `spike_z` compares the last hour against that baseline. Recording is
+O(1) per mention. Advancing the clock is one vectorized pass per elapsed
+hour. Nothing ever rescans history once a snapshot exists.
+
+State lives in numpy arrays indexed by symbol and is saved as an `.npz`
+snapshot (`VELOCITY_SNAPSHOT`) after each job. The dashboard reads that file.
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import atexit
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import Session
+
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 300
+MINUTE_SLOTS = 12           # 5-minute buckets -> 1h
+HOUR_SLOTS = 168            # hourly buckets -> 7d
+PER_HOUR = 3600 // BUCKET_SECONDS
+# Hours of zero activity folded into the baseline after a long gap; beyond
+# this the EWMA is effectively zero anyway.
+MAX_GAP_HOURS = 24 * 30
+# Hours a symbol must be tracked before it can be flagged as spiking.
+WARMUP_HOURS = 24
+_EVENTS_KEY = "velocity_events"
+
+def _buckets(timestamps):
+    """5-minute bucket index since the epoch for naive-UTC datetimes (NaT -> -1)."""
+    ts = pd.to_datetime(pd.Series(timestamps, dtype=object), errors="coerce")
+    out = np.full(len(ts), -1, dtype=np.int64)
+    valid = ts.notna().to_numpy()
+    seconds = (ts[valid] - datetime(1970, 1, 1)) // pd.Timedelta(seconds=1)
+    out[valid] = seconds.to_numpy(dtype=np.int64) // BUCKET_SECONDS
+    return out
+
+def _bucket_of(now):
+    return int(_buckets([now])[0])
+
+class VelocityTracker:
+    def __init__(self, half_life_hours=24.0, capacity=256):
+        self.alpha = 1.0 - 0.5 ** (1.0 / half_life_hours)
+        self.index = {}
+        self.symbols = []
+        self.minute = np.zeros((capacity, MINUTE_SLOTS), dtype=np.int32)
+        self.hourly = np.zeros((capacity, HOUR_SLOTS), dtype=np.int32)
+        self.mean = np.zeros(capacity)
+        self.var = np.zeros(capacity)
+        self.first_hour = np.zeros(capacity, dtype=np.int64)
+        self.head = -1              # latest 5-minute bucket seen
+        self.unsaved = []           # (symbols, buckets) recorded since the last save
+        self.saved_mtime = None     # mtime of the snapshot this state was loaded from/saved to
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _slot(self, symbol, hour):
+        idx = self.index.get(symbol)
+        if idx is None:
+            idx = len(self.symbols)
+            if idx == len(self.mean):
+                self._grow()
+            self.index[symbol] = idx
+            self.symbols.append(symbol)
+            self.first_hour[idx] = hour
+        return idx
+
+    def _grow(self):
+        # Doubling keeps appends amortized O(1).
+        size = 2 * len(self.mean)
+        for name in ("minute", "hourly", "mean", "var", "first_hour"):
+            old = getattr(self, name)
+            new = np.zeros((size,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def advance(self, bucket):
+        """Move the clock to `bucket`, closing elapsed hours into the baselines."""
+        with self.lock:
+            if self.head < 0:
+                self.head = bucket
+                return
+            if bucket <= self.head:
+                return
+            n = len(self.symbols)
+            old_hour, new_hour = self.head // PER_HOUR, bucket // PER_HOUR
+            if new_hour > old_hour and n:
+                a = self.alpha
+                x = self.hourly[:n, old_hour % HOUR_SLOTS].astype(np.float64)
+                diff = x - self.mean[:n]
+                self.mean[:n] += a * diff
+                self.var[:n] = (1 - a) * (self.var[:n] + a * diff * diff)
+                # Hours with no mentions at all in between.
+                for _ in range(min(new_hour - old_hour - 1, MAX_GAP_HOURS)):
+                    m = self.mean[:n]
+                    self.var[:n] = (1 - a) * (self.var[:n] + a * m * m)
+                    self.mean[:n] = (1 - a) * m
+            for h in range(old_hour + 1, min(new_hour, old_hour + HOUR_SLOTS) + 1):
+                self.hourly[:, h % HOUR_SLOTS] = 0
+            for b in range(self.head + 1, min(bucket, self.head + MINUTE_SLOTS) + 1):
+                self.minute[:, b % MINUTE_SLOTS] = 0
+            self.head = bucket
+
+    def record_buckets(self, symbols, buckets, track=True):
+        with self.lock:
+            buckets = np.asarray(buckets, dtype=np.int64)
+            keep = buckets >= 0
+            if not keep.any():
+                return
+            self.advance(int(buckets[keep].max()))
+            # Mentions older than the 7-day ring are ignored.
+            keep &= buckets // PER_HOUR > self.head // PER_HOUR - HOUR_SLOTS
+            symbols = [s for s, k in zip(symbols, keep) if k]
+            buckets = buckets[keep]
+            idx = np.fromiter(
+                (self._slot(s, b // PER_HOUR) for s, b in zip(symbols, buckets)), dtype=np.int64, count=len(buckets)
+            )
+            in_hour = buckets > self.head - MINUTE_SLOTS
+            np.add.at(self.hourly, (idx, (buckets // PER_HOUR) % HOUR_SLOTS), 1)
+            np.add.at(self.minute, (idx[in_hour], buckets[in_hour] % MINUTE_SLOTS), 1)
+            if track:
+                self.unsaved.append((symbols, buckets))
+
+    def record(self, symbols, timestamps):
+        """Count mentions of `symbols` posted at `timestamps` (naive UTC datetimes)."""
+        if len(symbols):
+            # Clamp clock skew so a future-dated post can't run the clock ahead.
+            buckets = np.minimum(_buckets(timestamps), _bucket_of(datetime.utcnow()))
+            self.record_buckets(symbols, buckets)
+
+    def frame(self, now=None):
+        """Per-symbol counts, baseline and spike score as of `now` (default: wall clock)."""
+        with self.lock:
+            self.advance(_bucket_of(now or datetime.utcnow()))
+            n = len(self.symbols)
+            hour = self.head // PER_HOUR
+            last_day = [(hour - i) % HOUR_SLOTS for i in range(24)]
+            m1 = self.minute[:n].sum(axis=1)
+            mean, var = self.mean[:n].copy(), self.var[:n].copy()
+            df = pd.DataFrame({
+                "symbol": list(self.symbols),
+                "mentions_1h": m1,
+                "mentions_24h": self.hourly[:n, last_day].sum(axis=1),
+                "mentions_7d": self.hourly[:n].sum(axis=1),
+                "baseline_per_hour": mean,
+                "tracked_hours": hour - self.first_hour[:n],
+            })
+        # Poisson-style floor on the spread so a quiet symbol's first few
+        # mentions don't produce an enormous z-score.
+        df["spike_z"] = (m1 - mean) / np.sqrt(np.maximum(var, mean) + 1.0)
+        df["velocity"] = m1 / np.maximum(mean, 1.0 / 24)
+        df["spiking"] = (
+            (df["spike_z"] >= settings.velocity_spike_z)
+            & (df["mentions_1h"] >= settings.velocity_min_mentions)
+            & (df["tracked_hours"] >= WARMUP_HOURS)
+        )
+        return df
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with self.lock:
+            n = len(self.symbols)
+            with open(tmp, "wb") as fh:
+                np.savez_compressed(
+                    fh,
+                    symbols=np.array(self.symbols, dtype=str),
+                    minute=self.minute[:n], hourly=self.hourly[:n],
+                    mean=self.mean[:n], var=self.var[:n], first_hour=self.first_hour[:n],
+                    head=np.int64(self.head), alpha=np.float64(self.alpha),
+                )
+            os.replace(tmp, path)
+            self.unsaved = []
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            symbols = data["symbols"].tolist()
+            tracker = cls(capacity=max(256, len(symbols)))
+            tracker.alpha = float(data["alpha"])
+            n = len(symbols)
+            tracker.symbols = symbols
+            tracker.index = {s: i for i, s in enumerate(symbols)}
+            tracker.minute[:n] = data["minute"]
+            tracker.hourly[:n] = data["hourly"]
+            tracker.mean[:n] = data["mean"]
+            tracker.var[:n] = data["var"]
+            tracker.first_hour[:n] = data["first_hour"]
+            tracker.head = int(data["head"])
+        tracker.saved_mtime = Path(path).stat().st_mtime_ns
+        return tracker
+
+def trending(frame, limit=25):
+    """Symbols active in the last hour from `VelocityTracker.frame()`, spikes first."""
+    df = frame[frame["mentions_1h"] > 0]
+    return df.sort_values(["spiking", "spike_z", "mentions_1h"], ascending=False).head(limit).reset_index(drop=True)
+
+def tracked_platforms():
+    return [p for p in settings.velocity_platforms.split(",") if p]
+
+def tracks(platform):
+    return platform in tracked_platforms()
+
+def rebuild(bind, now=None, half_life_hours=None):
+    """Seed a tracker from the last 7 days of mentions (used when no snapshot exists)."""
+    now = now or datetime.utcnow()
+    tracker = VelocityTracker(half_life_hours or settings.velocity_half_life_hours)
+    since = now - timedelta(hours=HOUR_SLOTS)
+    df = pd.read_sql(text("""
+        SELECT m.symbol, p.created_at
+        FROM posts p
+        JOIN mentions m ON m.post_id = p.id
+        WHERE p.created_at >= :since
+          AND p.platform IN :platforms
+          AND p.canonical_post_id IS NULL
+        ORDER BY p.created_at
+    """).bindparams(bindparam("platforms", expanding=True)), bind,
+        params={"since": since, "platforms": tracked_platforms()})
+    buckets = _buckets(df["created_at"])
+    tracker.advance(_bucket_of(since))
+    # Replay hour by hour so the baselines see each hour close in order.
+    for _, part in df.groupby(buckets // PER_HOUR, sort=True):
+        tracker.record_buckets(part["symbol"].tolist(), buckets[part.index], track=False)
+    tracker.advance(_bucket_of(now))
+    return tracker
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_tracker():
+    """This process's tracker, loaded from the snapshot or seeded from the DB on first use."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            path = Path(settings.velocity_snapshot)
+            if path.exists():
+                try:
+                    _tracker = VelocityTracker.load(path)
+                except (OSError, ValueError, KeyError):
+                    log.exception("unreadable velocity snapshot %s; rebuilding", path)
+            if _tracker is None:
+                from .db import read_engine
+                _tracker = rebuild(read_engine)
+            atexit.register(_save_at_exit)
+        return _tracker
+
+def _save_at_exit():
+    from .db import writer
+    # Let queued writes commit (and be counted) before the final snapshot.
+    writer.close()
+    save_snapshot()
+
+def stage(db, symbols, timestamps):
+    """Queue mentions written in `db`'s transaction; they are counted once it commits."""
+    if not settings.velocity_enabled or not symbols:
+        return
+    # Load (or seed from committed rows) before this transaction's rows land.
+    get_tracker()
+    db.info.setdefault(_EVENTS_KEY, []).append((list(symbols), list(timestamps)))
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    events = session.info.pop(_EVENTS_KEY, None)
+    if events:
+        tracker = get_tracker()
+        for symbols, timestamps in events:
+            tracker.record(symbols, timestamps)
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_EVENTS_KEY, None)
+
+def save_snapshot(path=None):
+    """Write this process's tracker, first folding in a newer snapshot from another process."""
+    global _tracker
+    if _tracker is None:
+        return None
+    path = Path(path or settings.velocity_snapshot)
+    with _tracker_lock:
+        tracker = _tracker
+        with tracker.lock:
+            if path.exists() and path.stat().st_mtime_ns != tracker.saved_mtime:
+                merged = VelocityTracker.load(path)
+                for symbols, buckets in tracker.unsaved:
+                    merged.record_buckets(symbols, buckets, track=False)
+                tracker = _tracker = merged
+            tracker.save(path)
+            tracker.saved_mtime = path.stat().st_mtime_ns
+    return path
+
+_snapshot_cache = {}
+
+def load_snapshot(path=None):
+    """Latest saved tracker (re-read only when the file changes), or None."""
+    path = Path(path or settings.velocity_snapshot)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    cached = _snapshot_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _snapshot_cache[path] = (mtime, VelocityTracker.load(path))
+    return cached[1]